@@ -0,0 +1,177 @@
+# backend/application/services/job_service.py
+"""
+Jobs em segundo plano disponíveis para a API (/api/jobs).
+Cada tipo reaproveita o serviço que já executa a operação de forma síncrona
+e grava o resultado em um arquivo para download.
+"""
+
+import json
+import shutil
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from backend.application.services.produto_service import ProdutoService
+from backend.application.services.movimentacao_service import MovimentacaoService
+from backend.application.services.relatorio_service import RelatorioService
+from backend.infrastructure.repositories.produto_repository import ProdutoRepository
+from backend.infrastructure.repositories.job_repository import JobRepository, STATUS_CONCLUIDO
+from backend.infrastructure.jobs import executor
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Campos do job devolvidos pela API
+CAMPOS_PUBLICOS = ('id', 'tipo', 'status', 'progresso', 'mensagem', 'nome_resultado',
+                   'criado_em', 'iniciado_em', 'concluido_em')
+
+# Perfis que podem criar cada tipo de job: os mesmos da rota síncrona
+# equivalente (None: qualquer usuário logado)
+PERFIS_POR_TIPO = {
+    'exportar_estoque': None,
+    'relatorio_pedidos': ('gerente', 'dev'),
+    'importar_movimentacoes': None
+}
+
+
+class PermissaoJobNegada(Exception):
+    """Exceção para quando o usuário não pode criar o tipo de job"""
+    pass
+
+
+def _converter(valor):
+    """Decimal vira número; datas e demais tipos, texto"""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return str(valor)
+
+def _salvar_json(contexto, dados, nome):
+    """Grava um resultado JSON e retorna o dicionário esperado pelo executor"""
+    caminho = contexto.caminho_resultado('json')
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, default=_converter, ensure_ascii=False)
+    return {'arquivo': caminho, 'nome': nome, 'mimetype': 'application/json'}
+
+def _exportar_estoque(parametros, contexto):
+    contexto.progresso(5, "Gerando planilha")
+    exportacao = ProdutoService(ProdutoRepository()).exportar_estoque(
+        parametros, formato=parametros.get('formato', 'xlsx'))
+
+    caminho = contexto.caminho_resultado(exportacao['extensao'])
+    with exportacao['arquivo'] as origem, open(caminho, 'wb') as destino:
+        shutil.copyfileobj(origem, destino)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return {
+        'arquivo': caminho,
+        'nome': f"estoque_{timestamp}.{exportacao['extensao']}",
+        'mimetype': exportacao['mimetype'],
+        'mensagem': f"{exportacao['linhas']} linhas exportadas"
+    }
+
+def _relatorio_pedidos(parametros, contexto):
+    contexto.progresso(5, "Calculando relatório")
+    relatorio = RelatorioService().gerar_relatorio_pedidos(parametros)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    resultado = _salvar_json(contexto, relatorio, f"relatorio_pedidos_{timestamp}.json")
+    resultado['mensagem'] = f"{relatorio['total_pedidos']} pedidos no período"
+    return resultado
+
+def _importar_movimentacoes(parametros, contexto):
+    contexto.progresso(5, f"Registrando {len(parametros.get('movimentacoes') or [])} movimentações")
+    resultado_lote = MovimentacaoService().registrar_lote(
+        parametros.get('movimentacoes') or [],
+        modo=parametros.get('modo', 'movimentacao'),
+        parcial=str(parametros.get('parcial', '')).lower() in ('1', 'true', 'sim'),
+        observacao=parametros.get('observacao')
+    )
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    resultado = _salvar_json(contexto, resultado_lote, f"importacao_movimentacoes_{timestamp}.json")
+    resultado['mensagem'] = f"{resultado_lote['aplicadas']} aplicadas, {resultado_lote['erros']} com erro"
+    return resultado
+
+
+executor.registrar_tipo('exportar_estoque', _exportar_estoque)
+executor.registrar_tipo('relatorio_pedidos', _relatorio_pedidos)
+executor.registrar_tipo('importar_movimentacoes', _importar_movimentacoes)
+
+
+class JobService:
+    """
+    Serviço para criar e acompanhar jobs em segundo plano.
+    """
+
+    def __init__(self):
+        self.job_repository = JobRepository()
+
+    def criar_job(self, tipo: str, parametros: Optional[Dict[str, Any]], usuario_id: int,
+                  usuario_tipo: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Enfileira um job.
+
+        Args:
+            tipo: 'exportar_estoque', 'relatorio_pedidos' ou 'importar_movimentacoes'
+            parametros: Parâmetros do tipo (os mesmos da rota síncrona equivalente)
+            usuario_id: Usuário que solicitou o job
+            usuario_tipo: Perfil do usuário (ver PERFIS_POR_TIPO)
+
+        Returns:
+            Dict[str, Any]: id e status do job
+
+        Raises:
+            ValueError: Se o tipo ou os parâmetros forem inválidos
+            PermissaoJobNegada: Se o perfil do usuário não puder criar o tipo
+            executor.FilaJobsCheia: Se o processo já estiver no limite de jobs
+        """
+        if parametros is not None and not isinstance(parametros, dict):
+            raise ValueError("Os parâmetros do job devem ser um objeto JSON")
+
+        perfis = PERFIS_POR_TIPO.get(tipo)
+        if perfis is not None and usuario_tipo not in perfis:
+            raise PermissaoJobNegada(f"Você não tem permissão para criar jobs do tipo '{tipo}'")
+
+        job_id = executor.enfileirar(tipo, parametros or {}, usuario_id)
+        return {'id': job_id, 'tipo': tipo, 'status': 'pendente', 'progresso': 0}
+
+    def obter_job(self, job_id: str, usuario_id: int, ver_todos: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o job visível para o usuário (o próprio, ou qualquer um se ver_todos).
+
+        Returns:
+            Optional[Dict[str, Any]]: Campos públicos do job, ou None se não encontrado
+        """
+        job = self._obter_visivel(job_id, usuario_id, ver_todos)
+        return self._formatar(job) if job else None
+
+    def listar_jobs(self, usuario_id: int, limite: int = 50) -> List[Dict[str, Any]]:
+        """Lista os jobs mais recentes do usuário"""
+        return [self._formatar(job) for job in self.job_repository.listar_por_usuario(usuario_id, limite)]
+
+    def obter_resultado(self, job_id: str, usuario_id: int, ver_todos: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o arquivo de resultado de um job concluído.
+
+        Returns:
+            Optional[Dict[str, Any]]: 'arquivo', 'nome' e 'mimetype', ou None
+            se o job não existir, não tiver terminado ou o resultado tiver expirado
+        """
+        job = self._obter_visivel(job_id, usuario_id, ver_todos)
+        if not job or job['status'] != STATUS_CONCLUIDO or not job['arquivo_resultado']:
+            return None
+        return {
+            'arquivo': job['arquivo_resultado'],
+            'nome': job['nome_resultado'],
+            'mimetype': job['mimetype_resultado']
+        }
+
+    def _obter_visivel(self, job_id, usuario_id, ver_todos):
+        job = self.job_repository.obter_por_id(job_id)
+        if job and not ver_todos and job['usuario_id'] != usuario_id:
+            return None
+        return job
+
+    def _formatar(self, job):
+        return {campo: job.get(campo) for campo in CAMPOS_PUBLICOS}
@@ -3,18 +3,30 @@ Serviço de aplicação para gerenciar movimentações de estoque.
 Implementa a lógica de negócio relacionada a entradas e saídas de produtos.
 """
 
+import io
+import csv
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from datetime import datetime
 
 from backend.domain.models.movimentacao import Movimentacao, TipoMovimentacao
 from backend.domain.models.produto import Produto
 from backend.infrastructure.repositories.movimentacao_repository import MovimentacaoRepository
 from backend.infrastructure.repositories.produto_repository import ProdutoRepository
+from backend.infrastructure.db.unit_of_work import transacao
+from backend.infrastructure.cache.coalescencia import coalescer
+from backend.infrastructure.cache.versoes import MOVIMENTACOES, CATALOGO_PRODUTOS
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
+# Modos aceitos no registro em lote
+MODO_MOVIMENTACAO = "movimentacao"  # cada linha é uma entrada ou saída
+MODO_CONTAGEM = "contagem"          # cada linha é a quantidade contada no inventário
+
+# Máximo de linhas por lote
+LIMITE_LINHAS_LOTE = 5000
+
 
 class MovimentacaoService:
     """
@@ -42,6 +54,13 @@ class MovimentacaoService:
             ValueError: Se o produto não existir ou dados inválidos
             Exception: Em caso de erro na criação
         """
+        # Leitura do produto, gravação da movimentação e atualização do estoque
+        # compartilham a mesma conexão e um único commit
+        with transacao():
+            return self._registrar_movimentacao(dados)
+
+    def _registrar_movimentacao(self, dados: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementação de registrar_movimentacao, executada dentro da transação"""
         # Validar tipo de movimentação
         tipo_str = dados.get("tipo")
         try:
@@ -58,102 +77,295 @@ class MovimentacaoService:
             raise ValueError("A quantidade deve ser maior que zero")
         self.logger.info(f"Quantidade validada: {quantidade}")
 
-        # Validar produto - primeiro obter objeto de produto
+        # Criar objeto de movimentação (estoques preenchidos pelo ajuste atômico)
+        data_movimentacao = datetime.fromisoformat(dados.get("data")) if dados.get("data") else datetime.now()
         produto_id = dados.get("produto_id")
-        self.logger.info(f"Buscando produto ID: {produto_id}")
 
-        produto = self.produto_repository.obter_por_id(produto_id)
+        movimentacao = Movimentacao(
+            id=None,  # Será atribuído pelo banco
+            produto_id=produto_id,
+            tipo=tipo,
+            quantidade=quantidade,
+            preco_unitario=float(dados.get("preco_unitario", 0)),
+            data=data_movimentacao,
+            observacao=dados.get("observacao")
+        )
 
-        # Se o produto não existir, tentar recuperá-lo de qualquer forma
-        if not produto:
-            self.logger.warning(f"Produto ID {produto_id} não encontrado no banco de dados")
+        # Ajustar estoque e gravar a movimentação em um único passo
+        resultado = self.movimentacao_repository.registrar_com_ajuste(movimentacao)
 
-            # Tentar buscar mesmo deletado para mensagem mais informativa
-            produto_historico = self.produto_repository.obter_produto_mesmo_deletado(produto_id)
-            if produto_historico:
-                self.logger.warning(f"Produto ID {produto_id} foi encontrado, mas está marcado como deletado")
-                raise ValueError(f"Produto com ID {produto_id} foi excluído e não pode receber movimentações")
+        if resultado is None:
+            produto = self._diagnosticar_ajuste_recusado(produto_id, quantidade)
 
-            # Tentar criar um produto padrão como fallback
-            try:
-                produto_padrao = self.produto_repository.verificar_e_criar_produto_padrao()
-                if produto_padrao:
-                    produto = produto_padrao
-                    self.logger.info(f"Usando produto padrão ID={produto.id} para movimentação")
-                else:
-                    # Criar produto virtual temporário para esta operação
-                    self.logger.warning("Usando produto virtual temporário após erro")
-                    produto = Produto(
-                        id=1,  # ID temporário
-                        nome="Produto Temporário",
-                        descricao="Produto criado temporariamente para movimentação",
-                        preco=0.0,
-                        quantidade_estoque=100  # Estoque padrão
-                    )
-            except Exception as e:
-                self.logger.error(f"Erro ao criar produto padrão: {str(e)}")
-                # Último recurso: produto virtual temporário
-                self.logger.warning("Usando produto virtual temporário após erro")
-                produto = Produto(
-                    id=1,  # ID temporário
-                    nome="Produto Temporário",
-                    descricao="Produto criado temporariamente para movimentação",
-                    preco=0.0,
-                    quantidade_estoque=100  # Estoque padrão
-                )
-
-        # Verificar estoque se for saída
-        estoque_anterior = produto.quantidade_estoque
-        if tipo == TipoMovimentacao.SAIDA and quantidade > estoque_anterior:
+            # Produto padrão usado como fallback para IDs inexistentes
+            movimentacao.produto_id = produto.id
+            resultado = self.movimentacao_repository.registrar_com_ajuste(movimentacao)
+            if resultado is None:
+                raise ValueError(f"Estoque insuficiente. Disponível: {produto.quantidade_estoque} unidades")
+
+        movimentacao = resultado
+        self.logger.info(
+            f"Estoque ajustado: anterior={movimentacao.estoque_anterior}, atual={movimentacao.estoque_atual}")
+
+        # Preparar resposta
+        produto = self.produto_repository.obter_por_id(movimentacao.produto_id)
+        movimentacao_dict = movimentacao.to_dict()
+        movimentacao_dict["produto_nome"] = produto.nome if produto else None
+
+        self.logger.info(f"Movimentação concluída com sucesso: ID={movimentacao.id}, Produto={movimentacao_dict['produto_nome']}")
+        return movimentacao_dict
+
+    def _diagnosticar_ajuste_recusado(self, produto_id: int, quantidade: int) -> Produto:
+        """
+        Explica por que o ajuste atômico não foi aplicado.
+        Só é chamado no caminho de erro, então o caminho normal não lê o produto.
+
+        Returns:
+            Produto: Produto padrão a usar quando o ID informado não existe
+
+        Raises:
+            ValueError: Se faltar estoque, o produto estiver excluído ou não houver fallback
+        """
+        produto = self.produto_repository.obter_por_id(produto_id)
+        if produto:
             self.logger.error(
-                f"Estoque insuficiente para saída. Disponível: {estoque_anterior}, Solicitado: {quantidade}")
-            raise ValueError(f"Estoque insuficiente. Disponível: {estoque_anterior} unidades")
+                f"Estoque insuficiente para saída. Disponível: {produto.quantidade_estoque}, Solicitado: {quantidade}")
+            raise ValueError(f"Estoque insuficiente. Disponível: {produto.quantidade_estoque} unidades")
 
-        # Calcular novo estoque
-        if tipo == TipoMovimentacao.ENTRADA:
-            estoque_atual = estoque_anterior + quantidade
-        else:  # SAIDA
-            estoque_atual = estoque_anterior - quantidade
+        self.logger.warning(f"Produto ID {produto_id} não encontrado no banco de dados")
 
-        self.logger.info(f"Estoque calculado: anterior={estoque_anterior}, atual={estoque_atual}")
+        # Tentar buscar mesmo deletado para mensagem mais informativa
+        produto_historico = self.produto_repository.obter_produto_mesmo_deletado(produto_id)
+        if produto_historico:
+            self.logger.warning(f"Produto ID {produto_id} foi encontrado, mas está marcado como deletado")
+            raise ValueError(f"Produto com ID {produto_id} foi excluído e não pode receber movimentações")
 
-        # Criar objeto de movimentação
-        data_movimentacao = datetime.fromisoformat(dados.get("data")) if dados.get("data") else datetime.now()
+        # Tentar usar o produto padrão como fallback
+        produto_padrao = self.produto_repository.verificar_e_criar_produto_padrao()
+        if not produto_padrao or produto_padrao.id == produto_id:
+            raise ValueError(f"Produto com ID {produto_id} não encontrado")
 
-        movimentacao = Movimentacao(
-            id=None,  # Será atribuído pelo banco
-            produto_id=produto.id,
-            tipo=tipo,
-            quantidade=quantidade,
-            preco_unitario=float(dados.get("preco_unitario", 0)),
-            data=data_movimentacao,
-            observacao=dados.get("observacao"),
-            estoque_anterior=estoque_anterior,
-            estoque_atual=estoque_atual
-        )
+        self.logger.info(f"Usando produto padrão ID={produto_padrao.id} para movimentação")
+        return produto_padrao
+
+    def registrar_lote(self, linhas: List[Dict[str, Any]], modo: str = MODO_MOVIMENTACAO,
+                       parcial: bool = False, observacao: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Registra várias movimentações em uma única transação.
+        Todos os produtos são lidos (e bloqueados) com uma query, as linhas do
+        histórico são gravadas com INSERTs de várias linhas e o estoque de
+        cada produto é ajustado por um único UPDATE.
+
+        Args:
+            linhas: Movimentações ({produto_id, tipo, quantidade, preco_unitario, observacao})
+                    ou, no modo contagem, {produto_id, quantidade} com a quantidade contada
+            modo: "movimentacao" ou "contagem" (gera a diferença para o estoque atual)
+            parcial: Se True, aplica as linhas válidas mesmo havendo linhas com erro
+            observacao: Observação usada nas linhas que não informarem uma
+
+        Returns:
+            Dicionário com totais e o resultado de cada linha
 
-        self.logger.info(f"Movimentação criada: {movimentacao.to_dict()}")
+        Raises:
+            ValueError: Se o modo for inválido ou o lote estiver vazio/grande demais
+        """
+        if modo not in (MODO_MOVIMENTACAO, MODO_CONTAGEM):
+            raise ValueError(f"Modo inválido: {modo}. Use '{MODO_MOVIMENTACAO}' ou '{MODO_CONTAGEM}'")
+        if not linhas:
+            raise ValueError("Nenhuma movimentação informada")
+        if not isinstance(linhas, list):
+            raise ValueError("As movimentações devem ser enviadas como uma lista")
+        if len(linhas) > LIMITE_LINHAS_LOTE:
+            raise ValueError(f"O lote deve ter no máximo {LIMITE_LINHAS_LOTE} linhas")
+
+        with transacao():
+            return self._registrar_lote(linhas, modo, parcial, observacao)
+
+    def _registrar_lote(self, linhas: List[Dict[str, Any]], modo: str, parcial: bool,
+                        observacao: Optional[str]) -> Dict[str, Any]:
+        """Implementação de registrar_lote, executada dentro da transação"""
+        resultados = []
+        validas = []
+
+        # Validar o formato de cada linha antes de ir ao banco
+        for numero, dados in enumerate(linhas, start=1):
+            try:
+                validas.append((numero, self._ler_linha_lote(dados, modo)))
+            except ValueError as e:
+                produto_id = dados.get("produto_id") if isinstance(dados, dict) else None
+                resultados.append({"linha": numero, "produto_id": produto_id,
+                                   "status": "erro", "erro": str(e)})
+
+        # Uma query para todos os produtos do lote
+        produtos = self.produto_repository.obter_para_reserva(
+            list({linha["produto_id"] for _, linha in validas}))
+        estoque = {produto_id: produto.quantidade_estoque for produto_id, produto in produtos.items()}
+
+        movimentacoes = []
+        for numero, linha in validas:
+            produto_id = linha["produto_id"]
+            resultado = {"linha": numero, "produto_id": produto_id}
+
+            if produto_id not in estoque:
+                resultado.update(status="erro", erro=f"Produto com ID {produto_id} não encontrado")
+                resultados.append(resultado)
+                continue
+
+            estoque_anterior = estoque[produto_id]
+            if modo == MODO_CONTAGEM:
+                diferenca = linha["quantidade"] - estoque_anterior
+                tipo = TipoMovimentacao.ENTRADA if diferenca > 0 else TipoMovimentacao.SAIDA
+                quantidade = abs(diferenca)
+            else:
+                tipo = linha["tipo"]
+                quantidade = linha["quantidade"]
+
+            if quantidade == 0:
+                resultado.update(status="sem_alteracao", estoque_anterior=estoque_anterior,
+                                 estoque_atual=estoque_anterior)
+                resultados.append(resultado)
+                continue
+
+            if tipo == TipoMovimentacao.SAIDA and quantidade > estoque_anterior:
+                resultado.update(status="erro",
+                                 erro=f"Estoque insuficiente. Disponível: {estoque_anterior} unidades")
+                resultados.append(resultado)
+                continue
+
+            estoque_atual = estoque_anterior + quantidade if tipo == TipoMovimentacao.ENTRADA \
+                else estoque_anterior - quantidade
+            estoque[produto_id] = estoque_atual
+
+            movimentacoes.append((resultado, Movimentacao(
+                id=None,
+                produto_id=produto_id,
+                tipo=tipo,
+                quantidade=quantidade,
+                preco_unitario=linha["preco_unitario"],
+                data=linha["data"] or datetime.now(),
+                observacao=linha["observacao"] or observacao or
+                           ("Contagem de inventário" if modo == MODO_CONTAGEM else None),
+                estoque_anterior=estoque_anterior,
+                estoque_atual=estoque_atual
+            )))
+            resultados.append(resultado)
+
+        erros = sum(1 for resultado in resultados if resultado.get("status") == "erro")
+        aplicar = movimentacoes and (parcial or erros == 0)
+
+        if aplicar:
+            self.movimentacao_repository.criar_em_lote([movimentacao for _, movimentacao in movimentacoes])
+
+            # Um UPDATE com o saldo líquido de cada produto
+            ajustes = {produto_id: estoque[produto_id] - produtos[produto_id].quantidade_estoque
+                       for produto_id in {movimentacao.produto_id for _, movimentacao in movimentacoes}}
+            alterados = self.produto_repository.ajustar_estoque_em_lote(ajustes)
+            if alterados != len([delta for delta in ajustes.values() if delta]):
+                raise Exception("Estoque alterado durante o registro do lote")
+
+        for resultado, movimentacao in movimentacoes:
+            resultado.update(
+                status="ok" if aplicar else "nao_aplicada",
+                movimentacao_id=movimentacao.id,
+                tipo=movimentacao.tipo.value,
+                quantidade=movimentacao.quantidade,
+                estoque_anterior=movimentacao.estoque_anterior,
+                estoque_atual=movimentacao.estoque_atual
+            )
+
+        resultados.sort(key=lambda resultado: resultado["linha"])
+        self.logger.info(f"Lote de movimentações ({modo}): {len(linhas)} linhas, "
+                         f"{len(movimentacoes) if aplicar else 0} aplicadas, {erros} com erro")
+
+        return {
+            "modo": modo,
+            "total_linhas": len(linhas),
+            "aplicadas": len(movimentacoes) if aplicar else 0,
+            "erros": erros,
+            "resultados": resultados
+        }
+
+    def _ler_linha_lote(self, dados: Dict[str, Any], modo: str) -> Dict[str, Any]:
+        """
+        Valida e normaliza uma linha do lote (sem acessar o banco).
+
+        Raises:
+            ValueError: Se a linha não for um objeto ou algum campo for inválido
+        """
+        if not isinstance(dados, dict):
+            raise ValueError("Linha inválida: cada movimentação deve ser um objeto")
 
-        # Persistir movimentação
         try:
-            movimentacao = self.movimentacao_repository.criar(movimentacao)
-            self.logger.info(f"Movimentação persistida com ID: {movimentacao.id}")
+            produto_id = int(dados.get("produto_id"))
+        except (TypeError, ValueError):
+            raise ValueError(f"ID de produto inválido: {dados.get('produto_id')}")
 
-            # Atualizar estoque do produto
-            produto.quantidade_estoque = estoque_atual
-            self.produto_repository.atualizar(produto)
+        try:
+            quantidade = int(dados.get("quantidade"))
+        except (TypeError, ValueError):
+            raise ValueError(f"Quantidade inválida: {dados.get('quantidade')}")
+
+        tipo = None
+        if modo == MODO_CONTAGEM:
+            if quantidade < 0:
+                raise ValueError("A quantidade contada não pode ser negativa")
+        else:
+            if quantidade <= 0:
+                raise ValueError("A quantidade deve ser maior que zero")
+            tipo_str = str(dados.get("tipo") or "").strip().lower().replace("í", "i")
+            try:
+                tipo = TipoMovimentacao(tipo_str)
+            except ValueError:
+                raise ValueError(f"Tipo de movimentação inválido: {dados.get('tipo')}")
 
-            # Preparar resposta
-            movimentacao_dict = movimentacao.to_dict()
-            movimentacao_dict["produto_nome"] = produto.nome
+        try:
+            preco_unitario = float(str(dados.get("preco_unitario") or 0).replace(",", "."))
+        except ValueError:
+            raise ValueError(f"Preço unitário inválido: {dados.get('preco_unitario')}")
+        if preco_unitario < 0:
+            raise ValueError("Preço unitário não pode ser negativo")
 
-            self.logger.info(f"Movimentação concluída com sucesso: ID={movimentacao.id}, Produto={produto.nome}")
-            return movimentacao_dict
+        data = dados.get("data")
+        if data:
+            try:
+                data = datetime.fromisoformat(data)
+            except (TypeError, ValueError):
+                raise ValueError(f"Data inválida: {data}")
+
+        return {
+            "produto_id": produto_id,
+            "tipo": tipo,
+            "quantidade": quantidade,
+            "preco_unitario": preco_unitario,
+            "data": data,
+            "observacao": dados.get("observacao") or None
+        }
+
+    def ler_csv_lote(self, conteudo: str) -> List[Dict[str, Any]]:
+        """
+        Converte um CSV (separado por vírgula ou ponto e vírgula) em linhas do lote.
+        A primeira linha deve ser o cabeçalho: produto_id, tipo, quantidade,
+        preco_unitario, observacao (no modo contagem bastam produto_id e quantidade).
 
-        except Exception as e:
-            self.logger.error(f"Erro ao finalizar movimentação: {str(e)}")
-            raise Exception(f"Erro ao registrar movimentação: {str(e)}")
+        Args:
+            conteudo: Texto do arquivo CSV
 
+        Returns:
+            Lista de dicionários no formato aceito por registrar_lote
+        """
+        try:
+            dialeto = csv.Sniffer().sniff(conteudo.split("\n", 1)[0], delimiters=",;")
+        except csv.Error:
+            dialeto = csv.excel
+
+        leitor = csv.DictReader(io.StringIO(conteudo.lstrip("\ufeff")), dialect=dialeto)
+        return [
+            {(chave or "").strip().lower(): (valor or "").strip() for chave, valor in linha.items()}
+            for linha in leitor
+            if any((valor or "").strip() for valor in linha.values())
+        ]
+
+    @coalescer(MOVIMENTACOES, CATALOGO_PRODUTOS)
     def listar_movimentacoes(self) -> List[Dict[str, Any]]:
         """
         Lista todas as movimentações de estoque.
@@ -169,6 +381,23 @@ class MovimentacaoService:
             self.logger.error(f"Erro ao listar movimentações: {str(e)}")
             return []
 
+    def listar_alteracoes(self, cursor: Optional[str] = None, limite: int = 500) -> Dict[str, Any]:
+        """
+        Lista as movimentações registradas depois do cursor.
+
+        Args:
+            cursor: Cursor devolvido pela chamada anterior (None para todas)
+            limite: Máximo de movimentações retornadas
+
+        Returns:
+            Dicionário com 'movimentacoes', 'cursor' e 'tem_mais'
+        """
+        try:
+            return self.movimentacao_repository.listar_alteracoes(cursor, limite=limite)
+        except Exception as e:
+            self.logger.error(f"Erro ao listar alterações de movimentações: {str(e)}")
+            raise
+
     def obter_movimentacao(self, id: int) -> Optional[Dict[str, Any]]:
         """
         Obtém uma movimentação pelo ID.
@@ -205,6 +434,27 @@ class MovimentacaoService:
             self.logger.error(f"Erro ao obter movimentação ID {id}: {str(e)}")
             return None
 
+    def iterar_movimentacoes(self, produto_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre as movimentações (de todos os produtos ou de um) sem
+        carregá-las de uma vez, para respostas em streaming.
+
+        Args:
+            produto_id: ID do produto (None para todas)
+
+        Returns:
+            Gerador de dicionários no formato de listar_movimentacoes
+        """
+        if produto_id is None:
+            return self.movimentacao_repository.iterar_todos()
+
+        # Mesmo comportamento da listagem: produto inexistente não tem movimentações
+        if not self.produto_repository.obter_produto_mesmo_deletado(produto_id):
+            self.logger.warning(f"Produto ID {produto_id} não encontrado para listar movimentações")
+            return iter(())
+        return self.movimentacao_repository.iterar_por_produto(produto_id)
+
+    @coalescer(MOVIMENTACOES, CATALOGO_PRODUTOS)
     def listar_movimentacoes_por_produto(self, produto_id: int) -> List[Dict[str, Any]]:
         """
         Lista todas as movimentações de um produto específico.
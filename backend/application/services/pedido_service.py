@@ -6,6 +6,10 @@ from backend.domain.models.pedido import Pedido, ItemPedido, StatusPedido
 from backend.domain.models.cliente import Cliente
 from backend.infrastructure.repositories.pedido_repository import PedidoRepository
 from backend.infrastructure.repositories.produto_repository import ProdutoRepository
+from backend.infrastructure.db.unit_of_work import transacao
+from backend.infrastructure.cache.coalescencia import coalescer
+from backend.infrastructure.cache.versoes import PEDIDOS, CATALOGO_PRODUTOS
+from backend.domain.exceptions.domain_exceptions import EstoqueInsuficienteException, ProdutoNaoEncontradoException
 import logging
 
 # Configurar logger
@@ -21,10 +25,35 @@ class PedidoService:
         self.pedido_repository = PedidoRepository()
         self.produto_repository = ProdutoRepository()
 
-    def criar_pedido(self, dados_cliente: Dict[str, Any], itens_pedido: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def criar_pedido(self, dados_cliente: Dict[str, Any], itens_pedido: List[Dict[str, Any]],
+                     status: StatusPedido = StatusPedido.CARRINHO,
+                     reservar_estoque: bool = False) -> Dict[str, Any]:
         """
         Cria um novo pedido com os dados do cliente e itens.
+        Os produtos são lidos e bloqueados com uma única query, validados em
+        conjunto e, se reservar_estoque for True, o estoque é baixado com um
+        único UPDATE condicional; tudo na mesma transação.
+
+        Args:
+            dados_cliente: nome, telefone, email e endereco do cliente
+            itens_pedido: Lista de {'id': produto_id, 'quantidade': n}
+            status: Status inicial do pedido
+            reservar_estoque: Se deve baixar o estoque já na criação
+
+        Returns:
+            Dict[str, Any]: Pedido criado
+
+        Raises:
+            ValueError: Se os dados do pedido forem inválidos
+            ProdutoNaoEncontradoException: Se algum produto não existir
+            EstoqueInsuficienteException: Se faltar estoque para algum produto
         """
+        with transacao():
+            return self._criar_pedido(dados_cliente, itens_pedido, status, reservar_estoque)
+
+    def _criar_pedido(self, dados_cliente: Dict[str, Any], itens_pedido: List[Dict[str, Any]],
+                      status: StatusPedido, reservar_estoque: bool) -> Dict[str, Any]:
+        """Implementação de criar_pedido, executada dentro da transação"""
         try:
             logger.info(f"Iniciando criação de pedido para cliente: {dados_cliente.get('nome')}")
 
@@ -41,50 +70,44 @@ class PedidoService:
                 logger.error("Dados do cliente incompletos")
                 raise ValueError("Nome e telefone do cliente são obrigatórios")
 
-            # Validar endereço
-            try:
-                cliente.validar_endereco()
-            except ValueError as e:
-                logger.error(f"Endereço inválido: {str(e)}")
-                raise
+            # Validar endereço (endereços em texto livre do formulário antigo não são estruturados)
+            if isinstance(cliente.endereco, dict):
+                try:
+                    cliente.validar_endereco()
+                except ValueError as e:
+                    logger.error(f"Endereço inválido: {str(e)}")
+                    raise
+
+            # Validar pedido
+            quantidades = self._agrupar_quantidades(itens_pedido)
+            if not quantidades:
+                logger.error("Tentativa de criar pedido sem itens")
+                raise ValueError("O pedido deve conter pelo menos um item")
+
+            # Buscar e bloquear todos os produtos de uma vez
+            produtos = self.produto_repository.obter_para_reserva(list(quantidades))
+            self._validar_estoque(quantidades, produtos)
 
             # Criar objeto Pedido
             pedido = Pedido(
                 id=0,  # Será atribuído pelo repositório
                 cliente=cliente,
-                status=StatusPedido.CARRINHO,
+                status=status,
                 data_criacao=datetime.now()
             )
 
-            # Adicionar itens ao pedido
-            for item_data in itens_pedido:
-                produto_id = item_data.get('id')
-                quantidade = item_data.get('quantidade', 1)
-
-                # Validar produto
-                produto = self.produto_repository.obter_por_id(produto_id)
-                if not produto:
-                    logger.error(f"Produto não encontrado: ID {produto_id}")
-                    raise ValueError(f"Produto com ID {produto_id} não encontrado")
-
-                # Verificar estoque
-                if quantidade > produto.quantidade_estoque:
-                    logger.error(f"Estoque insuficiente para produto {produto.nome}")
-                    raise ValueError(f"Estoque insuficiente para o produto {produto.nome}")
-
-                # Criar e adicionar item
-                item = ItemPedido(
+            for produto_id, quantidade in quantidades.items():
+                produto = produtos[produto_id]
+                pedido.adicionar_item(ItemPedido(
                     produto_id=produto_id,
                     quantidade=quantidade,
                     preco_unitario=produto.preco,
                     nome=produto.nome
-                )
-                pedido.adicionar_item(item)
+                ))
 
-            # Validar pedido
-            if not pedido.itens:
-                logger.error("Tentativa de criar pedido sem itens")
-                raise ValueError("O pedido deve conter pelo menos um item")
+            if reservar_estoque:
+                self._ajustar_estoque(quantidades, baixa=True)
+                pedido.estoque_reservado = True
 
             # Salvar pedido
             pedido = self.pedido_repository.criar(pedido)
@@ -99,7 +122,13 @@ class PedidoService:
     def atualizar_status_pedido(self, pedido_id: int, novo_status: str, observacoes: Optional[str] = None) -> Dict[str, Any]:
         """
         Atualiza o status de um pedido existente.
+        O pedido e o estoque dos produtos são gravados em uma única transação.
         """
+        with transacao():
+            return self._atualizar_status_pedido(pedido_id, novo_status, observacoes)
+
+    def _atualizar_status_pedido(self, pedido_id: int, novo_status: str, observacoes: Optional[str] = None) -> Dict[str, Any]:
+        """Implementação de atualizar_status_pedido, executada dentro da transação"""
         try:
             logger.info(f"Tentando atualizar status do pedido {pedido_id} para {novo_status}")
 
@@ -134,8 +163,8 @@ class PedidoService:
             if status_enum == StatusPedido.CONFIRMADO:
                 self._atualizar_estoque_para_pedido_confirmado(pedido)
 
-            # Se o pedido for cancelado, restaurar estoque (apenas se estava confirmado)
-            if status_enum == StatusPedido.CANCELADO and pedido.status == StatusPedido.CONFIRMADO:
+            # Se o pedido for cancelado ou recusado, devolver o estoque que foi reservado
+            if status_enum in [StatusPedido.CANCELADO, StatusPedido.RECUSADO]:
                 self._restaurar_estoque_para_pedido_cancelado(pedido)
 
             # Salvar pedido atualizado
@@ -196,79 +225,132 @@ class PedidoService:
                 f"Transições permitidas: {', '.join([s.value for s in transicoes_permitidas.get(status_atual, [])])}"
             )
 
-    def _atualizar_estoque_para_pedido_confirmado(self, pedido: Pedido) -> None:
+    def _agrupar_quantidades(self, itens_pedido: List[Dict[str, Any]]) -> Dict[int, int]:
         """
-        Atualiza o estoque dos produtos quando um pedido é confirmado.
+        Soma as quantidades por produto, mantendo a ordem em que aparecem.
         """
-        for item in pedido.itens:
-            produto = self.produto_repository.obter_por_id(item.produto_id)
-            if produto:
-                # Verificar estoque novamente
-                if produto.quantidade_estoque < item.quantidade:
-                    raise ValueError(f"Estoque insuficiente para o produto {produto.nome}")
+        quantidades: Dict[int, int] = {}
+        for item_data in itens_pedido:
+            try:
+                produto_id = int(item_data.get('id'))
+                quantidade = int(item_data.get('quantidade', 1))
+            except (TypeError, ValueError):
+                raise ValueError(f"Item de pedido inválido: {item_data}")
 
-                # Reduzir estoque
-                produto.quantidade_estoque -= item.quantidade
-                self.produto_repository.atualizar(produto)
-                logger.info(f"Estoque do produto {produto.nome} atualizado: -{item.quantidade} unidades")
+            if quantidade <= 0:
+                raise ValueError(f"Quantidade inválida para o produto {produto_id}: {quantidade}")
 
-    def _restaurar_estoque_para_pedido_cancelado(self, pedido: Pedido) -> None:
+            quantidades[produto_id] = quantidades.get(produto_id, 0) + quantidade
+        return quantidades
+
+    def _validar_estoque(self, quantidades: Dict[int, int], produtos: Dict[int, Any]) -> None:
         """
-        Restaura o estoque dos produtos quando um pedido confirmado é cancelado.
+        Verifica, de uma vez, se todos os produtos existem e têm estoque.
         """
-        for item in pedido.itens:
-            produto = self.produto_repository.obter_por_id(item.produto_id)
-            if produto:
-                # Restaurar estoque
-                produto.quantidade_estoque += item.quantidade
-                self.produto_repository.atualizar(produto)
-                logger.info(f"Estoque do produto {produto.nome} restaurado: +{item.quantidade} unidades")
+        for produto_id, quantidade in quantidades.items():
+            produto = produtos.get(produto_id)
+            if not produto:
+                logger.error(f"Produto não encontrado: ID {produto_id}")
+                raise ProdutoNaoEncontradoException(produto_id)
 
-    def filtrar_pedidos(self, filtros: Dict[str, Any]) -> List[Dict[str, Any]]:
+            if quantidade > produto.quantidade_estoque:
+                logger.error(f"Estoque insuficiente para produto {produto.nome}")
+                raise EstoqueInsuficienteException(produto_id, produto.nome, quantidade,
+                                                   produto.quantidade_estoque)
+
+    def _ajustar_estoque(self, quantidades: Dict[int, int], baixa: bool) -> None:
         """
-        Filtra pedidos de acordo com critérios específicos.
+        Baixa ou devolve o estoque de todos os produtos com um único UPDATE.
         """
-        try:
-            # Obter todos os pedidos
-            pedidos = self.listar_pedidos()
+        sinal = -1 if baixa else 1
+        alterados = self.produto_repository.ajustar_estoque_em_lote(
+            {produto_id: sinal * quantidade for produto_id, quantidade in quantidades.items()})
+
+        if alterados != len(quantidades):
+            raise ValueError("Estoque insuficiente para um ou mais produtos do pedido")
 
-            # Aplicar filtros
-            if filtros.get('status'):
-                pedidos = [p for p in pedidos if p['status'] == filtros['status']]
+    def _atualizar_estoque_para_pedido_confirmado(self, pedido: Pedido) -> None:
+        """
+        Baixa o estoque dos produtos quando um pedido é confirmado,
+        se isso ainda não foi feito na criação.
+        """
+        if pedido.estoque_reservado:
+            return
 
-            if filtros.get('cliente_nome'):
-                termo = filtros['cliente_nome'].lower()
-                pedidos = [p for p in pedidos if termo in p['cliente']['nome'].lower()]
+        quantidades = self._agrupar_quantidades(
+            [{'id': item.produto_id, 'quantidade': item.quantidade} for item in pedido.itens])
+        if not quantidades:
+            return
 
-            if filtros.get('pedido_id'):
-                pedidos = [p for p in pedidos if p['id'] == filtros['pedido_id']]
+        produtos = self.produto_repository.obter_para_reserva(list(quantidades))
+        self._validar_estoque(quantidades, produtos)
+        self._ajustar_estoque(quantidades, baixa=True)
 
-            if filtros.get('data_inicial'):
-                data_inicial = datetime.fromisoformat(filtros['data_inicial'])
-                pedidos = [p for p in pedidos if datetime.fromisoformat(p['data_criacao']) >= data_inicial]
+        pedido.estoque_reservado = True
+        logger.info(f"Estoque baixado para o pedido {pedido.id} ({len(quantidades)} produtos)")
 
-            if filtros.get('data_final'):
-                data_final = datetime.fromisoformat(filtros['data_final'])
-                pedidos = [p for p in pedidos if datetime.fromisoformat(p['data_criacao']) <= data_final]
+    def _restaurar_estoque_para_pedido_cancelado(self, pedido: Pedido) -> None:
+        """
+        Devolve o estoque dos produtos de um pedido cancelado, se ele foi baixado.
+        """
+        if not pedido.estoque_reservado:
+            return
 
-            # Aplicar ordenação
-            ordenacao = filtros.get('ordenacao', 'data_recente')
+        quantidades = self._agrupar_quantidades(
+            [{'id': item.produto_id, 'quantidade': item.quantidade} for item in pedido.itens])
+        self.produto_repository.ajustar_estoque_em_lote(quantidades)
 
-            if ordenacao == 'data_recente':
-                pedidos.sort(key=lambda p: datetime.fromisoformat(p['data_criacao']), reverse=True)
-            elif ordenacao == 'data_antiga':
-                pedidos.sort(key=lambda p: datetime.fromisoformat(p['data_criacao']))
-            elif ordenacao == 'valor_alto':
-                pedidos.sort(key=lambda p: p['total'], reverse=True)
-            elif ordenacao == 'valor_baixo':
-                pedidos.sort(key=lambda p: p['total'])
+        pedido.estoque_reservado = False
+        logger.info(f"Estoque restaurado para o pedido {pedido.id} ({len(quantidades)} produtos)")
 
-            return pedidos
+    def filtrar_pedidos(self, filtros: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Filtra pedidos de acordo com critérios específicos.
+        Filtros e ordenação são aplicados no banco de dados.
+        """
+        try:
+            resultado = self.pedido_repository.buscar(filtros)
+            return [pedido.to_dict() for pedido in resultado['pedidos']]
 
         except Exception as e:
             logger.error(f"Erro ao filtrar pedidos: {str(e)}")
             raise
 
+    @coalescer(PEDIDOS, CATALOGO_PRODUTOS)
+    def listar_pedidos_paginado(self, filtros: Dict[str, Any], limite: int = 20,
+                                cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Lista uma página de pedidos filtrados, paginando por cursor.
+        O custo de cada página não depende do total de pedidos na tabela.
+        """
+        try:
+            limite = max(1, min(int(limite), 100))
+            resultado = self.pedido_repository.buscar(filtros, limite=limite, cursor=cursor)
+
+            return {
+                'pedidos': [pedido.to_dict() for pedido in resultado['pedidos']],
+                'proximo_cursor': resultado['proximo_cursor'],
+                'tem_proxima': resultado['proximo_cursor'] is not None,
+                'itens_por_pagina': limite
+            }
+
+        except Exception as e:
+            logger.error(f"Erro ao listar pedidos paginados: {str(e)}")
+            raise
+
+    def listar_alteracoes(self, cursor: Optional[str] = None, limite: int = 500) -> Dict[str, Any]:
+        """
+        Lista os pedidos criados, alterados ou excluídos depois do cursor,
+        para clientes que mantêm a lista atualizada incrementalmente.
+        """
+        try:
+            resultado = self.pedido_repository.listar_alteracoes(cursor, limite=limite)
+            resultado['pedidos'] = [pedido.to_dict() for pedido in resultado['pedidos']]
+            return resultado
+        except Exception as e:
+            logger.error(f"Erro ao listar alterações de pedidos: {str(e)}")
+            raise
+
     def enviar_pedido(self, pedido_id: int, distribuidor_id: int, observacoes_cliente: Optional[str] = None) -> Dict[str, Any]:
         """
         Envia um pedido do carrinho para o distribuidor.
@@ -361,14 +443,15 @@ class PedidoService:
         """
         Verifica se há estoque disponível para todos os itens do pedido.
         """
-        for item in pedido.itens:
-            produto = self.produto_repository.obter_por_id(item.produto_id)
-            if not produto:
-                logger.error(f"Produto não encontrado: ID {item.produto_id}")
-                raise ValueError(f"Produto com ID {item.produto_id} não encontrado")
+        quantidades = self._agrupar_quantidades(
+            [{'id': item.produto_id, 'quantidade': item.quantidade} for item in pedido.itens])
+        produtos = self.produto_repository.obter_para_reserva(list(quantidades))
 
-            if produto.quantidade_estoque < item.quantidade:
-                logger.error(f"Estoque insuficiente para o produto {produto.nome}")
-                return False
+        try:
+            self._validar_estoque(quantidades, produtos)
+        except ProdutoNaoEncontradoException as e:
+            raise ValueError(str(e))
+        except EstoqueInsuficienteException:
+            return False
 
         return True
@@ -4,7 +4,7 @@ Implementa a interface ProdutoServiceInterface.
 """
 
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import logging
 from werkzeug.utils import secure_filename
@@ -12,12 +12,21 @@ import uuid
 
 from backend.application.interfaces.produto_service_interface import ProdutoServiceInterface
 from backend.domain.models.produto import Produto
-from backend.infrastructure.repositories.produto_repository_interface import ProdutoRepositoryInterface
+from backend.infrastructure.interfaces.repositories.produto_repository_interface import ProdutoRepositoryInterface
+from backend.infrastructure.cache import catalogo_cache
+from backend.infrastructure.exportacao.planilhas import gerar_planilha, FORMATO_XLSX
 from backend.domain.exceptions.domain_exceptions import ProdutoNaoEncontradoException
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
+# Estoque até o qual um produto conta como "estoque baixo" (mesmo critério da tela de estoque)
+LIMITE_ESTOQUE_BAIXO = 5
+
+CABECALHOS_PRODUTOS = ["ID", "Nome", "Descrição", "Preço", "Estoque", "Valor em estoque", "Data de cadastro"]
+CABECALHOS_MOVIMENTACOES = ["ID", "Data", "Produto ID", "Produto", "Tipo", "Quantidade",
+                            "Preço unitário", "Estoque anterior", "Estoque atual", "Observação"]
+
 class ProdutoService(ProdutoServiceInterface):
     """
     Serviço para gerenciamento de produtos no sistema.
@@ -35,18 +44,39 @@ class ProdutoService(ProdutoServiceInterface):
     def listar_produtos(self) -> List[Dict[str, Any]]:
         """
         Lista todos os produtos ativos no sistema.
+        A lista vem do cache do catálogo, recarregado só após escritas.
 
         Returns:
             List[Dict[str, Any]]: Lista de produtos em formato de dicionário
         """
         try:
-            logger.info("Listando todos os produtos ativos")
-            produtos = self.produto_repository.listar_todos()
-            return [produto.to_dict() for produto in produtos]
+            return catalogo_cache.obter_produtos(self._carregar_produtos)
         except Exception as e:
             logger.error(f"Erro ao listar produtos: {str(e)}")
             raise
 
+    def _carregar_produtos(self) -> List[Dict[str, Any]]:
+        """Busca os produtos ativos no repositório (usado quando o cache está vazio)"""
+        logger.info("Listando todos os produtos ativos")
+        return [produto.to_dict() for produto in self.produto_repository.listar_todos()]
+
+    def listar_alteracoes(self, cursor: Optional[str] = None, limite: int = 500) -> Dict[str, Any]:
+        """
+        Lista os produtos criados, alterados ou excluídos depois do cursor.
+
+        Args:
+            cursor: Cursor devolvido pela chamada anterior (None para todos)
+            limite: Máximo de produtos retornados
+
+        Returns:
+            Dict[str, Any]: 'produtos', 'removidos', 'cursor' e 'tem_mais'
+        """
+        try:
+            return self.produto_repository.listar_alteracoes(cursor, limite=limite)
+        except Exception as e:
+            logger.error(f"Erro ao listar alterações de produtos: {str(e)}")
+            raise
+
     def obter_produto_por_id(self, produto_id: int) -> Optional[Dict[str, Any]]:
         """
         Obtém um produto pelo seu ID.
@@ -202,4 +232,80 @@ class ProdutoService(ProdutoServiceInterface):
             raise
         except Exception as e:
             logger.error(f"Erro ao excluir produto {produto_id}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def exportar_estoque(self, filtros: Optional[Dict[str, Any]] = None,
+                         formato: str = FORMATO_XLSX) -> Dict[str, Any]:
+        """
+        Exporta o estoque (e opcionalmente as movimentações) para XLSX ou CSV.
+        Produtos e movimentações são lidos do banco em lotes e escritos direto
+        no arquivo, então a memória usada não depende do tamanho do catálogo.
+
+        Args:
+            filtros: estoque_baixo (bool), estoque_maximo (int),
+                movimentacoes (bool), data_inicial e data_final (AAAA-MM-DD,
+                período das movimentações; data final inclusiva)
+            formato: 'xlsx' (padrão; CSV se o openpyxl não estiver instalado) ou 'csv'
+
+        Returns:
+            Dict[str, Any]: 'arquivo' (temporário, a ser fechado pelo chamador),
+            'mimetype', 'extensao' e 'linhas'
+
+        Raises:
+            ValueError: Se os filtros ou o formato forem inválidos
+        """
+        filtros = filtros or {}
+
+        estoque_maximo = filtros.get('estoque_maximo')
+        if estoque_maximo not in (None, ''):
+            estoque_maximo = int(estoque_maximo)
+        elif filtros.get('estoque_baixo'):
+            estoque_maximo = LIMITE_ESTOQUE_BAIXO
+        else:
+            estoque_maximo = None
+
+        abas = [(
+            "Estoque",
+            CABECALHOS_PRODUTOS,
+            (
+                [p['id'], p['nome'], p.get('descricao') or '', p['preco'], p['quantidade_estoque'],
+                 p['preco'] * p['quantidade_estoque'], p.get('data_criacao')]
+                for p in self.produto_repository.iterar_ativos(estoque_maximo)
+            )
+        )]
+
+        if filtros.get('movimentacoes'):
+            # Import tardio: o repositório de movimentações só é usado na exportação
+            from backend.infrastructure.repositories.movimentacao_repository import MovimentacaoRepository
+
+            data_inicial = self._ler_data_filtro(filtros.get('data_inicial'), 'data_inicial')
+            data_final = self._ler_data_filtro(filtros.get('data_final'), 'data_final')
+            if data_final:
+                data_final += timedelta(days=1)
+
+            abas.append((
+                "Movimentações",
+                CABECALHOS_MOVIMENTACOES,
+                (
+                    [m['id'], m['data'], m['produto_id'], m['produto_nome'], m['tipo'], m['quantidade'],
+                     m['preco_unitario'], m['estoque_anterior'], m['estoque_atual'], m.get('observacao') or '']
+                    for m in MovimentacaoRepository().iterar_por_periodo(data_inicial, data_final)
+                )
+            ))
+
+        try:
+            return gerar_planilha(abas, formato)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao exportar estoque: {str(e)}")
+            raise
+
+    def _ler_data_filtro(self, valor: Optional[str], campo: str) -> Optional[datetime]:
+        """Converte uma data AAAA-MM-DD dos filtros de exportação"""
+        if not valor:
+            return None
+        try:
+            return datetime.strptime(valor, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"Data inválida em '{campo}': use o formato AAAA-MM-DD")
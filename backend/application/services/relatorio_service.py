@@ -1,68 +1,206 @@
 # backend/application/services/relatorio_service.py
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+
+from backend.domain.models.pedido import StatusPedido
+from backend.infrastructure.repositories.pedido_repository import STATUS_LEGADOS, status_gravados
+from backend.infrastructure.repositories.relatorio_repository import RelatorioRepository, AGRUPAMENTOS
+from backend.infrastructure.analise.colunar import ColunasPedidos
+from backend.infrastructure.cache.coalescencia import coalescer
+from backend.infrastructure.cache.versoes import PEDIDOS, MOVIMENTACOES, CATALOGO_PRODUTOS
+import logging
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Séries temporais: pontos retornados por padrão e no máximo
+MAX_PONTOS_SERIE = 500
+LIMITE_PONTOS_SERIE = 2000
+# Períodos (dias, semanas ou meses) calculados antes da redução
+LIMITE_PERIODOS_SERIE = 20000
+# Período padrão da série e da análise quando data_inicial não é informada
+PERIODO_PADRAO_SERIE = timedelta(days=365)
+# Produtos no ranking da análise colunar: padrão e máximo
+TOP_PRODUTOS_ANALISE = 10
+LIMITE_TOP_ANALISE = 100
+
+
+def _inicio_periodo(dia: date, agrupamento: str) -> date:
+    """Início do período (dia, semana a partir de segunda ou mês) que contém o dia"""
+    if agrupamento == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if agrupamento == 'mes':
+        return dia.replace(day=1)
+    return dia
+
+def _proximo_periodo(inicio: date, agrupamento: str) -> date:
+    if agrupamento == 'semana':
+        return inicio + timedelta(days=7)
+    if agrupamento == 'mes':
+        return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return inicio + timedelta(days=1)
+
+def _reduzir_lttb(valores: List[float], limite: int) -> List[int]:
+    """
+    Escolhe até 'limite' índices da série com o algoritmo Largest-Triangle-Three-Buckets:
+    mantém o primeiro e o último ponto e, em cada faixa intermediária, o ponto que
+    forma o maior triângulo com o ponto anterior escolhido e a média da faixa seguinte.
+    Preserva picos e vales visíveis no gráfico com uma fração dos pontos.
+
+    Returns:
+        Índices escolhidos, em ordem crescente
+    """
+    total = len(valores)
+    if limite >= total or limite < 3:
+        return list(range(total))
+
+    escolhidos = [0]
+    tamanho_faixa = (total - 2) / (limite - 2)
+    anterior = 0
+
+    for faixa in range(limite - 2):
+        inicio = int(faixa * tamanho_faixa) + 1
+        fim = int((faixa + 1) * tamanho_faixa) + 1
+
+        # Média da faixa seguinte (a última faixa usa o último ponto)
+        inicio_seguinte = fim
+        fim_seguinte = min(int((faixa + 2) * tamanho_faixa) + 1, total)
+        if inicio_seguinte >= fim_seguinte:
+            inicio_seguinte, fim_seguinte = total - 1, total
+        media_x = (inicio_seguinte + fim_seguinte - 1) / 2
+        media_y = sum(valores[inicio_seguinte:fim_seguinte]) / (fim_seguinte - inicio_seguinte)
+
+        melhor, maior_area = inicio, -1.0
+        for indice in range(inicio, fim):
+            area = abs((anterior - media_x) * (valores[indice] - valores[anterior])
+                       - (anterior - indice) * (media_y - valores[anterior]))
+            if area > maior_area:
+                melhor, maior_area = indice, area
+
+        escolhidos.append(melhor)
+        anterior = melhor
+
+    escolhidos.append(total - 1)
+    return escolhidos
+
 
 class RelatorioService:
     """
     Serviço para gerar relatórios do sistema.
+    Os totais vêm das tabelas agregadas por dia (ver RelatorioRepository),
+    então o custo não depende do tamanho do histórico de pedidos; períodos
+    com horário são agregados pelo banco (GROUP BY) sobre os pedidos do intervalo.
     """
 
     def __init__(self):
-        self.pedido_repository = PedidoRepository()
+        self.relatorio_repository = RelatorioRepository()
+
+    def _ler_periodo(self, filtros: Dict[str, Any]) -> Tuple[Optional[datetime], Optional[datetime], bool]:
+        """
+        Converte data_inicial e data_final (ISO, com ou sem horário) no
+        intervalo [inicio, fim) e informa se ele cobre apenas dias inteiros.
+        Uma data_final sem horário inclui o dia inteiro.
+
+        Raises:
+            ValueError: Se alguma data for inválida
+        """
+        valores = {}
+        for campo in ('data_inicial', 'data_final'):
+            valor = filtros.get(campo)
+            try:
+                valores[campo] = datetime.fromisoformat(valor) if valor else None
+            except ValueError:
+                raise ValueError(f"{campo} inválida: use o formato AAAA-MM-DD ou AAAA-MM-DDTHH:MM")
+
+        inicio, fim = valores['data_inicial'], valores['data_final']
+        dias_inteiros = all(len(filtros.get(campo) or '') <= 10 for campo in ('data_inicial', 'data_final'))
 
+        if fim is not None:
+            # Fim exclusivo: dia seguinte (só data) ou o instante logo após o informado
+            fim += timedelta(days=1) if len(filtros['data_final']) <= 10 else timedelta(microseconds=1)
+        return inicio, fim, dias_inteiros
+
+    def _status_banco(self, status: Optional[str]) -> Optional[List[str]]:
+        """Valores gravados no banco que correspondem ao status do filtro (inclui os legados)"""
+        if not status:
+            return None
+        return status_gravados(status)
+
+    @coalescer(PEDIDOS)
     def gerar_relatorio_pedidos(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
         """
         Gera um relatório de pedidos com base nos filtros.
-        """
-        try:
-            # Obter pedidos filtrados
-            pedidos = self.pedido_repository.listar_todos()
 
-            # Aplicar filtros
-            if filtros.get('status'):
-                pedidos = [p for p in pedidos if p.status.value == filtros['status']]
+        Args:
+            filtros: status, data_inicial e data_final (AAAA-MM-DD, período inclusivo,
+                ou AAAA-MM-DDTHH:MM para um intervalo com horário)
 
-            if filtros.get('data_inicial'):
-                data_inicial = datetime.fromisoformat(filtros['data_inicial'])
-                pedidos = [p for p in pedidos if p.data_criacao >= data_inicial]
+        Returns:
+            Dict[str, Any]: periodo, total_pedidos, valor_total, status_resumo,
+            produtos_populares (top 10) e distribuidores
 
-            if filtros.get('data_final'):
-                data_final = datetime.fromisoformat(filtros['data_final'])
-                pedidos = [p for p in pedidos if p.data_criacao <= data_final]
+        Raises:
+            ValueError: Se alguma data for inválida
+        """
+        try:
+            inicio, fim, dias_inteiros = self._ler_periodo(filtros)
+            status = self._status_banco(filtros.get('status'))
+            repositorio = self.relatorio_repository
+
+            if dias_inteiros:
+                # Dias inteiros: tabelas agregadas por dia (data final inclusiva)
+                periodo = (inicio.date() if inicio else None, (fim - timedelta(days=1)).date() if fim else None)
+                consultar_status = repositorio.resumo_por_status
+                consultar_produtos = repositorio.produtos_mais_vendidos
+                consultar_distribuidores = repositorio.resumo_por_distribuidor
+            else:
+                # Período com horário: GROUP BY no banco sobre os pedidos do intervalo
+                periodo = (inicio, fim)
+                consultar_status = repositorio.calcular_resumo_por_status
+                consultar_produtos = repositorio.calcular_produtos_mais_vendidos
+                consultar_distribuidores = repositorio.calcular_resumo_por_distribuidor
 
-            # Calcular estatísticas
-            total_pedidos = len(pedidos)
+            # Resumo por status (status legados somados ao status atual equivalente)
+            por_status = {}
+            for linha in consultar_status(*periodo, status):
+                valor_status = STATUS_LEGADOS[linha['status']].value if linha['status'] in STATUS_LEGADOS \
+                    else linha['status']
+                atual = por_status.setdefault(valor_status, {'quantidade': 0, 'valor': 0.0})
+                atual['quantidade'] += int(linha['pedidos'])
+                atual['valor'] += float(linha['valor'])
 
-            valor_total = sum(p.calcular_total() for p in pedidos)
+            total_pedidos = sum(resumo['quantidade'] for resumo in por_status.values())
+            valor_total = sum(resumo['valor'] for resumo in por_status.values())
 
-            # Resumo por status
             status_resumo = {}
-            for status in StatusPedido:
-                count = sum(1 for p in pedidos if p.status == status)
-                status_resumo[status.value] = {
+            for status_pedido in StatusPedido:
+                count = por_status.get(status_pedido.value, {}).get('quantidade', 0)
+                status_resumo[status_pedido.value] = {
                     'quantidade': count,
                     'percentual': (count / total_pedidos * 100) if total_pedidos > 0 else 0
                 }
 
             # Produtos mais pedidos
-            produtos_count = {}
-            for pedido in pedidos:
-                for item in pedido.itens:
-                    if item.produto_id in produtos_count:
-                        produtos_count[item.produto_id]['quantidade'] += item.quantidade
-                        produtos_count[item.produto_id]['valor'] += item.calcular_subtotal()
-                    else:
-                        produtos_count[item.produto_id] = {
-                            'id': item.produto_id,
-                            'nome': item.nome or f"Produto {item.produto_id}",
-                            'quantidade': item.quantidade,
-                            'valor': item.calcular_subtotal()
-                        }
-
-            # Ordenar por quantidade (mais pedidos primeiro)
-            produtos_populares = sorted(
-                produtos_count.values(),
-                key=lambda x: x['quantidade'],
-                reverse=True
-            )
+            produtos_populares = [
+                {
+                    'id': produto['id'],
+                    'nome': produto['nome'] or f"Produto {produto['id']}",
+                    'quantidade': int(produto['quantidade']),
+                    'valor': float(produto['valor'])
+                }
+                for produto in consultar_produtos(*periodo, status)
+            ]
+
+            distribuidores = [
+                {
+                    'id': distribuidor['distribuidor_id'],
+                    'nome': distribuidor['nome'] or ("Sem distribuidor" if distribuidor['distribuidor_id'] is None
+                                                     else f"Distribuidor {distribuidor['distribuidor_id']}"),
+                    'pedidos': int(distribuidor['pedidos']),
+                    'valor': float(distribuidor['valor'])
+                }
+                for distribuidor in consultar_distribuidores(*periodo, status)
+            ]
 
             # Retornar relatório
             return {
@@ -73,9 +211,199 @@ class RelatorioService:
                 'total_pedidos': total_pedidos,
                 'valor_total': valor_total,
                 'status_resumo': status_resumo,
-                'produtos_populares': produtos_populares[:10]  # Top 10
+                'produtos_populares': produtos_populares,  # Top 10
+                'distribuidores': distribuidores
             }
 
         except Exception as e:
             logger.error(f"Erro ao gerar relatório de pedidos: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def _ler_inteiro(self, valor: Any, campo: str) -> Optional[int]:
+        if valor in (None, ''):
+            return None
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"{campo} deve ser um número inteiro")
+
+    @coalescer(PEDIDOS, MOVIMENTACOES, CATALOGO_PRODUTOS)
+    def gerar_serie(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Série temporal de vendas, receita e movimentação de estoque, agrupada no
+        banco por dia, semana ou mês e reduzida a no máximo max_pontos pontos
+        (LTTB, guiado pela receita). Os totais são calculados antes da redução.
+
+        A série não traz o nível de estoque: reservas de pedidos e edições de
+        produto alteram o estoque sem gerar movimentação, então ele não pode
+        ser reconstruído a partir delas.
+
+        Args:
+            filtros: agrupamento ('dia', 'semana' ou 'mes'; padrão 'dia'),
+                data_inicial e data_final (AAAA-MM-DD, inclusivas; padrão: último ano),
+                produto_id ou distribuidor_id (padrão: catálogo inteiro) e max_pontos
+
+        Returns:
+            Dict[str, Any]: agrupamento, periodo, total_periodos, reduzida,
+            totais ({pedidos, vendas, receita}) e pontos ([{periodo, pedidos,
+            vendas, receita, variacao_estoque}]; sem 'variacao_estoque' na série
+            de um distribuidor)
+
+        Raises:
+            ValueError: Se algum filtro for inválido
+        """
+        agrupamento = filtros.get('agrupamento') or 'dia'
+        if agrupamento not in AGRUPAMENTOS:
+            raise ValueError(f"Agrupamento '{agrupamento}' inválido. Valores permitidos: {', '.join(AGRUPAMENTOS)}")
+
+        produto_id = self._ler_inteiro(filtros.get('produto_id'), 'produto_id')
+        distribuidor_id = None if produto_id is not None else \
+            self._ler_inteiro(filtros.get('distribuidor_id'), 'distribuidor_id')
+
+        max_pontos = self._ler_inteiro(filtros.get('max_pontos'), 'max_pontos') or MAX_PONTOS_SERIE
+        if not 3 <= max_pontos <= LIMITE_PONTOS_SERIE:
+            raise ValueError(f"max_pontos deve estar entre 3 e {LIMITE_PONTOS_SERIE}")
+
+        try:
+            data_final = date.fromisoformat(filtros['data_final']) if filtros.get('data_final') else date.today()
+            data_inicial = date.fromisoformat(filtros['data_inicial']) if filtros.get('data_inicial') \
+                else data_final - PERIODO_PADRAO_SERIE
+        except ValueError:
+            raise ValueError("Datas inválidas: use o formato AAAA-MM-DD")
+        if data_inicial > data_final:
+            raise ValueError("data_inicial deve ser anterior ou igual a data_final")
+
+        # Todos os períodos do intervalo, inclusive os sem movimento
+        periodos = []
+        inicio = _inicio_periodo(data_inicial, agrupamento)
+        while inicio <= data_final:
+            periodos.append(inicio)
+            if len(periodos) > LIMITE_PERIODOS_SERIE:
+                raise ValueError(f"Intervalo longo demais para o agrupamento '{agrupamento}': "
+                                 f"use um agrupamento maior ou um período menor")
+            inicio = _proximo_periodo(inicio, agrupamento)
+
+        try:
+            vendas = {
+                linha['periodo']: linha
+                for linha in self.relatorio_repository.serie_vendas(
+                    agrupamento, data_inicial, data_final, produto_id, distribuidor_id)
+            }
+
+            pontos = []
+            for periodo in periodos:
+                linha = vendas.get(periodo)
+                pontos.append({
+                    'periodo': periodo.isoformat(),
+                    'pedidos': int(linha['pedidos']) if linha else 0,
+                    'vendas': int(linha['quantidade']) if linha else 0,
+                    'receita': float(linha['valor']) if linha else 0.0
+                })
+
+            if distribuidor_id is None:
+                # Entradas menos saídas registradas em movimentações no período
+                variacoes = {
+                    linha['periodo']: int(linha['variacao'])
+                    for linha in self.relatorio_repository.serie_variacao_estoque(
+                        agrupamento, data_inicial, data_final, produto_id)
+                }
+                for periodo, ponto in zip(periodos, pontos):
+                    ponto['variacao_estoque'] = variacoes.get(periodo, 0)
+
+            totais = {
+                'pedidos': sum(ponto['pedidos'] for ponto in pontos),
+                'vendas': sum(ponto['vendas'] for ponto in pontos),
+                'receita': round(sum(ponto['receita'] for ponto in pontos), 2)
+            }
+
+            indices = _reduzir_lttb([ponto['receita'] for ponto in pontos], max_pontos)
+
+            return {
+                'agrupamento': agrupamento,
+                'periodo': {'inicio': data_inicial.isoformat(), 'fim': data_final.isoformat()},
+                'produto_id': produto_id,
+                'distribuidor_id': distribuidor_id,
+                'total_periodos': len(pontos),
+                'reduzida': len(indices) < len(pontos),
+                'totais': totais,
+                'pontos': [pontos[indice] for indice in indices]
+            }
+
+        except Exception as e:
+            logger.error(f"Erro ao gerar série temporal: {str(e)}")
+            raise
+
+    @coalescer(PEDIDOS)
+    def gerar_analise(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Análise de pedidos de um período em formato colunar (NumPy): totais,
+        ticket médio, percentis do valor dos pedidos, resumo por status,
+        ranking de produtos e distribuidores, calculados com operações
+        vetorizadas sobre os itens do período.
+
+        Args:
+            filtros: data_inicial e data_final (como em gerar_relatorio_pedidos;
+                padrão: último ano), status, top (produtos no ranking) e
+                ordenar_por ('quantidade' ou 'valor')
+
+        Returns:
+            Dict[str, Any]: periodo, total_pedidos, valor_total, ticket_medio,
+            percentis_pedido, status_resumo, produtos_populares e distribuidores
+
+        Raises:
+            ValueError: Se algum filtro for inválido
+            AnaliseIndisponivel: Se o NumPy não estiver instalado
+        """
+        inicio, fim, _ = self._ler_periodo(filtros)
+        if inicio is None:
+            inicio = (fim or datetime.now()) - PERIODO_PADRAO_SERIE
+
+        top = self._ler_inteiro(filtros.get('top'), 'top') or TOP_PRODUTOS_ANALISE
+        if not 1 <= top <= LIMITE_TOP_ANALISE:
+            raise ValueError(f"top deve estar entre 1 e {LIMITE_TOP_ANALISE}")
+        ordenar_por = filtros.get('ordenar_por') or 'quantidade'
+        if ordenar_por not in ('quantidade', 'valor'):
+            raise ValueError("ordenar_por deve ser 'quantidade' ou 'valor'")
+
+        try:
+            itens = ColunasPedidos.carregar(inicio, fim)
+            if filtros.get('status'):
+                itens = itens.filtrar_status([filtros['status']])
+
+            resumo_geral = itens.resumo()
+            total_pedidos = resumo_geral['pedidos']
+            valor_total = round(resumo_geral['valor'], 2)
+
+            status_resumo = itens.resumo_por_status()
+            for resumo in status_resumo.values():
+                resumo['percentual'] = (resumo['quantidade'] / total_pedidos * 100) if total_pedidos > 0 else 0
+
+            produtos = itens.top_produtos(top, ordenar_por)
+            distribuidores = itens.por_distribuidor()
+
+            nomes_produtos = self.relatorio_repository.obter_nomes('produtos', [p['id'] for p in produtos])
+            nomes_usuarios = self.relatorio_repository.obter_nomes(
+                'usuarios', [d['id'] for d in distribuidores if d['id'] is not None])
+            for produto in produtos:
+                produto['nome'] = nomes_produtos.get(produto['id']) or f"Produto {produto['id']}"
+            for distribuidor in distribuidores:
+                distribuidor['nome'] = "Sem distribuidor" if distribuidor['id'] is None else \
+                    nomes_usuarios.get(distribuidor['id']) or f"Distribuidor {distribuidor['id']}"
+
+            return {
+                'periodo': {
+                    'inicio': inicio.isoformat(),
+                    'fim': filtros.get('data_final')
+                },
+                'total_pedidos': total_pedidos,
+                'valor_total': valor_total,
+                'ticket_medio': round(valor_total / total_pedidos, 2) if total_pedidos else 0,
+                'percentis_pedido': itens.percentis_pedido(),
+                'status_resumo': status_resumo,
+                'produtos_populares': produtos,
+                'distribuidores': distribuidores
+            }
+
+        except Exception as e:
+            logger.error(f"Erro ao gerar análise de pedidos: {str(e)}")
+            raise
@@ -9,6 +9,7 @@ import traceback
 from datetime import datetime
 from backend.domain.models.usuario import Usuario
 from backend.infrastructure.db.config_db import get_db_connection
+from backend.infrastructure.cache.versoes import invalidar, USUARIOS
 
 # Configuração de logging
 logger = logging.getLogger("usuario_services")
@@ -126,6 +127,7 @@ def criar_usuario(nome: str, email: str, senha: str, telefone: str = None, tipo:
             logger.info(f"Usuário criado com ID: {novo_id}")
 
             conn.commit()
+            invalidar(USUARIOS)
 
             # Verificar se o usuário foi realmente criado
             cursor.execute("SELECT * FROM usuarios WHERE id = %s", (novo_id,))
@@ -52,6 +52,7 @@ class Pedido:
     distribuidor_id: Optional[int] = None
     observacoes_cliente: Optional[str] = None
     observacoes_distribuidor: Optional[str] = None
+    estoque_reservado: bool = False
 
     def calcular_total(self) -> float:
         return sum(item.calcular_subtotal() for item in self.itens)
@@ -89,5 +90,6 @@ class Pedido:
             "distribuidor_id": self.distribuidor_id,
             "observacoes_cliente": self.observacoes_cliente,
             "observacoes_distribuidor": self.observacoes_distribuidor,
+            "estoque_reservado": self.estoque_reservado,
             "total": self.calcular_total()
         }
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""
+Análise colunar de pedidos com NumPy.
+Os campos dos itens de pedido de um período são carregados uma vez em
+arrays (um por coluna, preços em centavos inteiros) e as agregações do
+relatório (totais, agrupamentos, top-N, percentis) viram operações
+vetorizadas, sem criar um objeto Pedido/ItemPedido por linha.
+
+O NumPy é opcional: sem ele disponivel() retorna False e a análise
+colunar não é oferecida (os relatórios comuns continuam funcionando).
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    # Dependência opcional: sem ela a análise colunar fica indisponível
+    np = None
+
+from backend.domain.models.pedido import StatusPedido
+from backend.infrastructure.db.db_manager import stream_query_chunks
+from backend.infrastructure.repositories.pedido_repository import STATUS_LEGADOS
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Código numérico de cada status: a posição em StatusPedido (legados pelo equivalente atual)
+STATUS_POR_CODIGO = [status.value for status in StatusPedido]
+CODIGOS_STATUS = {valor: codigo for codigo, valor in enumerate(STATUS_POR_CODIGO)}
+CODIGOS_STATUS.update({legado: CODIGOS_STATUS[atual.value] for legado, atual in STATUS_LEGADOS.items()})
+STATUS_DESCONHECIDO = -1
+
+# Linhas lidas do banco por lote durante a carga
+TAMANHO_LOTE = 20000
+
+# Colunas carregadas: (nome, tipo NumPy)
+COLUNAS = (
+    ('pedido_id', 'int64'),
+    ('produto_id', 'int64'),
+    ('distribuidor_id', 'int64'),
+    ('quantidade', 'int64'),
+    ('preco_centavos', 'int64'),
+    ('status', 'int8')
+)
+
+
+class AnaliseIndisponivel(Exception):
+    """Exceção para quando o NumPy não está instalado"""
+    pass
+
+
+def _somar(grupos, valores, tamanho):
+    """
+    Soma os valores inteiros por grupo (índices 0..tamanho-1).
+    O bincount soma em float64, exato para inteiros até 2^53 (bem acima de
+    qualquer total em centavos), e é bem mais rápido que np.add.at.
+    """
+    return np.bincount(grupos, weights=valores, minlength=tamanho).astype('int64')
+
+def _unicos(valores):
+    """Valores distintos, em ordem (ordenação + comparação com o vizinho; mais rápido que np.unique para int64)"""
+    ordenados = np.sort(valores)
+    if not len(ordenados):
+        return ordenados
+    novos = np.empty(len(ordenados), dtype=bool)
+    novos[0] = True
+    np.not_equal(ordenados[1:], ordenados[:-1], out=novos[1:])
+    return ordenados[novos]
+
+def disponivel() -> bool:
+    """Indica se a análise colunar pode ser usada (NumPy instalado)"""
+    return np is not None
+
+
+class ColunasPedidos:
+    """
+    Itens de pedido de um período em formato colunar.
+    Cada linha é um item; pedidos sem itens aparecem uma vez, com
+    produto_id 0 e quantidade 0, para contarem nos totais de pedidos.
+    """
+
+    def __init__(self, colunas: Dict[str, Any]):
+        for nome, _ in COLUNAS:
+            setattr(self, nome, colunas[nome])
+        self._totais = None
+
+    @classmethod
+    def carregar(cls, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                 tamanho_lote: int = TAMANHO_LOTE) -> "ColunasPedidos":
+        """
+        Carrega os itens dos pedidos ativos criados em [inicio, fim).
+        As linhas são lidas em lotes e convertidas coluna a coluna, sem
+        manter as linhas do banco em memória.
+
+        Raises:
+            AnaliseIndisponivel: Se o NumPy não estiver instalado
+        """
+        if np is None:
+            raise AnaliseIndisponivel("Análise colunar indisponível: o pacote numpy não está instalado")
+
+        condicoes = ["p.deletado = 0"]
+        params = []
+        if inicio:
+            condicoes.append("p.data_criacao >= %s")
+            params.append(inicio)
+        if fim:
+            condicoes.append("p.data_criacao < %s")
+            params.append(fim)
+
+        lotes = {nome: [] for nome, _ in COLUNAS}
+        for linhas in stream_query_chunks(f"""
+            SELECT p.id AS pedido_id,
+                   COALESCE(ip.produto_id, 0) AS produto_id,
+                   COALESCE(p.distribuidor_id, 0) AS distribuidor_id,
+                   COALESCE(ip.quantidade, 0) AS quantidade,
+                   COALESCE(ROUND(ip.preco_unitario * 100), 0) AS preco_centavos,
+                   p.status
+            FROM pedidos p
+            LEFT JOIN itens_pedido ip ON ip.pedido_id = p.id
+            WHERE {' AND '.join(condicoes)}
+        """, tuple(params), chunk_size=tamanho_lote):
+            total = len(linhas)
+            for nome, tipo in COLUNAS:
+                if nome == 'status':
+                    valores = (CODIGOS_STATUS.get(linha['status'], STATUS_DESCONHECIDO) for linha in linhas)
+                else:
+                    valores = (int(linha[nome]) for linha in linhas)
+                lotes[nome].append(np.fromiter(valores, dtype=tipo, count=total))
+
+        colunas = {
+            nome: np.concatenate(lotes[nome]) if lotes[nome] else np.empty(0, dtype=tipo)
+            for nome, tipo in COLUNAS
+        }
+        logger.info(f"Análise colunar: {len(colunas['pedido_id'])} linhas carregadas")
+        return cls(colunas)
+
+    def __len__(self):
+        return len(self.pedido_id)
+
+    def filtrar(self, mascara) -> "ColunasPedidos":
+        """Retorna só as linhas em que a máscara booleana é verdadeira"""
+        return ColunasPedidos({nome: getattr(self, nome)[mascara] for nome, _ in COLUNAS})
+
+    def filtrar_status(self, status: Sequence[str]) -> "ColunasPedidos":
+        """Retorna só os itens de pedidos com um dos status informados (valores de StatusPedido)"""
+        codigos = [CODIGOS_STATUS[valor] for valor in status if valor in CODIGOS_STATUS]
+        return self.filtrar(np.isin(self.status, codigos))
+
+    def subtotais_centavos(self):
+        """Subtotal de cada item (quantidade x preço) em centavos"""
+        return self.quantidade * self.preco_centavos
+
+    def totais_por_pedido(self) -> Dict[str, Any]:
+        """
+        Soma os itens por pedido (calculado uma vez por instância).
+
+        Returns:
+            dict: 'pedido_id', 'total_centavos' e 'status', um elemento por pedido
+        """
+        if self._totais is None:
+            ids, inverso = np.unique(self.pedido_id, return_inverse=True)
+            totais = _somar(inverso, self.subtotais_centavos(), len(ids))
+            status = np.empty(len(ids), dtype='int8')
+            status[inverso] = self.status
+            self._totais = {'pedido_id': ids, 'total_centavos': totais, 'status': status}
+        return self._totais
+
+    def resumo(self) -> Dict[str, Any]:
+        """
+        Totais gerais do período.
+
+        Returns:
+            dict: 'pedidos' (quantidade) e 'valor' (em reais)
+        """
+        totais = self.totais_por_pedido()
+        return {'pedidos': len(totais['pedido_id']), 'valor': int(totais['total_centavos'].sum()) / 100}
+
+    def _agrupar(self, chaves, ignorar_zero: bool = False) -> Dict[str, Any]:
+        """Soma quantidade, valor e conta pedidos distintos por chave (IDs inteiros não negativos)"""
+        linhas = self
+        if ignorar_zero:
+            linhas = self.filtrar(chaves != 0)
+            chaves = chaves[chaves != 0]
+        if not len(chaves):
+            vazio = np.empty(0, dtype='int64')
+            return {'id': vazio, 'quantidade': vazio, 'valor_centavos': vazio, 'pedidos': vazio}
+
+        # IDs de produtos/usuários são pequenos: o próprio ID serve de índice do
+        # grupo (bincount direto, sem ordenar); senão, índices compactos via unique
+        maior = int(chaves.max())
+        if maior <= 4 * len(chaves) + 1024:
+            grupos, tamanho = chaves, maior + 1
+        else:
+            ids_unicos, grupos = np.unique(chaves, return_inverse=True)
+            tamanho = len(ids_unicos)
+
+        quantidade = _somar(grupos, linhas.quantidade, tamanho)
+        valor = _somar(grupos, linhas.subtotais_centavos(), tamanho)
+
+        # Pedidos distintos por grupo: pares (grupo, pedido) únicos, codificados em um inteiro
+        base = int(linhas.pedido_id.max()) + 1
+        pares = _unicos(grupos.astype('int64') * base + linhas.pedido_id)
+        pedidos = np.bincount(pares // base, minlength=tamanho)
+
+        presentes = np.flatnonzero(np.bincount(grupos, minlength=tamanho))
+        ids = presentes if tamanho == maior + 1 and grupos is chaves else ids_unicos[presentes]
+        return {
+            'id': ids,
+            'quantidade': quantidade[presentes],
+            'valor_centavos': valor[presentes],
+            'pedidos': pedidos[presentes]
+        }
+
+    def resumo_por_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Pedidos e valor por status.
+
+        Returns:
+            dict: valor do status -> {'quantidade' (pedidos), 'valor'}
+        """
+        totais = self.totais_por_pedido()
+        pedidos = np.bincount(totais['status'].astype('int64') + 1, minlength=len(STATUS_POR_CODIGO) + 1)
+        valores = _somar(totais['status'].astype('int64') + 1, totais['total_centavos'], len(STATUS_POR_CODIGO) + 1)
+        # Posição 0: status desconhecido (fora de StatusPedido)
+        return {
+            valor: {'quantidade': int(pedidos[codigo + 1]), 'valor': float(valores[codigo + 1]) / 100}
+            for codigo, valor in enumerate(STATUS_POR_CODIGO)
+        }
+
+    def top_produtos(self, limite: int = 10, ordenar_por: str = 'quantidade') -> List[Dict[str, Any]]:
+        """
+        Produtos com maior quantidade (ou valor) no período.
+
+        Returns:
+            Lista de {id, quantidade, valor, pedidos}, do maior para o menor
+        """
+        grupos = self._agrupar(self.produto_id, ignorar_zero=True)
+        chave = grupos['quantidade'] if ordenar_por == 'quantidade' else grupos['valor_centavos']
+
+        if limite < len(chave):
+            # Seleção parcial dos N maiores e ordenação só deles
+            indices = np.argpartition(-chave, limite)[:limite]
+        else:
+            indices = np.arange(len(chave))
+        indices = indices[np.lexsort((grupos['id'][indices], -chave[indices]))]
+
+        return [
+            {
+                'id': int(grupos['id'][indice]),
+                'quantidade': int(grupos['quantidade'][indice]),
+                'valor': float(grupos['valor_centavos'][indice]) / 100,
+                'pedidos': int(grupos['pedidos'][indice])
+            }
+            for indice in indices
+        ]
+
+    def por_distribuidor(self) -> List[Dict[str, Any]]:
+        """
+        Pedidos, itens e valor por distribuidor (id None para pedidos sem distribuidor).
+
+        Returns:
+            Lista de {id, pedidos, quantidade, valor}, do maior valor para o menor
+        """
+        grupos = self._agrupar(self.distribuidor_id)
+        ordem = np.argsort(-grupos['valor_centavos'], kind='stable')
+        return [
+            {
+                'id': int(grupos['id'][indice]) or None,
+                'pedidos': int(grupos['pedidos'][indice]),
+                'quantidade': int(grupos['quantidade'][indice]),
+                'valor': float(grupos['valor_centavos'][indice]) / 100
+            }
+            for indice in ordem
+        ]
+
+    def percentis_pedido(self, percentis: Sequence[float] = (50, 90, 99)) -> Dict[str, float]:
+        """
+        Percentis do valor total dos pedidos.
+
+        Returns:
+            dict: 'p50', 'p90', ... -> valor em reais (vazio se não houver pedidos)
+        """
+        totais = self.totais_por_pedido()['total_centavos']
+        if not len(totais):
+            return {}
+        valores = np.percentile(totais, percentis)
+        return {f"p{percentil:g}": round(float(valor) / 100, 2) for percentil, valor in zip(percentis, valores)}
@@ -0,0 +1,65 @@
+"""
+Cache do catálogo de produtos.
+Mantém em memória o JSON já serializado de GET /api/produtos e a lista de
+produtos usada por ProdutoService, recalculados apenas quando a versão do
+catálogo muda (ver versoes.invalidar).
+"""
+
+import logging
+
+from flask import current_app
+
+from backend.infrastructure.db.connection_pool import get_connection_pool
+from backend.infrastructure.db.unit_of_work import unidade_isolada
+from backend.infrastructure.cache.versoes import CacheVersionado, CATALOGO_PRODUTOS
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+_catalogo_json = CacheVersionado(CATALOGO_PRODUTOS)
+_produtos = CacheVersionado(CATALOGO_PRODUTOS)
+
+
+def _carregar_catalogo_json():
+    """
+    Lê os produtos ativos e serializa o JSON da resposta.
+    Usa uma conexão própria do pool: o catálogo nunca deve ser montado com
+    escritas ainda não confirmadas da requisição atual.
+    """
+    conn = get_connection_pool().get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT * FROM produtos WHERE deletado = 0")
+        produtos = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    logger.info(f"Catálogo recarregado do banco: {len(produtos)} produtos")
+    return current_app.json.dumps(produtos)
+
+def obter_catalogo_json() -> str:
+    """
+    Retorna o JSON do catálogo de produtos ativos (linhas da tabela produtos).
+    Deve ser chamado com o contexto da aplicação Flask ativo.
+    """
+    return _catalogo_json.obter(_carregar_catalogo_json)
+
+def _carregar_isolado(carregar):
+    # Conexão própria do pool, como em _carregar_catalogo_json: o cache é
+    # compartilhado e não pode guardar dados da transação da requisição
+    with unidade_isolada():
+        return carregar()
+
+def obter_produtos(carregar):
+    """
+    Retorna a lista de produtos (dicionários) do catálogo em cache.
+
+    Args:
+        carregar: Função que busca a lista no repositório em caso de cache vazio;
+            roda em uma unidade de trabalho isolada (outra conexão do pool)
+
+    Returns:
+        list: Cópias rasas dos dicionários em cache (seguro para o chamador alterar)
+    """
+    return [dict(produto) for produto in _produtos.obter(lambda: _carregar_isolado(carregar))]
@@ -0,0 +1,116 @@
+"""
+Coalescência de chamadas concorrentes idênticas (single-flight).
+Quando várias requisições pedem ao mesmo tempo o mesmo resultado caro
+(mesmos argumentos e mesma versão dos dados), só a primeira executa a
+função; as demais esperam e recebem o mesmo resultado, em vez de repetir
+todas as queries no MySQL (ex: gerentes abrindo pedidos e relatórios no
+início do turno).
+
+Nada é guardado depois que a chamada termina: chamadas posteriores
+executam de novo. O resultado é compartilhado entre as requisições que
+esperaram por ele e não deve ser modificado por quem o recebe.
+"""
+
+import time
+import inspect
+import logging
+import threading
+from functools import wraps
+
+from backend.infrastructure.cache.versoes import obter_marcador
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Tempo máximo (segundos) que uma chamada espera pela execução em andamento;
+# depois disso ela executa a função por conta própria
+ESPERA_MAXIMA = 60
+
+_estatisticas = {}
+_lock_estatisticas = threading.Lock()
+
+
+class _Execucao:
+    """Execução em andamento, compartilhada pelas chamadas que esperam por ela"""
+
+    def __init__(self):
+        self.concluida = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+def _chave_argumentos(args, kwargs, metodo: bool) -> str:
+    # repr() distingue datas, Decimal e afins; só o self dos serviços entra
+    # pelo tipo, para instâncias diferentes do mesmo serviço compartilharem
+    if metodo and args:
+        args = (f"<{type(args[0]).__name__}>",) + args[1:]
+    return repr((args, sorted(kwargs.items())))
+
+def _registrar(nome, compartilhada):
+    with _lock_estatisticas:
+        estatisticas = _estatisticas.setdefault(nome, {'execucoes': 0, 'compartilhadas': 0})
+        estatisticas['compartilhadas' if compartilhada else 'execucoes'] += 1
+
+def coalescer(*chaves: str):
+    """
+    Decorador que agrupa chamadas concorrentes com os mesmos argumentos
+    enquanto a versão das chaves de dados não muda.
+
+    Args:
+        *chaves: Chaves de versão dos dados usados pela função (ver versoes.py);
+            uma escrita nessas chaves faz as próximas chamadas executarem de novo
+
+    Exemplo:
+        @coalescer(PEDIDOS)
+        def gerar_relatorio_pedidos(self, filtros): ...
+    """
+    def decorador(funcao):
+        nome = funcao.__qualname__
+        metodo = next(iter(inspect.signature(funcao).parameters), None) == 'self'
+        em_andamento = {}
+        lock = threading.Lock()
+
+        @wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            chave = (_chave_argumentos(args, kwargs, metodo), obter_marcador(chaves))
+
+            with lock:
+                execucao = em_andamento.get(chave)
+                lider = execucao is None
+                if lider:
+                    execucao = em_andamento[chave] = _Execucao()
+
+            if not lider:
+                inicio = time.perf_counter()
+                if execucao.concluida.wait(ESPERA_MAXIMA):
+                    _registrar(nome, True)
+                    logger.debug(f"{nome}: resultado compartilhado após "
+                                 f"{(time.perf_counter() - inicio) * 1000:.0f}ms de espera")
+                    if execucao.erro is not None:
+                        raise execucao.erro
+                    return execucao.resultado
+
+                logger.warning(f"{nome}: execução em andamento passou de {ESPERA_MAXIMA}s; executando novamente")
+                _registrar(nome, False)
+                return funcao(*args, **kwargs)
+
+            _registrar(nome, False)
+            try:
+                execucao.resultado = funcao(*args, **kwargs)
+                return execucao.resultado
+            except Exception as e:
+                execucao.erro = e
+                raise
+            finally:
+                with lock:
+                    em_andamento.pop(chave, None)
+                execucao.concluida.set()
+
+        return envoltorio
+
+    return decorador
+
+def obter_estatisticas_coalescencia():
+    """Execuções e chamadas atendidas por resultado compartilhado, por função, neste processo"""
+    with _lock_estatisticas:
+        return {nome: dict(valores) for nome, valores in _estatisticas.items()}
@@ -0,0 +1,282 @@
+"""
+Versões de dados para invalidação de caches em memória.
+Cada conjunto de dados (ex: catálogo de produtos) tem uma chave com um
+número de versão que é incrementado a cada escrita. Os caches guardam a
+versão com que foram calculados e se recalculam quando ela muda.
+
+Dentro de uma unidade de trabalho, a invalidação só acontece depois do
+commit, para que nenhum cache seja recarregado com dados não confirmados.
+
+Com vários processos (workers WSGI), cada invalidação também é publicada na
+tabela cache_versions. Cada processo consulta essa tabela no máximo a cada
+DB_CACHE_POLL_MS milissegundos (padrão 1000) e incrementa a versão local
+das chaves alteradas por outros processos, de modo que os caches de todos
+os workers são descartados com atraso limitado a esse intervalo.
+
+Os marcadores (ETags) e datas de modificação são derivados das versões lidas
+da cache_versions, iguais em todos os workers; enquanto o processo não
+sincronizou ou tem uma invalidação ainda não publicada, o marcador usa as
+versões locais e só vale dentro do processo.
+
+Variáveis de ambiente:
+    DB_CACHE_POLL_MS: intervalo mínimo entre consultas à cache_versions
+                      (padrão 1000; "0" desativa a sincronização entre processos)
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+from backend.infrastructure.db.unit_of_work import executar_apos_commit
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Chaves de dados usadas pelos caches
+CATALOGO_PRODUTOS = "produtos"
+PEDIDOS = "pedidos"
+MOVIMENTACOES = "movimentacoes"
+USUARIOS = "usuarios"
+ARQUIVOS_JSON = "arquivos_json"
+
+INTERVALO_SINCRONIZACAO = int(os.getenv("DB_CACHE_POLL_MS", "1000")) / 1000
+# Espera após uma falha de acesso à cache_versions (ex: tabela ainda não migrada)
+ESPERA_APOS_ERRO = 30
+
+_lock = threading.Lock()
+_versoes = {}       # chave -> versão
+_atualizacoes = {}  # chave -> datetime (UTC) da última invalidação
+
+# Última versão (e data) vista de cada chave na tabela cache_versions e
+# quantos incrementos foram publicados pelo próprio processo desde então
+_versoes_remotas = {}
+_atualizacoes_remotas = {}
+_publicacoes_proprias = {}
+# Chaves invalidadas localmente com publicação em andamento (contagem) ou
+# que falhou: o estado local delas não corresponde à cache_versions
+_publicacoes_pendentes = {}
+_nao_publicadas = set()
+_lock_sincronizacao = threading.Lock()
+_proxima_sincronizacao = 0.0
+# Depois da primeira leitura bem-sucedida, chave ausente da tabela = versão 0
+_sincronizado = False
+
+# Momento de início do processo: data de modificação de chaves nunca invalidadas
+# (nem localmente nem, depois da sincronização, na cache_versions)
+_inicio = datetime.now(timezone.utc).replace(microsecond=0)
+
+# Identifica o processo: versões locais só são comparáveis dentro dele
+_instancia = uuid.uuid4().hex[:12]
+
+
+def _sincronizar():
+    """
+    Lê a tabela cache_versions e invalida localmente as chaves que outros
+    processos alteraram. Roda no máximo uma vez por intervalo: as demais
+    threads seguem com as versões locais em vez de esperar.
+    """
+    global _proxima_sincronizacao, _sincronizado
+
+    if INTERVALO_SINCRONIZACAO <= 0 or time.monotonic() < _proxima_sincronizacao:
+        return
+    if not _lock_sincronizacao.acquire(blocking=False):
+        return
+
+    try:
+        agora = time.monotonic()
+        if agora < _proxima_sincronizacao:
+            return
+        _proxima_sincronizacao = agora + INTERVALO_SINCRONIZACAO
+
+        try:
+            linhas = _executar("SELECT chave, versao, atualizado_em FROM cache_versions", consulta=True)
+        except Exception as e:
+            _proxima_sincronizacao = agora + ESPERA_APOS_ERRO
+            logger.warning(f"Erro ao sincronizar versões de cache: {str(e)}")
+            return
+
+        alteradas = []
+        with _lock:
+            for chave, versao, atualizado_em in linhas:
+                # Na primeira leitura o processo acabou de montar seus caches; nas
+                # seguintes, uma chave que ainda não existia estava na versão 0.
+                # Incrementos publicados por este processo já foram aplicados
+                anterior = _versoes_remotas.get(chave, 0 if _sincronizado else None)
+                proprias = _publicacoes_proprias.pop(chave, 0)
+                _versoes_remotas[chave] = versao
+                _atualizacoes_remotas[chave] = atualizado_em.replace(tzinfo=timezone.utc)
+                if anterior is not None and versao - anterior > proprias:
+                    alteradas.append(chave)
+            _sincronizado = True
+
+        if alteradas:
+            _incrementar(alteradas)
+    finally:
+        _lock_sincronizacao.release()
+
+def _executar(query, params=(), consulta=False):
+    """
+    Executa uma instrução curta em conexão própria do pool, com autocommit,
+    fora de qualquer unidade de trabalho da requisição.
+    """
+    # Import tardio: o pool lê a configuração do banco na primeira conexão
+    from backend.infrastructure.db.connection_pool import get_connection_pool
+
+    conn = get_connection_pool().get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        if consulta:
+            return cursor.fetchall()
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+def _publicar(chaves):
+    """
+    Publica a invalidação na cache_versions para os demais processos.
+    Falhas são apenas registradas: o processo atual já foi invalidado.
+    """
+    if INTERVALO_SINCRONIZACAO <= 0:
+        return
+    valores = ", ".join(["(%s, 1, UTC_TIMESTAMP(6))"] * len(chaves))
+    # Sob o lock da sincronização, para a contagem das publicações próprias
+    # nunca ficar entre a leitura da tabela e o registro da versão lida
+    with _lock_sincronizacao:
+        try:
+            _executar(
+                f"INSERT INTO cache_versions (chave, versao, atualizado_em) VALUES {valores} "
+                "ON DUPLICATE KEY UPDATE versao = versao + 1, atualizado_em = VALUES(atualizado_em)",
+                tuple(chaves)
+            )
+        except Exception as e:
+            logger.warning(f"Erro ao publicar invalidação de cache ({', '.join(chaves)}): {str(e)}")
+            with _lock:
+                _nao_publicadas.update(chaves)
+            return
+        with _lock:
+            for chave in chaves:
+                _publicacoes_proprias[chave] = _publicacoes_proprias.get(chave, 0) + 1
+                _nao_publicadas.discard(chave)
+
+def obter_versao(chave: str) -> int:
+    """Retorna a versão atual da chave (0 se nunca invalidada)"""
+    _sincronizar()
+    return _versoes.get(chave, 0)
+
+def obter_atualizacao(chave: str) -> datetime:
+    """
+    Retorna quando a chave foi invalidada pela última vez (UTC), por este
+    processo ou, segundo a cache_versions, por qualquer outro
+    """
+    _sincronizar()
+    with _lock:
+        datas = [data for data in (_atualizacoes.get(chave), _atualizacoes_remotas.get(chave))
+                 if data is not None]
+    return max(datas) if datas else _inicio
+
+def obter_marcador(chaves) -> str:
+    """
+    Retorna um identificador do estado atual das chaves (ex: para ETags).
+    Com a sincronização ativa, é formado pelas versões da cache_versions
+    (mais as publicações próprias ainda não lidas de volta) e vale para todos
+    os workers. Sem ela, ou com alguma das chaves fora da tabela, usa as
+    versões locais com a identificação do processo, pois cada worker numera
+    suas versões locais de forma independente.
+    """
+    _sincronizar()
+    with _lock:
+        if _sincronizado and not any(chave in _nao_publicadas or _publicacoes_pendentes.get(chave)
+                                     for chave in chaves):
+            return ".".join(str(_versoes_remotas.get(chave, 0) + _publicacoes_proprias.get(chave, 0))
+                            for chave in chaves)
+        return _instancia + ":" + ".".join(str(_versoes.get(chave, 0)) for chave in chaves)
+
+def _incrementar(chaves):
+    agora = datetime.now(timezone.utc)
+    with _lock:
+        for chave in chaves:
+            _versoes[chave] = _versoes.get(chave, 0) + 1
+            _atualizacoes[chave] = agora
+    logger.debug(f"Caches invalidados: {', '.join(chaves)}")
+
+def _invalidar_e_publicar(chaves):
+    # Entre o incremento local e a publicação, o marcador das chaves fica local
+    with _lock:
+        for chave in chaves:
+            _publicacoes_pendentes[chave] = _publicacoes_pendentes.get(chave, 0) + 1
+    try:
+        _incrementar(chaves)
+        _publicar(chaves)
+    finally:
+        with _lock:
+            for chave in chaves:
+                _publicacoes_pendentes[chave] -= 1
+
+def invalidar(*chaves: str) -> None:
+    """
+    Incrementa a versão das chaves, invalidando os caches que dependem delas,
+    e publica a invalidação para os outros processos.
+    Dentro de uma transação, o incremento é adiado até o commit.
+
+    A publicação é um INSERT ... ON DUPLICATE KEY UPDATE próprio, feito após
+    o commit: gravá-lo na transação da escrita serializaria todas as escritas
+    concorrentes no lock da linha da chave. Se o processo cair entre o commit
+    e a publicação, os outros workers só veem a mudança na próxima escrita.
+    """
+    chaves = tuple(dict.fromkeys(chaves))
+    if chaves:
+        executar_apos_commit(lambda: _invalidar_e_publicar(chaves))
+
+
+class CacheVersionado:
+    """
+    Guarda um único valor calculado para a versão atual de uma chave.
+    O valor é recalculado (uma vez, mesmo com várias threads) quando a
+    versão da chave muda.
+    """
+
+    def __init__(self, chave: str):
+        self.chave = chave
+        self._lock = threading.Lock()
+        self._entrada = (None, None)  # (versão, valor), trocados juntos
+
+    def obter(self, carregar):
+        """
+        Retorna o valor em cache ou o recalcula com `carregar()`.
+
+        Args:
+            carregar: Função sem argumentos que produz o valor
+
+        Returns:
+            O valor calculado para a versão atual
+        """
+        versao = obter_versao(self.chave)
+        versao_cache, valor = self._entrada
+        if versao_cache == versao:
+            return valor
+
+        with self._lock:
+            versao_cache, valor = self._entrada
+            if versao_cache == versao:
+                return valor
+
+            # A versão é lida antes da carga: uma escrita durante a carga
+            # invalida o valor recém-calculado na próxima leitura
+            valor = carregar()
+            self._entrada = (versao, valor)
+            return valor
+
+    def limpar(self):
+        """Descarta o valor em cache"""
+        with self._lock:
+            self._entrada = (None, None)
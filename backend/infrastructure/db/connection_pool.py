@@ -0,0 +1,323 @@
+"""
+Pool de conexões MySQL compartilhado por todo o processo.
+Substitui a abertura de uma conexão nova (TCP + autenticação) a cada query
+e expõe contadores para acompanhar o uso do pool em produção.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from backend.infrastructure.db.instrumentacao import instrumentar_cursor
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+
+class PoolTimeoutError(Exception):
+    """Exceção para quando nenhuma conexão fica livre dentro do tempo limite"""
+    pass
+
+
+class PooledConnection:
+    """
+    Conexão emprestada do pool.
+    Repassa todos os atributos para a conexão MySQL real; close() devolve a
+    conexão ao pool em vez de encerrá-la.
+    """
+
+    def __init__(self, pool, conexao, criada_em):
+        self._pool = pool
+        self._conexao = conexao
+        self._criada_em = criada_em
+        self._devolvida = False
+
+    def close(self):
+        """Devolve a conexão ao pool (pode ser chamado mais de uma vez)"""
+        if not self._devolvida:
+            self._devolvida = True
+            self._pool._devolver(self._conexao, self._criada_em)
+
+    def descartar(self):
+        """Encerra a conexão em vez de devolvê-la ao pool (ex: estado de sessão alterado)"""
+        if not self._devolvida:
+            self._devolvida = True
+            self._pool._encerrar(self._conexao)
+            self._pool._liberar_vaga()
+
+    def cursor(self, *args, **kwargs):
+        """Cria um cursor instrumentado (tempo e linhas de cada query)"""
+        buffered = args[0] if args else kwargs.get('buffered')
+        if buffered is None:
+            buffered = self._pool.config.get('buffered', False)
+        return instrumentar_cursor(self._conexao.cursor(*args, **kwargs), self._conexao, buffered)
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool de conexões com tamanho máximo, validação no empréstimo (pre-ping),
+    reciclagem por tempo de vida e tempo limite de espera.
+    """
+
+    def __init__(self, config, tamanho=10, timeout=10.0, tempo_vida_max=1800.0,
+                 pre_ping=True, intervalo_ping=5.0):
+        """
+        Args:
+            config: Parâmetros repassados para mysql.connector.connect
+            tamanho: Número máximo de conexões abertas
+            timeout: Segundos de espera por uma conexão livre
+            tempo_vida_max: Segundos até uma conexão ser reciclada (0 desativa)
+            pre_ping: Se deve validar conexões ociosas antes de emprestá-las
+            intervalo_ping: Segundos de ociosidade a partir dos quais o ping é feito
+        """
+        self.config = config
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.tempo_vida_max = tempo_vida_max
+        self.pre_ping = pre_ping
+        self.intervalo_ping = intervalo_ping
+        self.pid = os.getpid()
+
+        self._condicao = threading.Condition()
+        self._ociosas = deque()  # (conexao, criada_em, devolvida_em)
+        self._abertas = 0
+        self._em_uso = 0
+
+        # Contadores expostos em estatisticas()
+        self._emprestimos = 0
+        self._criadas = 0
+        self._recicladas = 0
+        self._descartadas = 0
+        self._esperas = 0
+        self._timeouts = 0
+        self._tempo_espera_total = 0.0
+        self._tempo_espera_max = 0.0
+
+    def _criar_conexao(self):
+        """Abre uma nova conexão física com o MySQL"""
+        conexao = mysql.connector.connect(**self.config)
+        with self._condicao:
+            self._criadas += 1
+        return conexao, time.monotonic()
+
+    def _encerrar(self, conexao):
+        """Fecha a conexão física ignorando erros de rede"""
+        try:
+            conexao.close()
+        except Exception:
+            pass
+
+    def _liberar_vaga(self):
+        """Libera a vaga de uma conexão descartada e acorda quem estiver esperando"""
+        with self._condicao:
+            self._abertas -= 1
+            self._em_uso -= 1
+            self._descartadas += 1
+            self._condicao.notify()
+
+    def get_connection(self, timeout=None):
+        """
+        Empresta uma conexão do pool.
+
+        Args:
+            timeout: Segundos de espera (usa o padrão do pool se None)
+
+        Returns:
+            PooledConnection: Conexão que volta ao pool ao ser fechada
+
+        Raises:
+            PoolTimeoutError: Se nenhuma conexão ficar livre a tempo
+        """
+        timeout = self.timeout if timeout is None else timeout
+        item = None
+        criar = False
+
+        with self._condicao:
+            self._emprestimos += 1
+            inicio_espera = None
+
+            while True:
+                if self._ociosas:
+                    item = self._ociosas.pop()
+                    break
+                if self._abertas < self.tamanho:
+                    self._abertas += 1
+                    criar = True
+                    break
+
+                # Pool esgotado: aguardar devolução
+                agora = time.monotonic()
+                if inicio_espera is None:
+                    inicio_espera = agora
+                    self._esperas += 1
+                restante = timeout - (agora - inicio_espera)
+                if restante <= 0:
+                    self._timeouts += 1
+                    self._registrar_espera(agora - inicio_espera)
+                    raise PoolTimeoutError(
+                        f"Nenhuma conexão livre após {timeout:.1f}s (pool com {self.tamanho} conexões)")
+                self._condicao.wait(restante)
+
+            if inicio_espera is not None:
+                self._registrar_espera(time.monotonic() - inicio_espera)
+            self._em_uso += 1
+
+        try:
+            if criar:
+                conexao, criada_em = self._criar_conexao()
+            else:
+                conexao, criada_em = self._validar(*item)
+        except Exception:
+            self._liberar_vaga()
+            raise
+
+        return PooledConnection(self, conexao, criada_em)
+
+    def _registrar_espera(self, duracao):
+        """Acumula o tempo de espera (chamado com o lock adquirido)"""
+        self._tempo_espera_total += duracao
+        self._tempo_espera_max = max(self._tempo_espera_max, duracao)
+
+    def _validar(self, conexao, criada_em, devolvida_em):
+        """
+        Recicla conexões antigas e faz ping nas que ficaram ociosas por muito tempo.
+        Retorna uma conexão pronta para uso (possivelmente uma nova).
+        """
+        agora = time.monotonic()
+
+        if self.tempo_vida_max and agora - criada_em > self.tempo_vida_max:
+            logger.debug("Reciclando conexão que excedeu o tempo de vida máximo")
+            self._encerrar(conexao)
+            with self._condicao:
+                self._recicladas += 1
+            return self._criar_conexao()
+
+        if self.pre_ping and agora - devolvida_em > self.intervalo_ping:
+            try:
+                conexao.ping(reconnect=False)
+            except Exception as e:
+                logger.warning(f"Conexão ociosa inválida descartada: {str(e)}")
+                self._encerrar(conexao)
+                with self._condicao:
+                    self._descartadas += 1
+                return self._criar_conexao()
+
+        return conexao, criada_em
+
+    def _devolver(self, conexao, criada_em):
+        """Recebe uma conexão de volta, desfazendo transações não confirmadas"""
+        try:
+            if conexao.in_transaction:
+                conexao.rollback()
+        except Exception as e:
+            # Conexão com resultado pendente ou quebrada não volta para o pool
+            logger.warning(f"Conexão descartada ao retornar ao pool: {str(e)}")
+            self._encerrar(conexao)
+            self._liberar_vaga()
+            return
+
+        with self._condicao:
+            self._ociosas.append((conexao, criada_em, time.monotonic()))
+            self._em_uso -= 1
+            self._condicao.notify()
+
+    def estatisticas(self):
+        """
+        Retorna os contadores do pool.
+
+        Returns:
+            dict: Conexões em uso, ociosas, esperas e tempo de espera
+        """
+        with self._condicao:
+            return {
+                'tamanho': self.tamanho,
+                'abertas': self._abertas,
+                'em_uso': self._em_uso,
+                'ociosas': len(self._ociosas),
+                'emprestimos': self._emprestimos,
+                'criadas': self._criadas,
+                'recicladas': self._recicladas,
+                'descartadas': self._descartadas,
+                'esperas': self._esperas,
+                'timeouts': self._timeouts,
+                'tempo_espera_total_ms': round(self._tempo_espera_total * 1000, 3),
+                'tempo_espera_max_ms': round(self._tempo_espera_max * 1000, 3)
+            }
+
+    def fechar(self):
+        """Fecha todas as conexões ociosas"""
+        with self._condicao:
+            ociosas = list(self._ociosas)
+            self._ociosas.clear()
+            self._abertas -= len(ociosas)
+        for conexao, _, _ in ociosas:
+            self._encerrar(conexao)
+
+
+# Pool único do processo
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _configuracao_conexao():
+    """Parâmetros de conexão lidos das variáveis de ambiente"""
+    return {
+        'host': os.getenv("DB_HOST", "localhost"),
+        'user': os.getenv("DB_USER", "root"),
+        'password': os.getenv("DB_PASSWORD", ""),
+        'database': os.getenv("DB_NAME", "catalogo_vortex"),
+        'autocommit': False,  # Controle explícito de transações
+        'buffered': True,     # Para garantir que todos os resultados são buscados
+        'charset': 'utf8mb4',  # Suporte completo a Unicode
+        'use_unicode': True
+    }
+
+
+def get_connection_pool():
+    """
+    Retorna o pool de conexões do processo, criando-o na primeira chamada.
+    Após um fork (ex: workers do servidor WSGI) um novo pool é criado, pois
+    os sockets herdados não podem ser compartilhados entre processos.
+    """
+    global _pool
+
+    if _pool is not None and _pool.pid == os.getpid():
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool(
+                _configuracao_conexao(),
+                tamanho=int(os.getenv("DB_POOL_SIZE", "10")),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+                tempo_vida_max=float(os.getenv("DB_POOL_RECYCLE", "1800")),
+                pre_ping=os.getenv("DB_POOL_PRE_PING", "1") == "1",
+                intervalo_ping=float(os.getenv("DB_POOL_PING_INTERVAL", "5"))
+            )
+            logger.info(f"Pool de conexões MySQL inicializado (tamanho={_pool.tamanho})")
+
+    return _pool
+
+
+def obter_estatisticas_pool():
+    """Retorna os contadores do pool do processo (vazio se ainda não foi criado)"""
+    if _pool is None or _pool.pid != os.getpid():
+        return {}
+    return _pool.estatisticas()
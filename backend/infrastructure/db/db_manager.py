@@ -5,10 +5,15 @@ Fornece conexões padronizadas com o MySQL para todas as partes do sistema.
 
 import logging
 import os
+import re
+import json
+import base64
 from datetime import datetime
-import mysql.connector
 from dotenv import load_dotenv
 
+from backend.infrastructure.db.connection_pool import get_connection_pool
+from backend.infrastructure.db.unit_of_work import unidade_de_trabalho_atual
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,27 +28,25 @@ logger = logging.getLogger("db_manager")
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Margem (segundos) do cursor de alterações para transações que confirmam
+# fora da ordem de atualizado_em (ver buscar_alteracoes)
+ATRASO_ALTERACOES = float(os.getenv("DB_DELTA_LAG_S", "5"))
+
 def get_db_connection():
     """
     Retorna uma conexão ativa com o banco de dados MySQL.
     Esta é a única função que deve ser usada para obter conexões em todo o sistema.
+
+    A conexão vem do pool compartilhado do processo; chamar close() a devolve
+    ao pool em vez de encerrar a conexão física. Dentro de uma unidade de
+    trabalho (requisição Flask ou bloco `transacao()`), todas as chamadas
+    recebem a mesma conexão e o commit fica a cargo da unidade.
     """
     try:
-        # Usar configuração da variável de ambiente
-        conn = mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            user=os.getenv("DB_USER", "root"),
-            password=os.getenv("DB_PASSWORD", ""),
-            database=os.getenv("DB_NAME", "catalogo_vortex"),
-            autocommit=False,  # Controle explícito de transações
-            buffered=True,     # Para garantir que todos os resultados são buscados
-            charset='utf8mb4'  # Suporte completo a Unicode
-        )
-
-        # Configurar cursor para retornar dicionários
-        conn.cursor_class = mysql.connector.cursor.MySQLCursorDict
-
-        return conn
+        unidade = unidade_de_trabalho_atual()
+        if unidade is not None:
+            return unidade.conexao()
+        return get_connection_pool().get_connection()
     except Exception as e:
         logger.error(f"Erro ao conectar ao banco de dados: {str(e)}")
         raise
@@ -88,360 +91,295 @@ def execute_query(query, params=None, fetch=False, commit=True):
         cursor.close()
         conn.close()
 
-def table_exists(table_name):
+def _split_values_clause(query):
     """
-    Verifica se uma tabela específica existe no banco de dados.
+    Separa um INSERT ... VALUES (...) em prefixo, tupla de placeholders e sufixo.
+    Retorna None se a query não tiver uma cláusula VALUES.
     """
-    query = "SHOW TABLES LIKE %s"
-    results = execute_query(query, (table_name,), fetch=True)
-    return len(results) > 0
-
-def setup_database():
+    encontrado = re.search(r"\bVALUES\b", query, re.IGNORECASE)
+    if encontrado is None:
+        return None
+
+    abre = query.find("(", encontrado.end())
+    if abre < 0:
+        return None
+
+    # Encontrar o parêntese que fecha a tupla (placeholders podem ter funções)
+    nivel = 0
+    for pos in range(abre, len(query)):
+        if query[pos] == "(":
+            nivel += 1
+        elif query[pos] == ")":
+            nivel -= 1
+            if nivel == 0:
+                return query[:abre], query[abre:pos + 1], query[pos + 1:]
+    return None
+
+def execute_many_on_cursor(cursor, query, params_seq, chunk_size=500):
     """
-    Configura o banco de dados com todas as tabelas necessárias.
-    Deve ser chamado na inicialização do sistema.
+    Executa a mesma query para várias linhas em um cursor já aberto.
+    Para INSERT ... VALUES (...) monta um único INSERT com várias tuplas por
+    lote de `chunk_size` linhas; outras queries usam cursor.executemany.
+
+    Args:
+        cursor: Cursor aberto (a transação é controlada por quem chamou)
+        query (str): Query com placeholders para uma única linha
+        params_seq (iterable): Sequência de tuplas de parâmetros
+        chunk_size (int): Máximo de linhas por comando enviado ao servidor
+
+    Returns:
+        tuple: (linhas afetadas, lista de (primeiro ID gerado, linhas) por lote)
     """
-    logger.info("Iniciando verificação de banco de dados...")
+    params_seq = list(params_seq)
+    partes = _split_values_clause(query)
+    total = 0
+    lotes = []
 
-    def update_pedidos_table():
-        """
-        Atualiza a tabela de pedidos com novos campos se necessário.
-        """
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
+    for inicio in range(0, len(params_seq), chunk_size):
+        lote = params_seq[inicio:inicio + chunk_size]
 
-            # Verificar se colunas já existem
-            cursor.execute("PRAGMA table_info(pedidos)")
-            colunas = {coluna[1] for coluna in cursor.fetchall()}
+        if partes is None:
+            cursor.executemany(query, lote)
+        else:
+            prefixo, tupla, sufixo = partes
+            query_lote = prefixo + ", ".join([tupla] * len(lote)) + sufixo
+            params_lote = [valor for params in lote for valor in params]
+            cursor.execute(query_lote, params_lote)
 
-            # Adicionar novas colunas se não existirem
-            if "status" not in colunas:
-                cursor.execute("ALTER TABLE pedidos ADD COLUMN status TEXT DEFAULT 'Carrinho'")
+        total += cursor.rowcount
+        lotes.append((cursor.lastrowid, len(lote)))
 
-            if "distribuidor_id" not in colunas:
-                cursor.execute("ALTER TABLE pedidos ADD COLUMN distribuidor_id INTEGER")
+    return total, lotes
 
-            if "data_atualizacao" not in colunas:
-                cursor.execute("ALTER TABLE pedidos ADD COLUMN data_atualizacao TEXT")
+def execute_many(query, params_seq, chunk_size=500, commit=True, return_ids=False):
+    """
+    Executa uma query para várias linhas com um número constante de idas ao banco.
 
-            if "observacoes_cliente" not in colunas:
-                cursor.execute("ALTER TABLE pedidos ADD COLUMN observacoes_cliente TEXT")
+    Args:
+        query (str): Query com placeholders para uma única linha,
+            ex: "INSERT INTO t (a, b) VALUES (%s, %s)"
+        params_seq (iterable): Sequência de tuplas de parâmetros
+        chunk_size (int): Máximo de linhas por comando enviado ao servidor
+        commit (bool): Se deve fazer commit da transação
+        return_ids (bool): Se deve retornar os IDs gerados (apenas INSERT).
+            Os IDs são calculados a partir do primeiro ID de cada lote e do
+            passo @@auto_increment_increment (maior que 1 em Galera e group
+            replication), o que pressupõe valores sem lacunas por comando
+            (innodb_autoinc_lock_mode 0 ou 1, ou ausência de INSERTs
+            concorrentes na tabela).
 
-            if "observacoes_distribuidor" not in colunas:
-                cursor.execute("ALTER TABLE pedidos ADD COLUMN observacoes_distribuidor TEXT")
+    Returns:
+        int ou list: Número de linhas afetadas ou lista de IDs gerados
+    """
+    params_seq = list(params_seq)
+    if not params_seq:
+        return [] if return_ids else 0
 
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            logger.error(f"Erro ao atualizar tabela 'pedidos': {str(e)}")
-            return False
-
-    # Lista de funções de criação de tabelas a serem executadas
-    create_functions = [
-        create_usuarios_table,
-        create_produtos_table,
-        create_pedidos_table,
-        create_itens_pedido_table,
-        create_tokens_recuperacao_table,
-        create_movimentacoes_table
-    ]
+    conn = get_db_connection()
+    cursor = conn.cursor()
 
-    # Inicialização de dados
-    init_functions = [
-        create_admin_user_if_not_exists,
-        insert_sample_products
-    ]
+    try:
+        total, lotes = execute_many_on_cursor(cursor, query, params_seq, chunk_size)
 
-    # Executar criação de tabelas
-    for create_function in create_functions:
-        try:
-            create_function()
-        except Exception as e:
-            logger.error(f"Erro ao criar tabela: {str(e)}")
+        if commit:
+            conn.commit()
 
-    # Executar inicialização de dados
-    for init_function in init_functions:
-        try:
-            init_function()
-        except Exception as e:
-            logger.error(f"Erro na inicialização de dados: {str(e)}")
+        if return_ids:
+            cursor.execute("SELECT @@SESSION.auto_increment_increment")
+            passo = cursor.fetchall()[0][0]
+            return [primeiro_id + i * passo for primeiro_id, linhas in lotes for i in range(linhas)]
+        return total
+    except Exception as e:
+        if commit:
+            conn.rollback()
+        logger.error(f"Erro na execução em lote: {str(e)}")
+        logger.error(f"Query: {query}")
+        logger.error(f"Linhas: {len(params_seq)}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
 
-    logger.info("Verificação de banco de dados concluída")
-    return True
+def stream_query_chunks(query, params=None, chunk_size=1000):
+    """
+    Executa um SELECT com cursor não bufferizado e devolve as linhas em lotes.
+    As linhas são lidas do servidor conforme o consumo, então a memória usada
+    fica limitada a um lote, independente do tamanho do resultado.
 
+    Usa uma conexão própria do pool (não a da unidade de trabalho), pois a
+    conexão fica ocupada até o resultado ser totalmente lido. Por isso não
+    enxerga escritas ainda não confirmadas da requisição atual.
 
-def create_usuarios_table():
-    """Cria a tabela de usuários se não existir"""
-    if table_exists('usuarios'):
-        return True
-
-    logger.info("Criando tabela 'usuarios'...")
-    query = """
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            nome VARCHAR(100) NOT NULL,
-            email VARCHAR(150) UNIQUE NOT NULL,
-            telefone VARCHAR(20),
-            senha_hash VARCHAR(255) NOT NULL,
-            senha_bruta VARCHAR(100),
-            tipo ENUM('funcionario', 'gerente', 'dev') NOT NULL DEFAULT 'funcionario',
-            data_criacao DATETIME NOT NULL,
-            deletado BOOLEAN NOT NULL DEFAULT 0
-        )
+    Args:
+        query (str): Query SQL (SELECT)
+        params (tuple, optional): Parâmetros para a query
+        chunk_size (int): Número de linhas por lote
+
+    Yields:
+        list: Lote de até `chunk_size` linhas (dicionários)
     """
-    execute_query(query)
-    logger.info("Tabela 'usuarios' criada com sucesso")
-    return True
+    conn = get_connection_pool().get_connection()
+    cursor = None
+    timeout_original = None
 
-def create_produtos_table():
-    """Cria a tabela de produtos se não existir"""
-    if table_exists('produtos'):
-        return True
-
-    logger.info("Criando tabela 'produtos'...")
-    query = """
-        CREATE TABLE IF NOT EXISTS produtos (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            nome VARCHAR(100) NOT NULL,
-            descricao TEXT,
-            preco DECIMAL(10, 2) NOT NULL,
-            quantidade_estoque INT NOT NULL DEFAULT 0,
-            imagem_url VARCHAR(255),
-            data_criacao DATETIME NOT NULL,
-            deletado BOOLEAN NOT NULL DEFAULT 0
-        )
+    try:
+        # Evitar que o servidor aborte o envio enquanto o consumidor processa os lotes
+        ajuste = conn.cursor()
+        ajuste.execute("SELECT @@SESSION.net_write_timeout")
+        timeout_original = ajuste.fetchall()[0][0]
+        ajuste.execute("SET SESSION net_write_timeout = %s",
+                       (int(os.getenv("DB_STREAM_NET_WRITE_TIMEOUT", "600")),))
+        ajuste.close()
+
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, params or ())
+
+        while True:
+            lote = cursor.fetchmany(chunk_size)
+            if not lote:
+                break
+            yield lote
+    except Exception as e:
+        logger.error(f"Erro na leitura em streaming: {str(e)}")
+        logger.error(f"Query: {query}")
+        logger.error(f"Parâmetros: {params}")
+        raise
+    finally:
+        # Se o consumidor parou antes do fim, ainda há linhas pendentes: o cursor
+        # não fecha limpo e o pool descarta a conexão ao recebê-la de volta
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+        # O ajuste de sessão não pode seguir com a conexão para outras requisições:
+        # se não der para restaurá-lo, a conexão é descartada
+        if timeout_original is not None:
+            try:
+                ajuste = conn.cursor()
+                ajuste.execute("SET SESSION net_write_timeout = %s", (timeout_original,))
+                ajuste.close()
+            except Exception as e:
+                logger.warning(f"Conexão de streaming descartada ao restaurar net_write_timeout: {str(e)}")
+                conn.descartar()
+        conn.close()
+
+def stream_query(query, params=None, chunk_size=1000):
     """
-    execute_query(query)
-    logger.info("Tabela 'produtos' criada com sucesso")
-    return True
+    Versão de stream_query_chunks que devolve uma linha por vez.
 
-def create_pedidos_table():
-    """Cria a tabela de pedidos se não existir"""
-    if table_exists('pedidos'):
-        return True
-
-    logger.info("Criando tabela 'pedidos'...")
-    query = """
-        CREATE TABLE IF NOT EXISTS pedidos (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            cliente_nome VARCHAR(100) NOT NULL,
-            cliente_telefone VARCHAR(20) NOT NULL,
-            cliente_email VARCHAR(150),
-            cliente_endereco TEXT NOT NULL,
-            status ENUM('Pendente', 'Concluído') NOT NULL DEFAULT 'Pendente',
-            data_pedido VARCHAR(20) NOT NULL,
-            data_criacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            deletado BOOLEAN NOT NULL DEFAULT 0
-        )
+    Yields:
+        dict: Linha do resultado
     """
-    execute_query(query)
-    logger.info("Tabela 'pedidos' criada com sucesso")
-    return True
+    for lote in stream_query_chunks(query, params, chunk_size):
+        yield from lote
 
-def create_itens_pedido_table():
-    """Cria a tabela de itens de pedido se não existir"""
-    if table_exists('itens_pedido'):
-        return True
+def _codificar_cursor_alteracoes(posicao):
+    atualizado_em, ultimo_id = posicao
+    dados = json.dumps([atualizado_em.isoformat(), ultimo_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(dados).decode('ascii')
 
-    # Verificar se as tabelas dependentes existem
-    if not table_exists('pedidos') or not table_exists('produtos'):
-        logger.error("Não é possível criar tabela 'itens_pedido': tabelas dependentes inexistentes")
-        return False
+def _decodificar_cursor_alteracoes(cursor):
+    try:
+        atualizado_em, ultimo_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(atualizado_em), int(ultimo_id)
+    except Exception as e:
+        raise ValueError(f"Cursor de alterações inválido: {str(e)}")
 
-    logger.info("Criando tabela 'itens_pedido'...")
-    query = """
-        CREATE TABLE IF NOT EXISTS itens_pedido (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            pedido_id INT NOT NULL,
-            produto_id INT NOT NULL,
-            quantidade INT NOT NULL,
-            preco_unitario DECIMAL(10, 2) NOT NULL,
-            FOREIGN KEY (pedido_id) REFERENCES pedidos(id),
-            FOREIGN KEY (produto_id) REFERENCES produtos(id)
-        )
+def buscar_alteracoes(select, alias, cursor=None, limite=500):
     """
-    execute_query(query)
-    logger.info("Tabela 'itens_pedido' criada com sucesso")
-    return True
+    Busca as linhas criadas, alteradas ou excluídas logicamente depois do
+    cursor, em ordem de (atualizado_em, id).
 
-def create_tokens_recuperacao_table():
-    """Cria a tabela de tokens de recuperação se não existir"""
-    if table_exists('tokens_recuperacao'):
-        return True
+    O próximo cursor nunca avança além de NOW() - DB_DELTA_LAG_S (padrão 5s):
+    uma transação iniciada antes e confirmada depois das linhas já lidas
+    ainda é vista na chamada seguinte. Por isso as linhas mais recentes
+    podem ser devolvidas de novo; o cliente deve aplicá-las pelo id.
+    'tem_mais' só é verdadeiro quando a página termina antes desse ponto;
+    alterações dentro da margem são entregues nas chamadas seguintes.
 
-    # Verificar se a tabela dependente existe
-    if not table_exists('usuarios'):
-        logger.error("Não é possível criar tabela 'tokens_recuperacao': tabela 'usuarios' inexistente")
-        return False
+    Args:
+        select (str): SELECT ... FROM ... sem WHERE/ORDER BY
+        alias (str): Alias da tabela que tem as colunas atualizado_em e id
+        cursor (str, optional): Cursor da chamada anterior (None para tudo)
+        limite (int): Máximo de linhas retornadas
+
+    Returns:
+        dict: 'linhas' (dicionários), 'cursor' (para a próxima chamada) e
+              'tem_mais' (se há mais alterações além do limite)
 
-    logger.info("Criando tabela 'tokens_recuperacao'...")
-    query = """
-        CREATE TABLE IF NOT EXISTS tokens_recuperacao (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            usuario_id INT NOT NULL,
-            token VARCHAR(100) NOT NULL,
-            validade FLOAT NOT NULL,
-            usado BOOLEAN NOT NULL DEFAULT 0,
-            data_criacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-        )
+    Raises:
+        ValueError: Se o cursor for inválido
     """
-    execute_query(query)
-    logger.info("Tabela 'tokens_recuperacao' criada com sucesso")
-    return True
+    posicao = _decodificar_cursor_alteracoes(cursor) if cursor else None
+
+    query = select
+    params = []
+    if posicao:
+        query += (f" WHERE ({alias}.atualizado_em > %s"
+                  f" OR ({alias}.atualizado_em = %s AND {alias}.id > %s))")
+        params = [posicao[0], posicao[0], posicao[1]]
+    # Uma linha a mais indica se há mais alterações
+    query += f" ORDER BY {alias}.atualizado_em, {alias}.id LIMIT %s"
+    params.append(int(limite) + 1)
 
-def create_movimentacoes_table():
-    """Cria a tabela de movimentações se não existir"""
-    if table_exists('movimentacoes'):
-        return True
+    conn = get_db_connection()
+    cursor_db = conn.cursor(dictionary=True)
+    try:
+        cursor_db.execute("SELECT NOW(6) - INTERVAL %s MICROSECOND AS estavel",
+                          (int(ATRASO_ALTERACOES * 1000000),))
+        estavel = (cursor_db.fetchone()['estavel'], 0)
+        cursor_db.execute(query, tuple(params))
+        linhas = cursor_db.fetchall()
+    finally:
+        cursor_db.close()
+        conn.close()
 
-    # Verificar se a tabela dependente existe
-    if not table_exists('produtos'):
-        logger.error("Não é possível criar tabela 'movimentacoes': tabela 'produtos' inexistente")
-        return False
+    cheia = len(linhas) > limite
+    linhas = linhas[:limite]
+    if linhas:
+        ultima = (linhas[-1]['atualizado_em'], linhas[-1]['id'])
+        # O cursor nunca passa do ponto estável, nem em páginas intermediárias:
+        # se a página termina dentro da margem, as linhas seguintes (e as que
+        # ainda vão confirmar com atualizado_em anterior) vêm na próxima chamada
+        proxima = min(ultima, estavel)
+        if posicao:
+            proxima = max(proxima, posicao)
+    else:
+        proxima = posicao
+    # Só há mais a buscar agora se a página parou antes do ponto estável
+    tem_mais = cheia and proxima == ultima
+
+    return {
+        'linhas': linhas,
+        'cursor': _codificar_cursor_alteracoes(proxima) if proxima else "",
+        'tem_mais': tem_mais
+    }
 
-    logger.info("Criando tabela 'movimentacoes'...")
-    query = """
-        CREATE TABLE IF NOT EXISTS movimentacoes (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            produto_id INT NOT NULL,
-            tipo ENUM('entrada', 'saida') NOT NULL,
-            quantidade INT NOT NULL,
-            preco_unitario DECIMAL(10, 2) NOT NULL,
-            data DATETIME NOT NULL,
-            observacao TEXT,
-            estoque_anterior INT NOT NULL,
-            estoque_atual INT NOT NULL,
-            FOREIGN KEY (produto_id) REFERENCES produtos(id)
-        )
+def table_exists(table_name):
     """
-    execute_query(query)
-    logger.info("Tabela 'movimentacoes' criada com sucesso")
-    return True
+    Verifica se uma tabela específica existe no banco de dados.
+    """
+    query = "SHOW TABLES LIKE %s"
+    results = execute_query(query, (table_name,), fetch=True)
+    return len(results) > 0
 
-# Funções de inicialização de dados
-def create_admin_user_if_not_exists():
-    """Cria um usuário administrador se não existir nenhum no sistema"""
-    # Verificar se a tabela existe primeiro
-    if not table_exists('usuarios'):
-        logger.warning("Tabela 'usuarios' não existe para verificar usuário admin")
-        return False
+def setup_database():
+    """
+    Atualiza o esquema do banco aplicando as migrações pendentes.
+    Deve ser chamado na inicialização do sistema.
+    Com o banco já atualizado, custa apenas a verificação da versão.
+    """
+    # Importação tardia: migrations depende deste módulo
+    from backend.infrastructure.db.migrations import aplicar_migracoes
 
+    logger.info("Iniciando verificação de banco de dados...")
     try:
-        # Verificar se já existe algum usuário admin
-        query = "SELECT COUNT(*) as count FROM usuarios WHERE tipo = 'dev'"
-        result = execute_query(query, fetch=True)
-        admin_count = result[0]['count'] if result else 0
-
-        if admin_count == 0:
-            logger.info("Nenhum usuário administrador encontrado. Criando usuário padrão...")
-
-            # Hash fixo para 'admin123'
-            senha_hash = "$2b$12$uXbOUJ.KaQvp0ODJjnwES.7.mtL1Qzx3vibMGdGeDJ0ysM3dTGVJ2"
-
-            # Inserir usuário administrador
-            query = """
-                INSERT INTO usuarios (nome, email, telefone, senha_hash, senha_bruta, tipo, data_criacao)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            params = (
-                "Administrador",
-                "admin@vortex.com",
-                "(11) 99999-9999",
-                senha_hash,
-                "admin123",
-                "dev",
-                datetime.now()
-            )
-            execute_query(query, params)
-            logger.info("Usuário administrador criado com sucesso")
-            return True
-        else:
-            logger.info(f"Já existem {admin_count} usuários administradores no sistema")
-            return True
+        aplicar_migracoes()
     except Exception as e:
-        logger.error(f"Erro ao verificar/criar usuário administrador: {str(e)}")
-        return False
-
-def insert_sample_products():
-    """Insere produtos de exemplo se a tabela estiver vazia"""
-    # Verificar se a tabela existe primeiro
-    if not table_exists('produtos'):
-        logger.warning("Tabela 'produtos' não existe para inserir produtos de exemplo")
+        logger.error(f"Erro ao atualizar esquema do banco: {str(e)}")
         return False
 
-    try:
-        # Verificar se já existem produtos
-        query = "SELECT COUNT(*) as count FROM produtos"
-        result = execute_query(query, fetch=True)
-        product_count = result[0]['count'] if result else 0
-
-        if product_count == 0:
-            logger.info("Nenhum produto encontrado. Inserindo produtos de exemplo...")
-
-            # Lista de produtos de exemplo
-            produtos_exemplo = [
-                {
-                    "nome": "Vinho Tinto Cabernet Sauvignon",
-                    "descricao": "Vinho tinto encorpado com notas de frutas vermelhas maduras e um toque de carvalho.",
-                    "preco": 89.90,
-                    "quantidade_estoque": 25,
-                    "imagem_url": "/static/images/produtos/vinho_tinto.jpg"
-                },
-                {
-                    "nome": "Espumante Brut Rosé",
-                    "descricao": "Espumante leve e refrescante com delicado aroma frutado e perlage fino e persistente.",
-                    "preco": 69.90,
-                    "quantidade_estoque": 15,
-                    "imagem_url": "/static/images/produtos/espumante_rose.jpg"
-                },
-                {
-                    "nome": "Whisky Single Malt 12 Anos",
-                    "descricao": "Whisky escocês com notas de mel, caramelo e um leve toque defumado. Envelhecido por 12 anos.",
-                    "preco": 289.90,
-                    "quantidade_estoque": 8,
-                    "imagem_url": "/static/images/produtos/whisky.jpg"
-                },
-                {
-                    "nome": "Gin Premium London Dry",
-                    "descricao": "Gin artesanal com botânicos selecionados, perfeito para drinks sofisticados.",
-                    "preco": 129.90,
-                    "quantidade_estoque": 12,
-                    "imagem_url": "/static/images/produtos/gin.jpg"
-                },
-                {
-                    "nome": "Cerveja IPA Artesanal",
-                    "descricao": "Cerveja India Pale Ale com notas cítricas e amargor acentuado. Produção artesanal em pequenos lotes.",
-                    "preco": 22.90,
-                    "quantidade_estoque": 35,
-                    "imagem_url": "/static/images/produtos/cerveja_ipa.jpg"
-                }
-            ]
-
-            # Inserir cada produto
-            query = """
-                INSERT INTO produtos (nome, descricao, preco, quantidade_estoque, imagem_url, data_criacao)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-
-            for produto in produtos_exemplo:
-                params = (
-                    produto["nome"],
-                    produto["descricao"],
-                    produto["preco"],
-                    produto["quantidade_estoque"],
-                    produto["imagem_url"],
-                    datetime.now()
-                )
-                execute_query(query, params)
-
-            logger.info(f"Inseridos {len(produtos_exemplo)} produtos de exemplo com sucesso")
-            return True
-        else:
-            logger.info(f"Já existem {product_count} produtos no sistema")
-            return True
-    except Exception as e:
-        logger.error(f"Erro ao inserir produtos de exemplo: {str(e)}")
-        return False
\ No newline at end of file
+    logger.info("Verificação de banco de dados concluída")
+    return True
@@ -0,0 +1,301 @@
+"""
+Instrumentação das queries executadas no MySQL.
+Agrupa as queries por impressão digital (SQL normalizado, sem literais) e
+acumula contagem, latências (p50/p95/p99) e linhas retornadas. Queries acima
+do limite configurado vão para o log de queries lentas, opcionalmente com
+o plano de execução (EXPLAIN).
+
+Variáveis de ambiente:
+    DB_INSTRUMENTACAO: "0" desativa a coleta (padrão "1")
+    DB_INSTRUMENTACAO_AMOSTRAS: latências guardadas por query para os percentis (padrão 1000)
+    DB_SLOW_QUERY_MS: limite em ms para o log de queries lentas (padrão 200)
+    DB_SLOW_QUERY_EXPLAIN: "1" captura o EXPLAIN das queries lentas (padrão "0")
+    DB_SLOW_QUERY_LOG: arquivo do log de queries lentas (padrão: só o logger)
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("slow_queries")
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+ATIVA = os.getenv("DB_INSTRUMENTACAO", "1") == "1"
+AMOSTRAS_POR_QUERY = int(os.getenv("DB_INSTRUMENTACAO_AMOSTRAS", "1000"))
+LIMITE_LENTA_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+CAPTURAR_EXPLAIN = os.getenv("DB_SLOW_QUERY_EXPLAIN", "0") == "1"
+
+if os.getenv("DB_SLOW_QUERY_LOG"):
+    _handler = logging.FileHandler(os.getenv("DB_SLOW_QUERY_LOG"))
+    _handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    slow_logger.addHandler(_handler)
+
+# Expressões usadas na normalização
+_RE_COMENTARIOS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_RE_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_RE_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s")
+_RE_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_RE_MULTI_VALUES = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_RE_ESPACOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalizar_sql(query):
+    """
+    Gera a impressão digital de uma query: literais e placeholders viram '?',
+    listas (IN, VALUES) viram '(...)' e os espaços são colapsados.
+    Assim, a mesma query com parâmetros ou tamanhos de lote diferentes cai
+    no mesmo grupo.
+
+    Args:
+        query (str): SQL original
+
+    Returns:
+        str: SQL normalizado
+    """
+    sql = _RE_COMENTARIOS.sub(" ", query)
+    sql = _RE_STRINGS.sub("?", sql)
+    sql = _RE_PLACEHOLDERS.sub("?", sql)
+    sql = _RE_NUMEROS.sub("?", sql)
+    sql = _RE_LISTAS.sub("(...)", sql)
+    sql = _RE_MULTI_VALUES.sub(r"\1", sql)
+    return _RE_ESPACOS.sub(" ", sql).strip()
+
+
+class EstatisticaQuery:
+    """Contadores acumulados de uma impressão digital"""
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.contagem = 0
+        self.linhas = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.lentas = 0
+        self.amostras = deque(maxlen=AMOSTRAS_POR_QUERY)
+
+    def _percentil(self, ordenadas, p):
+        if not ordenadas:
+            return 0.0
+        indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+        return ordenadas[indice]
+
+    def to_dict(self):
+        """Converte as estatísticas para dicionário (percentis sobre as amostras recentes)"""
+        ordenadas = sorted(self.amostras)
+        return {
+            'fingerprint': self.fingerprint,
+            'contagem': self.contagem,
+            'linhas': self.linhas,
+            'total_ms': round(self.total_ms, 3),
+            'media_ms': round(self.total_ms / self.contagem, 3) if self.contagem else 0.0,
+            'p50_ms': round(self._percentil(ordenadas, 50), 3),
+            'p95_ms': round(self._percentil(ordenadas, 95), 3),
+            'p99_ms': round(self._percentil(ordenadas, 99), 3),
+            'max_ms': round(self.max_ms, 3),
+            'lentas': self.lentas
+        }
+
+
+_lock = threading.Lock()
+_estatisticas = {}
+_observadores = []
+
+
+def adicionar_observador(observador):
+    """
+    Registra uma função chamada a cada query executada.
+
+    Args:
+        observador: Callable recebendo (fingerprint, duracao_ms, linhas)
+    """
+    with _lock:
+        if observador not in _observadores:
+            _observadores.append(observador)
+
+def remover_observador(observador):
+    """Remove um observador registrado com adicionar_observador"""
+    with _lock:
+        if observador in _observadores:
+            _observadores.remove(observador)
+
+def registrar_query(query, duracao_ms, linhas=0):
+    """
+    Contabiliza uma execução de query.
+
+    Args:
+        query (str): SQL executado
+        duracao_ms (float): Tempo de execução em milissegundos
+        linhas (int): Linhas retornadas (SELECT) ou afetadas
+
+    Returns:
+        str: Impressão digital da query
+    """
+    fingerprint = normalizar_sql(query)
+    linhas = max(linhas or 0, 0)
+
+    with _lock:
+        estatistica = _estatisticas.get(fingerprint)
+        if estatistica is None:
+            estatistica = _estatisticas[fingerprint] = EstatisticaQuery(fingerprint)
+        estatistica.contagem += 1
+        estatistica.linhas += linhas
+        estatistica.total_ms += duracao_ms
+        estatistica.max_ms = max(estatistica.max_ms, duracao_ms)
+        estatistica.amostras.append(duracao_ms)
+        if duracao_ms >= LIMITE_LENTA_MS:
+            estatistica.lentas += 1
+        observadores = list(_observadores)
+
+    for observador in observadores:
+        try:
+            observador(fingerprint, duracao_ms, linhas)
+        except Exception as e:
+            logger.warning(f"Erro em observador de queries: {str(e)}")
+
+    return fingerprint
+
+def registrar_linhas(query, linhas):
+    """Soma linhas lidas depois da execução (cursores sem buffer)"""
+    fingerprint = normalizar_sql(query)
+    with _lock:
+        estatistica = _estatisticas.get(fingerprint)
+        if estatistica is not None:
+            estatistica.linhas += linhas
+
+def obter_estatisticas_queries(ordenar_por='total_ms', limite=50):
+    """
+    Retorna as estatísticas por impressão digital.
+
+    Args:
+        ordenar_por (str): Campo de ordenação (decrescente)
+        limite (int): Quantidade máxima de queries retornadas
+
+    Returns:
+        list: Estatísticas no formato de EstatisticaQuery.to_dict
+    """
+    with _lock:
+        dados = [estatistica.to_dict() for estatistica in _estatisticas.values()]
+    dados.sort(key=lambda item: item.get(ordenar_por, 0), reverse=True)
+    return dados[:limite] if limite else dados
+
+def limpar_estatisticas():
+    """Zera as estatísticas acumuladas"""
+    with _lock:
+        _estatisticas.clear()
+
+def _registrar_query_lenta(query, params, duracao_ms, linhas, plano=None):
+    """Escreve uma query lenta no log dedicado"""
+    # Parâmetros truncados: lotes grandes não devem inundar o log
+    mensagem = (f"{duracao_ms:.1f}ms linhas={linhas} sql={_RE_ESPACOS.sub(' ', query).strip()} "
+                f"params={str(params)[:500]}")
+    if plano:
+        mensagem += f" explain={plano}"
+    slow_logger.warning(mensagem)
+
+
+class CursorInstrumentado:
+    """
+    Envolve um cursor do mysql.connector medindo execute/executemany.
+    Os demais atributos são repassados ao cursor original.
+    """
+
+    def __init__(self, cursor, conexao, buffered):
+        self._cursor = cursor
+        self._conexao = conexao
+        self._buffered = buffered
+        self._ultima_query = None
+
+    def _medir(self, metodo, query, params, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return metodo(query, params, **kwargs)
+        finally:
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            self._finalizar_medicao(query, params, duracao_ms)
+
+    def _finalizar_medicao(self, query, params, duracao_ms):
+        self._ultima_query = query
+        linhas = self._cursor.rowcount if self._buffered or not self._cursor.with_rows else 0
+        registrar_query(query, duracao_ms, linhas)
+
+        if duracao_ms >= LIMITE_LENTA_MS:
+            plano = self._explicar(query, params) if CAPTURAR_EXPLAIN else None
+            _registrar_query_lenta(query, params, duracao_ms, linhas, plano)
+
+    def _explicar(self, query, params):
+        """Captura o EXPLAIN de um SELECT (apenas em cursores com buffer)"""
+        if not self._buffered or not query.lstrip().upper().startswith("SELECT"):
+            return None
+        try:
+            cursor = self._conexao.cursor(dictionary=True, buffered=True)
+            try:
+                cursor.execute("EXPLAIN " + query, params or ())
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.debug(f"Não foi possível capturar EXPLAIN: {str(e)}")
+            return None
+
+    def execute(self, query, params=None, **kwargs):
+        return self._medir(self._cursor.execute, query, params, **kwargs)
+
+    def executemany(self, query, seq_params):
+        return self._medir(self._cursor.executemany, query, seq_params)
+
+    def _contar(self, linhas):
+        if not self._buffered and self._ultima_query and linhas:
+            registrar_linhas(self._ultima_query, linhas)
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        self._contar(1 if linha is not None else 0)
+        return linha
+
+    def fetchmany(self, size=1):
+        linhas = self._cursor.fetchmany(size)
+        self._contar(len(linhas))
+        return linhas
+
+    def fetchall(self):
+        linhas = self._cursor.fetchall()
+        self._contar(len(linhas))
+        return linhas
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._cursor.close()
+
+
+def instrumentar_cursor(cursor, conexao, buffered):
+    """
+    Retorna o cursor instrumentado (ou o próprio cursor se a coleta estiver desativada).
+
+    Args:
+        cursor: Cursor do mysql.connector
+        conexao: Conexão física que criou o cursor (usada no EXPLAIN)
+        buffered (bool): Se o cursor lê todo o resultado na execução
+    """
+    if not ATIVA:
+        return cursor
+    return CursorInstrumentado(cursor, conexao, buffered)
@@ -0,0 +1,476 @@
+"""
+Migrações versionadas do esquema do banco de dados.
+A versão aplicada fica na tabela schema_version; na inicialização apenas as
+migrações pendentes são executadas, em ordem, em uma única conexão.
+
+Para alterar o esquema, acrescente uma nova função ao final de MIGRACOES;
+nunca altere uma migração que já foi publicada.
+"""
+
+import logging
+from datetime import datetime
+
+from backend.infrastructure.db.connection_pool import get_connection_pool
+from backend.infrastructure.db.db_manager import execute_many_on_cursor
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Nome do lock que impede dois processos de migrarem ao mesmo tempo
+LOCK_MIGRACOES = "catalogo_vortex_migracoes"
+
+
+# Funções auxiliares de DDL
+
+def _coluna_existe(cursor, tabela, coluna):
+    """Verifica se a coluna existe na tabela do banco atual"""
+    cursor.execute("""
+        SELECT COUNT(*) AS total FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (tabela, coluna))
+    return cursor.fetchone()['total'] > 0
+
+def _adicionar_coluna(cursor, tabela, coluna, definicao):
+    """Adiciona a coluna se ela ainda não existir"""
+    if not _coluna_existe(cursor, tabela, coluna):
+        cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+        logger.info(f"Coluna '{tabela}.{coluna}' adicionada")
+
+def _indice_existe(cursor, tabela, colunas):
+    """Verifica se algum índice da tabela começa pelas colunas informadas"""
+    cursor.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (tabela,))
+
+    indices = {}
+    for linha in cursor.fetchall():
+        indices.setdefault(linha['INDEX_NAME'], []).append(linha['COLUMN_NAME'])
+
+    return any(colunas_indice[:len(colunas)] == list(colunas) for colunas_indice in indices.values())
+
+def _criar_indice(cursor, tabela, nome, colunas):
+    """Cria o índice se nenhum índice existente já cobrir as colunas"""
+    if _indice_existe(cursor, tabela, colunas):
+        logger.info(f"Índice em {tabela}({', '.join(colunas)}) já existe")
+        return
+    cursor.execute(f"CREATE INDEX {nome} ON {tabela} ({', '.join(colunas)})")
+    logger.info(f"Índice '{nome}' criado em {tabela}({', '.join(colunas)})")
+
+
+# Migrações
+
+def migracao_001_tabelas_iniciais(cursor):
+    """Cria as tabelas base do sistema"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nome VARCHAR(100) NOT NULL,
+            email VARCHAR(150) UNIQUE NOT NULL,
+            telefone VARCHAR(20),
+            senha_hash VARCHAR(255) NOT NULL,
+            senha_bruta VARCHAR(100),
+            tipo ENUM('funcionario', 'gerente', 'dev') NOT NULL DEFAULT 'funcionario',
+            data_criacao DATETIME NOT NULL,
+            deletado BOOLEAN NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS produtos (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nome VARCHAR(100) NOT NULL,
+            descricao TEXT,
+            preco DECIMAL(10, 2) NOT NULL,
+            quantidade_estoque INT NOT NULL DEFAULT 0,
+            imagem_url VARCHAR(255),
+            data_criacao DATETIME NOT NULL,
+            deletado BOOLEAN NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pedidos (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            cliente_nome VARCHAR(100) NOT NULL,
+            cliente_telefone VARCHAR(20) NOT NULL,
+            cliente_email VARCHAR(150),
+            cliente_endereco TEXT NOT NULL,
+            status ENUM('Pendente', 'Concluído') NOT NULL DEFAULT 'Pendente',
+            data_pedido VARCHAR(20) NOT NULL,
+            data_criacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            deletado BOOLEAN NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS itens_pedido (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            pedido_id INT NOT NULL,
+            produto_id INT NOT NULL,
+            quantidade INT NOT NULL,
+            preco_unitario DECIMAL(10, 2) NOT NULL,
+            FOREIGN KEY (pedido_id) REFERENCES pedidos(id),
+            FOREIGN KEY (produto_id) REFERENCES produtos(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tokens_recuperacao (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            usuario_id INT NOT NULL,
+            token VARCHAR(100) NOT NULL,
+            validade FLOAT NOT NULL,
+            usado BOOLEAN NOT NULL DEFAULT 0,
+            data_criacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS movimentacoes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            produto_id INT NOT NULL,
+            tipo ENUM('entrada', 'saida') NOT NULL,
+            quantidade INT NOT NULL,
+            preco_unitario DECIMAL(10, 2) NOT NULL,
+            data DATETIME NOT NULL,
+            observacao TEXT,
+            estoque_anterior INT NOT NULL,
+            estoque_atual INT NOT NULL,
+            FOREIGN KEY (produto_id) REFERENCES produtos(id)
+        )
+    """)
+
+def migracao_002_fluxo_pedidos(cursor):
+    """
+    Adiciona as colunas do fluxo de pedidos (carrinho -> distribuidor).
+    O status passa a aceitar todos os valores de StatusPedido.
+    """
+    cursor.execute("ALTER TABLE pedidos MODIFY COLUMN status VARCHAR(30) NOT NULL DEFAULT 'Carrinho'")
+    _adicionar_coluna(cursor, 'pedidos', 'distribuidor_id', "INT NULL")
+    _adicionar_coluna(cursor, 'pedidos', 'data_atualizacao', "DATETIME NULL")
+    _adicionar_coluna(cursor, 'pedidos', 'observacoes_cliente', "TEXT NULL")
+    _adicionar_coluna(cursor, 'pedidos', 'observacoes_distribuidor', "TEXT NULL")
+
+def migracao_003_indices(cursor):
+    """Cria os índices secundários usados pelas consultas mais frequentes"""
+    _criar_indice(cursor, 'itens_pedido', 'idx_itens_pedido_pedido', ['pedido_id'])
+    _criar_indice(cursor, 'movimentacoes', 'idx_movimentacoes_produto_data', ['produto_id', 'data'])
+    _criar_indice(cursor, 'pedidos', 'idx_pedidos_deletado_data', ['deletado', 'data_criacao'])
+    _criar_indice(cursor, 'usuarios', 'idx_usuarios_email', ['email'])
+    _criar_indice(cursor, 'usuarios', 'idx_usuarios_telefone', ['telefone'])
+    _criar_indice(cursor, 'tokens_recuperacao', 'idx_tokens_recuperacao_token', ['token'])
+
+def migracao_004_dados_iniciais(cursor):
+    """Cria o usuário administrador e os produtos de exemplo em bancos vazios"""
+    cursor.execute("SELECT COUNT(*) AS total FROM usuarios WHERE tipo = 'dev'")
+    if cursor.fetchone()['total'] == 0:
+        logger.info("Nenhum usuário administrador encontrado. Criando usuário padrão...")
+        cursor.execute("""
+            INSERT INTO usuarios (nome, email, telefone, senha_hash, senha_bruta, tipo, data_criacao)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (
+            "Administrador",
+            "admin@vortex.com",
+            "(11) 99999-9999",
+            # Hash fixo para 'admin123'
+            "$2b$12$uXbOUJ.KaQvp0ODJjnwES.7.mtL1Qzx3vibMGdGeDJ0ysM3dTGVJ2",
+            "admin123",
+            "dev",
+            datetime.now()
+        ))
+
+    cursor.execute("SELECT COUNT(*) AS total FROM produtos")
+    if cursor.fetchone()['total'] == 0:
+        logger.info("Nenhum produto encontrado. Inserindo produtos de exemplo...")
+        produtos_exemplo = [
+            ("Vinho Tinto Cabernet Sauvignon",
+             "Vinho tinto encorpado com notas de frutas vermelhas maduras e um toque de carvalho.",
+             89.90, 25, "/static/images/produtos/vinho_tinto.jpg"),
+            ("Espumante Brut Rosé",
+             "Espumante leve e refrescante com delicado aroma frutado e perlage fino e persistente.",
+             69.90, 15, "/static/images/produtos/espumante_rose.jpg"),
+            ("Whisky Single Malt 12 Anos",
+             "Whisky escocês com notas de mel, caramelo e um leve toque defumado. Envelhecido por 12 anos.",
+             289.90, 8, "/static/images/produtos/whisky.jpg"),
+            ("Gin Premium London Dry",
+             "Gin artesanal com botânicos selecionados, perfeito para drinks sofisticados.",
+             129.90, 12, "/static/images/produtos/gin.jpg"),
+            ("Cerveja IPA Artesanal",
+             "Cerveja India Pale Ale com notas cítricas e amargor acentuado. Produção artesanal em pequenos lotes.",
+             22.90, 35, "/static/images/produtos/cerveja_ipa.jpg")
+        ]
+        agora = datetime.now()
+        execute_many_on_cursor(cursor, """
+            INSERT INTO produtos (nome, descricao, preco, quantidade_estoque, imagem_url, data_criacao)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, [produto + (agora,) for produto in produtos_exemplo])
+
+
+def migracao_005_estoque_reservado(cursor):
+    """
+    Marca nos pedidos se o estoque dos itens já foi baixado.
+    Pedidos do esquema antigo tinham o estoque baixado na criação e os do
+    fluxo novo, na confirmação.
+    """
+    _adicionar_coluna(cursor, 'pedidos', 'estoque_reservado', "BOOLEAN NOT NULL DEFAULT 0")
+    cursor.execute("""
+        UPDATE pedidos SET estoque_reservado = 1
+        WHERE status IN ('Pendente', 'Concluído', 'Confirmado', 'Em Preparação', 'Entregue')
+    """)
+
+def migracao_006_versoes_cache(cursor):
+    """
+    Cria a tabela de versões de cache compartilhada entre processos.
+    Cada escrita incrementa a versão da chave de dados afetada; os workers
+    consultam a tabela para descartar seus caches em memória.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            chave VARCHAR(100) PRIMARY KEY,
+            versao BIGINT NOT NULL DEFAULT 0,
+            atualizado_em DATETIME(6) NOT NULL
+        )
+    """)
+
+def migracao_007_data_atualizacao(cursor):
+    """
+    Adiciona atualizado_em a produtos, pedidos e movimentacoes.
+    A coluna é mantida pelo próprio MySQL (ON UPDATE) e indexada junto
+    com o id para a sincronização incremental (?since=) das listagens.
+    """
+    for tabela in ('produtos', 'pedidos', 'movimentacoes'):
+        _adicionar_coluna(cursor, tabela, 'atualizado_em',
+                          "DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)")
+        _criar_indice(cursor, tabela, f"idx_{tabela}_atualizado_em", ['atualizado_em', 'id'])
+
+def migracao_008_indice_data_movimentacoes(cursor):
+    """Indexa movimentacoes.data para a exportação por período"""
+    _criar_indice(cursor, 'movimentacoes', 'idx_movimentacoes_data', ['data'])
+
+def migracao_009_jobs(cursor):
+    """
+    Cria a tabela de jobs em segundo plano (exportações, relatórios e importações).
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id CHAR(32) PRIMARY KEY,
+            tipo VARCHAR(50) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pendente',
+            progresso TINYINT UNSIGNED NOT NULL DEFAULT 0,
+            mensagem TEXT,
+            parametros MEDIUMTEXT,
+            usuario_id INT,
+            processo VARCHAR(150),
+            arquivo_resultado VARCHAR(255),
+            nome_resultado VARCHAR(255),
+            mimetype_resultado VARCHAR(100),
+            criado_em DATETIME(6) NOT NULL,
+            iniciado_em DATETIME(6),
+            concluido_em DATETIME(6)
+        )
+    """)
+    _criar_indice(cursor, 'jobs', 'idx_jobs_usuario_criado', ['usuario_id', 'criado_em'])
+    _criar_indice(cursor, 'jobs', 'idx_jobs_status_criado', ['status', 'criado_em'])
+
+def migracao_010_agregados_relatorios(cursor):
+    """
+    Cria as tabelas agregadas dos relatórios (vendas diárias por produto,
+    totais diários por status e por distribuidor) e as preenche com o
+    histórico existente. Daí em diante elas são mantidas pelo
+    RelatorioRepository na mesma transação que grava cada pedido.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS agregado_pedidos_status (
+            dia DATE NOT NULL,
+            status VARCHAR(30) NOT NULL,
+            pedidos INT NOT NULL DEFAULT 0,
+            itens BIGINT NOT NULL DEFAULT 0,
+            valor DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, status)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS agregado_vendas_produto (
+            dia DATE NOT NULL,
+            produto_id INT NOT NULL,
+            status VARCHAR(30) NOT NULL,
+            pedidos INT NOT NULL DEFAULT 0,
+            quantidade BIGINT NOT NULL DEFAULT 0,
+            valor DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, produto_id, status),
+            INDEX idx_agregado_vendas_produto (produto_id, dia)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS agregado_vendas_distribuidor (
+            dia DATE NOT NULL,
+            distribuidor_id INT NOT NULL,
+            status VARCHAR(30) NOT NULL,
+            pedidos INT NOT NULL DEFAULT 0,
+            valor DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, distribuidor_id, status),
+            INDEX idx_agregado_vendas_distribuidor (distribuidor_id, dia)
+        )
+    """)
+
+    # Carga inicial a partir dos pedidos ativos
+    for tabela in ('agregado_pedidos_status', 'agregado_vendas_produto', 'agregado_vendas_distribuidor'):
+        cursor.execute(f"DELETE FROM {tabela}")
+
+    cursor.execute("""
+        INSERT INTO agregado_pedidos_status (dia, status, pedidos, itens, valor)
+        SELECT DATE(p.data_criacao), p.status, COUNT(*), COALESCE(SUM(t.itens), 0), COALESCE(SUM(t.valor), 0)
+        FROM pedidos p
+        LEFT JOIN (
+            SELECT pedido_id, SUM(quantidade) AS itens, SUM(quantidade * preco_unitario) AS valor
+            FROM itens_pedido
+            GROUP BY pedido_id
+        ) t ON t.pedido_id = p.id
+        WHERE p.deletado = 0
+        GROUP BY DATE(p.data_criacao), p.status
+    """)
+    cursor.execute("""
+        INSERT INTO agregado_vendas_produto (dia, produto_id, status, pedidos, quantidade, valor)
+        SELECT DATE(p.data_criacao), ip.produto_id, p.status, COUNT(DISTINCT p.id),
+               SUM(ip.quantidade), SUM(ip.quantidade * ip.preco_unitario)
+        FROM pedidos p
+        JOIN itens_pedido ip ON ip.pedido_id = p.id
+        WHERE p.deletado = 0
+        GROUP BY DATE(p.data_criacao), ip.produto_id, p.status
+    """)
+    cursor.execute("""
+        INSERT INTO agregado_vendas_distribuidor (dia, distribuidor_id, status, pedidos, valor)
+        SELECT DATE(p.data_criacao), COALESCE(p.distribuidor_id, 0), p.status, COUNT(*), COALESCE(SUM(t.valor), 0)
+        FROM pedidos p
+        LEFT JOIN (
+            SELECT pedido_id, SUM(quantidade * preco_unitario) AS valor
+            FROM itens_pedido
+            GROUP BY pedido_id
+        ) t ON t.pedido_id = p.id
+        WHERE p.deletado = 0
+        GROUP BY DATE(p.data_criacao), COALESCE(p.distribuidor_id, 0), p.status
+    """)
+
+def migracao_011_itens_agregado_distribuidor(cursor):
+    """
+    Adiciona a quantidade de itens ao agregado por distribuidor (série de
+    vendas por distribuidor) e a preenche com o histórico existente.
+    """
+    _adicionar_coluna(cursor, 'agregado_vendas_distribuidor', 'itens', "BIGINT NOT NULL DEFAULT 0")
+    cursor.execute("""
+        UPDATE agregado_vendas_distribuidor a
+        JOIN (
+            SELECT DATE(p.data_criacao) AS dia, COALESCE(p.distribuidor_id, 0) AS distribuidor_id,
+                   p.status, SUM(ip.quantidade) AS itens
+            FROM pedidos p
+            JOIN itens_pedido ip ON ip.pedido_id = p.id
+            WHERE p.deletado = 0
+            GROUP BY DATE(p.data_criacao), COALESCE(p.distribuidor_id, 0), p.status
+        ) t ON t.dia = a.dia AND t.distribuidor_id = a.distribuidor_id AND t.status = a.status
+        SET a.itens = t.itens
+    """)
+
+def migracao_012_valor_total_pedidos(cursor):
+    """
+    Guarda o valor total de cada pedido em pedidos.valor_total, indexado,
+    para que a busca ordenada por valor pagine por índice (keyset) sem
+    somar os itens de todos os pedidos filtrados a cada página. A coluna
+    é mantida pelo PedidoRepository sempre que os itens são gravados.
+
+    Também garante data_criacao NOT NULL (bancos antigos podiam ter nulos),
+    já que a paginação por data compara (data_criacao, id).
+    """
+    _adicionar_coluna(cursor, 'pedidos', 'valor_total', "DECIMAL(12, 2) NOT NULL DEFAULT 0")
+    cursor.execute("""
+        UPDATE pedidos p
+        JOIN (
+            SELECT pedido_id, SUM(quantidade * preco_unitario) AS valor
+            FROM itens_pedido
+            GROUP BY pedido_id
+        ) t ON t.pedido_id = p.id
+        SET p.valor_total = t.valor
+    """)
+    _criar_indice(cursor, 'pedidos', 'idx_pedidos_deletado_valor', ['deletado', 'valor_total'])
+
+    cursor.execute("UPDATE pedidos SET data_criacao = atualizado_em WHERE data_criacao IS NULL")
+    cursor.execute("ALTER TABLE pedidos MODIFY COLUMN data_criacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP")
+
+
+# Lista ordenada de migrações: a versão é a posição na lista (1, 2, ...)
+MIGRACOES = [
+    migracao_001_tabelas_iniciais,
+    migracao_002_fluxo_pedidos,
+    migracao_003_indices,
+    migracao_004_dados_iniciais,
+    migracao_005_estoque_reservado,
+    migracao_006_versoes_cache,
+    migracao_007_data_atualizacao,
+    migracao_008_indice_data_movimentacoes,
+    migracao_009_jobs,
+    migracao_010_agregados_relatorios,
+    migracao_011_itens_agregado_distribuidor,
+    migracao_012_valor_total_pedidos,
+]
+
+
+def _versao_atual(cursor):
+    """Retorna a última versão aplicada, criando schema_version se necessário"""
+    try:
+        cursor.execute("SELECT COALESCE(MAX(versao), 0) AS versao FROM schema_version")
+    except Exception:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                versao INT PRIMARY KEY,
+                descricao VARCHAR(255) NOT NULL,
+                aplicada_em DATETIME NOT NULL
+            )
+        """)
+        cursor.execute("SELECT COALESCE(MAX(versao), 0) AS versao FROM schema_version")
+    return cursor.fetchone()['versao']
+
+def aplicar_migracoes():
+    """
+    Aplica as migrações pendentes.
+    Com o esquema atualizado custa uma única consulta à schema_version.
+
+    Returns:
+        int: Versão do esquema após a execução
+    """
+    conn = get_connection_pool().get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        versao = _versao_atual(cursor)
+        if versao >= len(MIGRACOES):
+            logger.info(f"Esquema do banco atualizado (versão {versao})")
+            return versao
+
+        # Outro processo pode estar migrando: aguardar e reler a versão
+        cursor.execute("SELECT GET_LOCK(%s, 60) AS obtido", (LOCK_MIGRACOES,))
+        if not cursor.fetchone()['obtido']:
+            raise RuntimeError("Não foi possível obter o lock de migração do banco")
+
+        try:
+            versao = _versao_atual(cursor)
+            for numero, migracao in enumerate(MIGRACOES[versao:], start=versao + 1):
+                descricao = (migracao.__doc__ or migracao.__name__).strip().splitlines()[0]
+                logger.info(f"Aplicando migração {numero}: {descricao}")
+
+                migracao(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_version (versao, descricao, aplicada_em) VALUES (%s, %s, %s)",
+                    (numero, descricao, datetime.now())
+                )
+                conn.commit()
+                versao = numero
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s) AS liberado", (LOCK_MIGRACOES,))
+            cursor.fetchone()
+
+        logger.info(f"Migrações aplicadas. Esquema na versão {versao}")
+        return versao
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Erro ao aplicar migrações: {str(e)}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
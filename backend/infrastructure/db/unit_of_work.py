@@ -0,0 +1,263 @@
+"""
+Unidade de trabalho (Unit of Work) para o Catálogo Vortex.
+Faz com que todas as chamadas de repositório de uma requisição (ou de um
+bloco `with transacao():`) usem a mesma conexão e um único commit.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_request_context, jsonify
+
+from backend.infrastructure.db.connection_pool import get_connection_pool
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Unidades de trabalho abertas fora de uma requisição Flask (scripts, threads)
+_local = threading.local()
+
+
+class _ConexaoCompartilhada:
+    """
+    Visão da conexão da unidade de trabalho entregue aos repositórios.
+    commit() e close() viram no-ops (quem decide é a unidade de trabalho) e
+    rollback() marca a unidade inteira para ser desfeita no final.
+    """
+
+    def __init__(self, unidade, conexao):
+        self._unidade = unidade
+        self._conexao = conexao
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def begin(self):
+        pass
+
+    def start_transaction(self, *args, **kwargs):
+        pass
+
+    def rollback(self):
+        self._unidade.marcar_rollback()
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+
+class UnitOfWork:
+    """
+    Agrupa as operações de banco em uma única conexão e transação.
+    A conexão só é obtida do pool na primeira query.
+    """
+
+    def __init__(self):
+        self._conexao = None
+        self.somente_rollback = False
+        self._apos_commit = []
+
+    @property
+    def ativa(self) -> bool:
+        """Indica se a unidade já obteve uma conexão"""
+        return self._conexao is not None
+
+    def conexao(self):
+        """Retorna a conexão compartilhada, obtendo-a do pool se necessário"""
+        if self._conexao is None:
+            self._conexao = get_connection_pool().get_connection()
+        return _ConexaoCompartilhada(self, self._conexao)
+
+    def marcar_rollback(self):
+        """Garante que a transação será desfeita ao final da unidade"""
+        self.somente_rollback = True
+
+    def apos_commit(self, callback, ao_descartar=None):
+        """
+        Agenda uma função para rodar depois do commit da unidade.
+        Se a transação for desfeita, a função é descartada e `ao_descartar`
+        (se informada) é chamada no lugar dela.
+        """
+        self._apos_commit.append((callback, ao_descartar))
+
+    def _executar_apos_commit(self):
+        callbacks, self._apos_commit = self._apos_commit, []
+        for callback, _ in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Erro em callback pós-commit: {str(e)}")
+
+    def _descartar_apos_commit(self):
+        callbacks, self._apos_commit = self._apos_commit, []
+        for _, ao_descartar in callbacks:
+            if ao_descartar is None:
+                continue
+            try:
+                ao_descartar()
+            except Exception as e:
+                logger.error(f"Erro ao descartar callback pós-commit: {str(e)}")
+
+    def finalizar(self, erro: bool = False):
+        """
+        Confirma ou desfaz a transação e devolve a conexão ao pool.
+
+        Args:
+            erro: Se True, a transação é desfeita
+        """
+        desfazer = erro or self.somente_rollback
+
+        if self._conexao is None:
+            if desfazer:
+                self._descartar_apos_commit()
+            else:
+                self._executar_apos_commit()
+            return
+
+        conexao = self._conexao
+        self._conexao = None
+        try:
+            if desfazer:
+                conexao.rollback()
+                logger.debug("Unidade de trabalho desfeita")
+            elif conexao.in_transaction:
+                conexao.commit()
+                logger.debug("Unidade de trabalho confirmada")
+        except Exception as e:
+            logger.error(f"Erro ao finalizar unidade de trabalho: {str(e)}")
+            self._descartar_apos_commit()
+            try:
+                conexao.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            conexao.close()
+
+        if desfazer:
+            self._descartar_apos_commit()
+        else:
+            self._executar_apos_commit()
+
+
+def unidade_de_trabalho_atual():
+    """
+    Retorna a unidade de trabalho ativa: a da requisição Flask, se houver,
+    ou a aberta por `transacao()` na thread atual. Retorna None se nenhuma.
+    Dentro de `unidade_isolada()` retorna a unidade isolada.
+    """
+    isolada = getattr(_local, 'isolada', None)
+    if isolada is not None:
+        return isolada
+    if has_request_context():
+        unidade = g.get('unidade_trabalho')
+        if unidade is not None:
+            return unidade
+    return getattr(_local, 'unidade', None)
+
+
+def executar_apos_commit(callback, ao_descartar=None):
+    """
+    Executa a função depois do commit da unidade de trabalho atual,
+    ou imediatamente se não houver unidade aberta. Se a transação for
+    desfeita, chama `ao_descartar` (se informada) no lugar dela.
+    """
+    unidade = unidade_de_trabalho_atual()
+    if unidade is None:
+        callback()
+    else:
+        unidade.apos_commit(callback, ao_descartar)
+
+
+@contextmanager
+def transacao():
+    """
+    Executa o bloco dentro de uma unidade de trabalho.
+    Se já existir uma (da requisição ou de um bloco externo), o bloco participa
+    dela; caso contrário uma nova é criada e confirmada ao final do bloco.
+    Exceções desfazem a transação inteira.
+    """
+    unidade = unidade_de_trabalho_atual()
+
+    if unidade is not None:
+        try:
+            yield unidade
+        except Exception:
+            unidade.marcar_rollback()
+            raise
+        return
+
+    unidade = UnitOfWork()
+    _local.unidade = unidade
+    try:
+        yield unidade
+    except Exception:
+        unidade.finalizar(erro=True)
+        raise
+    else:
+        unidade.finalizar()
+    finally:
+        _local.unidade = None
+
+
+@contextmanager
+def unidade_isolada():
+    """
+    Executa o bloco em uma unidade de trabalho própria, com outra conexão do
+    pool, mesmo dentro de uma requisição ou de um `transacao()`.
+    Usado para preencher caches compartilhados: a leitura não enxerga escritas
+    ainda não confirmadas da requisição nem o snapshot antigo da sua transação.
+    """
+    anterior = getattr(_local, 'isolada', None)
+    unidade = UnitOfWork()
+    _local.isolada = unidade
+    try:
+        yield unidade
+    except Exception:
+        unidade.finalizar(erro=True)
+        raise
+    else:
+        unidade.finalizar()
+    finally:
+        _local.isolada = anterior
+
+
+def init_app(app):
+    """
+    Liga uma unidade de trabalho a cada requisição da aplicação Flask.
+    A transação é confirmada no after_request, antes de a resposta sair:
+    se o commit falhar, o cliente recebe 500 em vez do status de sucesso.
+    Requisições com exceção ou status de erro (>= 400) são desfeitas.
+    Conexões obtidas depois disso (respostas em streaming) são encerradas
+    no teardown.
+    """
+
+    @app.before_request
+    def _abrir_unidade_trabalho():
+        g.unidade_trabalho = UnitOfWork()
+
+    @app.after_request
+    def _confirmar_unidade_trabalho(response):
+        unidade = g.get('unidade_trabalho')
+        if unidade is None:
+            return response
+        try:
+            unidade.finalizar(erro=response.status_code >= 400)
+        except Exception as e:
+            logger.error(f"Falha ao confirmar unidade de trabalho da requisição: {str(e)}")
+            resposta = jsonify({"erro": "Não foi possível confirmar a operação no banco de dados"})
+            resposta.status_code = 500
+            return resposta
+        return response
+
+    @app.teardown_request
+    def _fechar_unidade_trabalho(exc):
+        unidade = g.pop('unidade_trabalho', None)
+        if unidade is not None:
+            try:
+                unidade.finalizar(erro=exc is not None)
+            except Exception as e:
+                logger.error(f"Falha ao encerrar unidade de trabalho da requisição: {str(e)}")
@@ -0,0 +1,153 @@
+"""
+Geração de planilhas (XLSX ou CSV) a partir de geradores de linhas.
+As linhas são escritas conforme chegam, sem montar a planilha em memória:
+o XLSX usa o modo write-only do openpyxl e o resultado vai para um arquivo
+temporário que só passa para o disco quando fica grande.
+
+O openpyxl é opcional: sem ele, a exportação sai em CSV (um arquivo por aba,
+compactados em ZIP quando há mais de uma).
+"""
+
+import io
+import csv
+import logging
+import zipfile
+from decimal import Decimal
+from tempfile import SpooledTemporaryFile
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+except ImportError:
+    # Dependência opcional: sem ela a exportação usa CSV
+    Workbook = None
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+FORMATO_XLSX = "xlsx"
+FORMATO_CSV = "csv"
+
+# Tamanho a partir do qual o arquivo temporário vai para o disco
+TAMANHO_MEMORIA = 8 * 1024 * 1024
+
+# Linhas acumuladas antes de cada escrita do CSV
+LINHAS_POR_ESCRITA = 1000
+
+MIMETYPES = {
+    FORMATO_XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    FORMATO_CSV: 'text/csv',
+    'zip': 'application/zip'
+}
+
+# Aba: (nome, cabeçalhos, linhas)
+Aba = Tuple[str, List[str], Iterable[Iterable[Any]]]
+
+
+def formato_disponivel(formato: str) -> str:
+    """
+    Retorna o formato que será de fato gerado (XLSX cai para CSV sem openpyxl).
+
+    Raises:
+        ValueError: Se o formato não for suportado
+    """
+    formato = (formato or FORMATO_XLSX).lower()
+    if formato not in (FORMATO_XLSX, FORMATO_CSV):
+        raise ValueError(f"Formato '{formato}' inválido. Valores permitidos: {FORMATO_XLSX}, {FORMATO_CSV}")
+    if formato == FORMATO_XLSX and Workbook is None:
+        logger.warning("openpyxl não instalado: exportação gerada em CSV")
+        return FORMATO_CSV
+    return formato
+
+def _escrever_xlsx(abas: List[Aba], destino) -> int:
+    livro = Workbook(write_only=True)
+    total = 0
+
+    for nome, cabecalhos, linhas in abas:
+        planilha = livro.create_sheet(title=nome[:31])
+        cabecalho = []
+        for titulo in cabecalhos:
+            celula = WriteOnlyCell(planilha, value=titulo)
+            celula.font = Font(bold=True)
+            cabecalho.append(celula)
+        planilha.append(cabecalho)
+
+        for linha in linhas:
+            planilha.append(list(linha))
+            total += 1
+
+    livro.save(destino)
+    return total
+
+def _valor_csv(valor):
+    """Números decimais com vírgula, coerente com o separador ';'"""
+    if isinstance(valor, (Decimal, float)):
+        return str(valor).replace('.', ',')
+    return valor
+
+def _escrever_csv(cabecalhos: List[str], linhas: Iterable[Iterable[Any]], destino) -> int:
+    """Escreve um CSV (UTF-8 com BOM e ';', como o Excel em português espera)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=';')
+    destino.write('\ufeff'.encode('utf-8'))
+    escritor.writerow(cabecalhos)
+    total = 0
+
+    for linha in linhas:
+        escritor.writerow([_valor_csv(valor) for valor in linha])
+        total += 1
+        if total % LINHAS_POR_ESCRITA == 0:
+            destino.write(buffer.getvalue().encode('utf-8'))
+            buffer.seek(0)
+            buffer.truncate()
+
+    destino.write(buffer.getvalue().encode('utf-8'))
+    return total
+
+def gerar_planilha(abas: List[Aba], formato: str = FORMATO_XLSX) -> Dict[str, Any]:
+    """
+    Escreve as abas em um arquivo temporário.
+
+    Args:
+        abas: Lista de (nome, cabeçalhos, linhas); as linhas podem ser geradores
+        formato: FORMATO_XLSX ou FORMATO_CSV
+
+    Returns:
+        dict: 'arquivo' (posicionado no início; o chamador deve fechá-lo),
+              'mimetype', 'extensao' e 'linhas' (total escrito)
+
+    Raises:
+        ValueError: Se o formato não for suportado
+    """
+    formato = formato_disponivel(formato)
+    arquivo = SpooledTemporaryFile(max_size=TAMANHO_MEMORIA)
+
+    try:
+        if formato == FORMATO_XLSX:
+            total = _escrever_xlsx(abas, arquivo)
+            extensao = FORMATO_XLSX
+        elif len(abas) == 1:
+            _, cabecalhos, linhas = abas[0]
+            total = _escrever_csv(cabecalhos, linhas, arquivo)
+            extensao = FORMATO_CSV
+        else:
+            total = 0
+            with zipfile.ZipFile(arquivo, 'w', zipfile.ZIP_DEFLATED) as pacote:
+                for nome, cabecalhos, linhas in abas:
+                    with pacote.open(f"{nome}.csv", 'w', force_zip64=True) as destino:
+                        total += _escrever_csv(cabecalhos, linhas, destino)
+            extensao = 'zip'
+    except Exception:
+        arquivo.close()
+        raise
+
+    arquivo.seek(0)
+    logger.info(f"Planilha {extensao} gerada: {total} linhas em {len(abas)} aba(s)")
+    return {
+        'arquivo': arquivo,
+        'mimetype': MIMETYPES[extensao],
+        'extensao': extensao,
+        'linhas': total
+    }
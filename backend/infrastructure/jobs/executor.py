@@ -0,0 +1,242 @@
+"""
+Execução de jobs em segundo plano dentro do processo da aplicação.
+Operações pesadas (exportações, relatórios, importações em lote) são
+enfileiradas em um pool de threads limitado em vez de ocupar o worker da
+requisição. O estado de cada job fica na tabela jobs e o resultado em um
+arquivo no diretório de resultados, para download posterior.
+
+Variáveis de ambiente:
+    JOBS_WORKERS: threads executando jobs por processo (padrão 2)
+    JOBS_MAX_PENDENTES: jobs aguardando ou em execução por processo (padrão 20)
+    JOBS_DIR: diretório dos arquivos de resultado (padrão: temporário do sistema)
+    JOBS_RETENCAO_HORAS: horas até o resultado ser apagado (padrão 24)
+"""
+
+import os
+import time
+import uuid
+import socket
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from backend.infrastructure.db.unit_of_work import executar_apos_commit
+from backend.infrastructure.repositories.job_repository import JobRepository
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+MAX_PENDENTES = int(os.getenv("JOBS_MAX_PENDENTES", "20"))
+DIRETORIO_RESULTADOS = os.getenv("JOBS_DIR", os.path.join(tempfile.gettempdir(), "catalogo_vortex_jobs"))
+RETENCAO = timedelta(hours=float(os.getenv("JOBS_RETENCAO_HORAS", "24")))
+
+# Intervalo mínimo entre gravações de progresso de um job (segundos)
+INTERVALO_PROGRESSO = 1.0
+# Intervalo mínimo entre limpezas de resultados expirados (segundos)
+INTERVALO_LIMPEZA = 3600
+
+_HOST = socket.gethostname()[:100]
+
+
+class FilaJobsCheia(Exception):
+    """Exceção para quando o processo já tem o máximo de jobs pendentes"""
+    pass
+
+
+class TipoJobDesconhecido(ValueError):
+    """Exceção para tipos de job não registrados"""
+    pass
+
+
+class ContextoJob:
+    """
+    Recebido pela função do job para informar o progresso e criar o
+    arquivo de resultado.
+    """
+
+    def __init__(self, job_id, repositorio):
+        self.job_id = job_id
+        self._repositorio = repositorio
+        self._ultimo_progresso = 0.0
+
+    def progresso(self, percentual, mensagem=None):
+        """
+        Informa o andamento do job (0 a 100). Gravações muito próximas
+        são descartadas para não transformar o progresso em carga no banco.
+        """
+        agora = time.monotonic()
+        if agora - self._ultimo_progresso < INTERVALO_PROGRESSO:
+            return
+        self._ultimo_progresso = agora
+        try:
+            self._repositorio.atualizar_progresso(self.job_id, percentual, mensagem)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar progresso do job {self.job_id}: {str(e)}")
+
+    def caminho_resultado(self, extensao):
+        """Retorna o caminho do arquivo de resultado do job"""
+        os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+        return os.path.join(DIRETORIO_RESULTADOS, f"{self.job_id}.{extensao}")
+
+
+_tipos = {}
+_lock = threading.Lock()
+_executor = None
+_ativos = 0
+_proxima_limpeza = 0.0
+
+
+def registrar_tipo(tipo, funcao):
+    """
+    Registra a função que executa um tipo de job.
+
+    Args:
+        tipo (str): Nome do tipo (ex: 'exportar_estoque')
+        funcao: Callable (parametros, contexto) -> dict com 'arquivo' (caminho
+            criado com contexto.caminho_resultado), 'nome' (nome do download),
+            'mimetype' e, opcionalmente, 'mensagem'
+    """
+    _tipos[tipo] = funcao
+
+def identificador_processo():
+    """Identificação do processo atual gravada nos jobs (host:pid)"""
+    return f"{_HOST}:{os.getpid()}"
+
+def _obter_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="job")
+        return _executor
+
+def enfileirar(tipo, parametros, usuario_id=None):
+    """
+    Registra um job e agenda sua execução em segundo plano.
+    Dentro de uma unidade de trabalho, a execução só começa após o commit
+    (o job precisa estar gravado antes de a thread atualizá-lo).
+
+    Args:
+        tipo (str): Tipo registrado com registrar_tipo
+        parametros (dict): Parâmetros serializáveis em JSON
+        usuario_id (int, optional): Usuário dono do job
+
+    Returns:
+        str: ID do job
+
+    Raises:
+        TipoJobDesconhecido: Se o tipo não estiver registrado
+        FilaJobsCheia: Se o processo já tiver MAX_PENDENTES jobs submetidos e não concluídos
+    """
+    if tipo not in _tipos:
+        raise TipoJobDesconhecido(f"Tipo de job '{tipo}' desconhecido. Tipos disponíveis: {', '.join(sorted(_tipos))}")
+
+    global _ativos
+
+    # A vaga é reservada junto com a verificação do limite, para requisições
+    # concorrentes não passarem todas antes de alguma ser contada
+    with _lock:
+        if _ativos >= MAX_PENDENTES:
+            raise FilaJobsCheia(f"Limite de {MAX_PENDENTES} jobs em andamento atingido; tente mais tarde")
+        _ativos += 1
+
+    job_id = uuid.uuid4().hex
+    try:
+        JobRepository().criar(job_id, tipo, parametros, usuario_id, identificador_processo())
+    except Exception:
+        _liberar_vaga()
+        raise
+
+    # Se a transação for desfeita, o job não é submetido e a vaga é liberada
+    executar_apos_commit(lambda: _submeter(job_id, tipo, parametros), ao_descartar=_liberar_vaga)
+    logger.info(f"Job {job_id} ({tipo}) enfileirado")
+    _limpar_expirados_se_necessario()
+    return job_id
+
+def _liberar_vaga():
+    global _ativos
+    with _lock:
+        _ativos -= 1
+
+def _submeter(job_id, tipo, parametros):
+    """Entrega o job ao pool de threads (após o commit), na vaga já reservada"""
+    try:
+        _obter_executor().submit(_executar, job_id, tipo, parametros)
+    except Exception:
+        _liberar_vaga()
+        raise
+
+def _executar(job_id, tipo, parametros):
+    """Executa um job na thread do pool, registrando início, fim e erro"""
+    repositorio = JobRepository()
+    inicio = time.perf_counter()
+    try:
+        repositorio.marcar_executando(job_id)
+        resultado = _tipos[tipo](parametros, ContextoJob(job_id, repositorio))
+        repositorio.concluir(job_id, resultado['arquivo'], resultado['nome'],
+                             resultado['mimetype'], resultado.get('mensagem'))
+        logger.info(f"Job {job_id} ({tipo}) concluído em {time.perf_counter() - inicio:.1f}s")
+    except Exception as e:
+        logger.error(f"Job {job_id} ({tipo}) falhou: {str(e)}")
+        try:
+            repositorio.falhar(job_id, str(e))
+        except Exception as erro_registro:
+            logger.error(f"Erro ao registrar falha do job {job_id}: {str(erro_registro)}")
+    finally:
+        _liberar_vaga()
+
+def _processo_existe(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def recuperar_interrompidos():
+    """
+    Marca como erro os jobs ativos de processos deste host que já terminaram
+    (ex: worker reiniciado no meio de um job). Chamado na inicialização.
+    """
+    repositorio = JobRepository()
+    try:
+        mortos = []
+        for processo in repositorio.listar_processos_ativos(_HOST):
+            pid = processo.rsplit(':', 1)[1]
+            if pid.isdigit() and int(pid) != os.getpid() and not _processo_existe(int(pid)):
+                mortos.append(processo)
+        total = repositorio.falhar_interrompidos(mortos)
+        if total:
+            logger.warning(f"{total} job(s) interrompido(s) marcados como erro")
+    except Exception as e:
+        logger.warning(f"Erro ao verificar jobs interrompidos: {str(e)}")
+
+def _limpar_expirados_se_necessario():
+    """Apaga os arquivos de resultado mais antigos que a retenção (no máximo uma vez por hora)"""
+    global _proxima_limpeza
+
+    agora = time.monotonic()
+    with _lock:
+        if agora < _proxima_limpeza:
+            return
+        _proxima_limpeza = agora + INTERVALO_LIMPEZA
+
+    repositorio = JobRepository()
+    try:
+        for job in repositorio.listar_expirados(datetime.now() - RETENCAO):
+            try:
+                if job['arquivo_resultado'] and os.path.exists(job['arquivo_resultado']):
+                    os.remove(job['arquivo_resultado'])
+                repositorio.remover_resultado(job['id'])
+            except OSError as e:
+                logger.warning(f"Erro ao remover resultado do job {job['id']}: {str(e)}")
+    except Exception as e:
+        logger.warning(f"Erro ao limpar resultados de jobs expirados: {str(e)}")
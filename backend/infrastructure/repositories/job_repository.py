@@ -0,0 +1,161 @@
+"""
+Repositório para a tabela de jobs em segundo plano.
+As escritas de andamento (status, progresso) são feitas fora de qualquer
+unidade de trabalho, em transações curtas próprias, para ficarem visíveis
+imediatamente para as requisições que acompanham o job.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from backend.infrastructure.db.db_manager import execute_query
+from backend.infrastructure.db.connection_pool import get_connection_pool
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Status possíveis de um job
+STATUS_PENDENTE = "pendente"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+
+def _executar_isolado(query, params):
+    """
+    Executa e confirma uma escrita em conexão própria do pool, mesmo se
+    chamada dentro de uma unidade de trabalho (ex: progresso informado
+    pelo código do job no meio da sua transação).
+    """
+    conn = get_connection_pool().get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        conn.commit()
+        return cursor.rowcount
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class JobRepository:
+    """
+    Repositório para operações com jobs em segundo plano.
+    """
+
+    def criar(self, job_id: str, tipo: str, parametros: Dict[str, Any],
+              usuario_id: Optional[int], processo: str) -> None:
+        """
+        Registra um job pendente.
+
+        Args:
+            job_id: Identificador do job
+            tipo: Tipo do job (ver executor.registrar_tipo)
+            parametros: Parâmetros do job (serializados em JSON)
+            usuario_id: Usuário que criou o job
+            processo: Processo que vai executar o job (host:pid)
+        """
+        try:
+            execute_query("""
+                INSERT INTO jobs (id, tipo, status, progresso, parametros, usuario_id, processo, criado_em)
+                VALUES (%s, %s, %s, 0, %s, %s, %s, %s)
+            """, (job_id, tipo, STATUS_PENDENTE, json.dumps(parametros, default=str),
+                  usuario_id, processo, datetime.now()))
+        except Exception as e:
+            logger.error(f"Erro ao criar job {tipo}: {str(e)}")
+            raise Exception(f"Erro ao criar job: {str(e)}")
+
+    def obter_por_id(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Busca um job pelo ID (None se não existir)"""
+        try:
+            resultado = execute_query("SELECT * FROM jobs WHERE id = %s", (job_id,), fetch=True, commit=False)
+            return resultado[0] if resultado else None
+        except Exception as e:
+            logger.error(f"Erro ao obter job {job_id}: {str(e)}")
+            raise Exception(f"Erro ao obter job: {str(e)}")
+
+    def listar_por_usuario(self, usuario_id: int, limite: int = 50) -> List[Dict[str, Any]]:
+        """Lista os jobs mais recentes de um usuário"""
+        try:
+            return execute_query("""
+                SELECT * FROM jobs
+                WHERE usuario_id = %s
+                ORDER BY criado_em DESC
+                LIMIT %s
+            """, (usuario_id, limite), fetch=True, commit=False)
+        except Exception as e:
+            logger.error(f"Erro ao listar jobs do usuário {usuario_id}: {str(e)}")
+            raise Exception(f"Erro ao listar jobs: {str(e)}")
+
+    def marcar_executando(self, job_id: str) -> None:
+        """Marca o início da execução"""
+        _executar_isolado("""
+            UPDATE jobs SET status = %s, iniciado_em = %s
+            WHERE id = %s
+        """, (STATUS_EXECUTANDO, datetime.now(), job_id))
+
+    def atualizar_progresso(self, job_id: str, progresso: int, mensagem: Optional[str] = None) -> None:
+        """Atualiza o progresso (0 a 100) e a mensagem de andamento"""
+        _executar_isolado("""
+            UPDATE jobs SET progresso = %s, mensagem = COALESCE(%s, mensagem)
+            WHERE id = %s AND status = %s
+        """, (max(0, min(int(progresso), 100)), mensagem, job_id, STATUS_EXECUTANDO))
+
+    def concluir(self, job_id: str, arquivo: str, nome: str, mimetype: str,
+                 mensagem: Optional[str] = None) -> None:
+        """Marca o job como concluído, com o arquivo de resultado"""
+        _executar_isolado("""
+            UPDATE jobs SET status = %s, progresso = 100, mensagem = %s, arquivo_resultado = %s,
+                            nome_resultado = %s, mimetype_resultado = %s, concluido_em = %s
+            WHERE id = %s
+        """, (STATUS_CONCLUIDO, mensagem, arquivo, nome, mimetype, datetime.now(), job_id))
+
+    def falhar(self, job_id: str, mensagem: str) -> None:
+        """Marca o job como terminado com erro"""
+        _executar_isolado("""
+            UPDATE jobs SET status = %s, mensagem = %s, concluido_em = %s
+            WHERE id = %s
+        """, (STATUS_ERRO, mensagem[:2000], datetime.now(), job_id))
+
+    def falhar_interrompidos(self, processos: List[str]) -> int:
+        """
+        Marca como erro os jobs ativos de processos que não existem mais.
+
+        Returns:
+            int: Quantidade de jobs marcados
+        """
+        if not processos:
+            return 0
+        marcadores = ', '.join(['%s'] * len(processos))
+        return _executar_isolado(f"""
+            UPDATE jobs SET status = %s, mensagem = %s, concluido_em = %s
+            WHERE processo IN ({marcadores}) AND status IN (%s, %s)
+        """, (STATUS_ERRO, "Job interrompido: o processo que o executava foi encerrado", datetime.now(),
+              *processos, STATUS_PENDENTE, STATUS_EXECUTANDO))
+
+    def listar_processos_ativos(self, prefixo_host: str) -> List[str]:
+        """Lista os processos deste host com jobs pendentes ou em execução"""
+        resultado = execute_query("""
+            SELECT DISTINCT processo FROM jobs
+            WHERE processo LIKE %s AND status IN (%s, %s)
+        """, (f"{prefixo_host}:%", STATUS_PENDENTE, STATUS_EXECUTANDO), fetch=True, commit=False)
+        return [linha['processo'] for linha in resultado]
+
+    def listar_expirados(self, limite: datetime) -> List[Dict[str, Any]]:
+        """Lista os jobs terminados antes do limite que ainda têm arquivo de resultado"""
+        return execute_query("""
+            SELECT id, arquivo_resultado FROM jobs
+            WHERE concluido_em < %s AND arquivo_resultado IS NOT NULL
+        """, (limite,), fetch=True, commit=False)
+
+    def remover_resultado(self, job_id: str) -> None:
+        """Registra que o arquivo de resultado foi removido"""
+        _executar_isolado("""
+            UPDATE jobs SET arquivo_resultado = NULL, mensagem = %s
+            WHERE id = %s
+        """, ("Resultado expirado", job_id))
@@ -4,11 +4,13 @@ Segue o padrão Repository do DDD.
 """
 
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from datetime import datetime
 
 from backend.domain.models.movimentacao import Movimentacao, TipoMovimentacao
-from backend.infrastructure.db.db_manager import execute_query
+from backend.infrastructure.db.db_manager import (execute_query, execute_many, stream_query, get_db_connection,
+                                                  buscar_alteracoes)
+from backend.infrastructure.cache.versoes import invalidar, CATALOGO_PRODUTOS, MOVIMENTACOES
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -25,6 +27,18 @@ class MovimentacaoRepository:
         Cria uma nova movimentação no banco de dados.
         Retorna a movimentação com o ID atribuído.
         """
+        self.criar_em_lote([movimentacao])
+        logger.info(f"Movimentação criada com ID: {movimentacao.id}")
+        return movimentacao
+
+    def criar_em_lote(self, movimentacoes: List[Movimentacao]) -> List[Movimentacao]:
+        """
+        Cria várias movimentações com INSERTs de várias linhas.
+        Retorna as movimentações com os IDs atribuídos.
+        """
+        if not movimentacoes:
+            return []
+
         try:
             query = """
                 INSERT INTO movimentacoes (
@@ -32,7 +46,78 @@ class MovimentacaoRepository:
                     data, observacao, estoque_anterior, estoque_atual
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """
-            params = (
+            params = [
+                (
+                    movimentacao.produto_id,
+                    movimentacao.tipo.value,
+                    movimentacao.quantidade,
+                    movimentacao.preco_unitario,
+                    movimentacao.data,
+                    movimentacao.observacao,
+                    movimentacao.estoque_anterior,
+                    movimentacao.estoque_atual
+                )
+                for movimentacao in movimentacoes
+            ]
+
+            ids = execute_many(query, params, return_ids=True)
+            invalidar(MOVIMENTACOES)
+
+            # Atribuir IDs às movimentações
+            for movimentacao, movimentacao_id in zip(movimentacoes, ids):
+                movimentacao.id = movimentacao_id
+
+            logger.info(f"Movimentações criadas em lote: {len(movimentacoes)}")
+            return movimentacoes
+
+        except Exception as e:
+            logger.error(f"Erro ao criar movimentações em lote: {str(e)}")
+            raise Exception(f"Erro ao criar movimentações em lote: {str(e)}")
+
+    def registrar_com_ajuste(self, movimentacao: Movimentacao) -> Optional[Movimentacao]:
+        """
+        Ajusta o estoque do produto e grava a movimentação na mesma transação.
+        O UPDATE só é aplicado se o produto estiver ativo e o estoque não ficar
+        negativo, então duas saídas simultâneas nunca passam juntas pela
+        verificação. O novo estoque volta do próprio UPDATE (LAST_INSERT_ID),
+        sem leitura prévia do produto.
+
+        Args:
+            movimentacao: Movimentação sem estoque_anterior/estoque_atual
+
+        Returns:
+            Optional[Movimentacao]: Movimentação com ID e estoques preenchidos,
+            ou None se o produto não existir, estiver excluído ou faltar estoque
+        """
+        delta = movimentacao.quantidade if movimentacao.tipo == TipoMovimentacao.ENTRADA else -movimentacao.quantidade
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                UPDATE produtos
+                SET quantidade_estoque = LAST_INSERT_ID(quantidade_estoque + %s)
+                WHERE id = %s AND (deletado = 0 OR deletado IS NULL)
+                  AND quantidade_estoque + %s >= 0
+            """, (delta, movimentacao.produto_id, delta))
+
+            # Nada foi alterado: não há o que desfazer (e um rollback aqui
+            # desfaria toda a unidade de trabalho da requisição)
+            if cursor.rowcount == 0:
+                return None
+
+            # O UPDATE devolve o valor de LAST_INSERT_ID(expr) no lugar do último ID
+            estoque_atual = cursor.lastrowid or 0
+            movimentacao.estoque_anterior = estoque_atual - delta
+            movimentacao.estoque_atual = estoque_atual
+
+            cursor.execute("""
+                INSERT INTO movimentacoes (
+                    produto_id, tipo, quantidade, preco_unitario, 
+                    data, observacao, estoque_anterior, estoque_atual
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
                 movimentacao.produto_id,
                 movimentacao.tipo.value,
                 movimentacao.quantidade,
@@ -41,18 +126,23 @@ class MovimentacaoRepository:
                 movimentacao.observacao,
                 movimentacao.estoque_anterior,
                 movimentacao.estoque_atual
-            )
-
-            movimentacao_id = execute_query(query, params)
+            ))
+            movimentacao.id = cursor.lastrowid
 
-            # Atribuir ID à movimentação
-            movimentacao.id = movimentacao_id
-            logger.info(f"Movimentação criada com ID: {movimentacao_id}")
+            conn.commit()
+            invalidar(CATALOGO_PRODUTOS, MOVIMENTACOES)
+            logger.info(f"Movimentação {movimentacao.id} registrada: produto {movimentacao.produto_id} "
+                        f"{movimentacao.estoque_anterior} -> {movimentacao.estoque_atual}")
             return movimentacao
 
         except Exception as e:
-            logger.error(f"Erro ao criar movimentação: {str(e)}")
-            raise Exception(f"Erro ao criar movimentação: {str(e)}")
+            conn.rollback()
+            logger.error(f"Erro ao registrar movimentação com ajuste de estoque: {str(e)}")
+            raise Exception(f"Erro ao registrar movimentação: {str(e)}")
+
+        finally:
+            cursor.close()
+            conn.close()
 
     def obter_por_id(self, id: int) -> Optional[Movimentacao]:
         """
@@ -137,4 +227,75 @@ class MovimentacaoRepository:
 
         except Exception as e:
             logger.error(f"Erro ao listar movimentações do produto {produto_id}: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def listar_alteracoes(self, cursor: Optional[str] = None, limite: int = 500) -> Dict[str, Any]:
+        """
+        Lista as movimentações registradas depois do cursor (mesmo formato de listar_todos).
+        Retorna um dicionário com 'movimentacoes', 'cursor' e 'tem_mais'.
+        """
+        try:
+            resultado = buscar_alteracoes("""
+                SELECT m.*, p.nome as produto_nome 
+                FROM movimentacoes m
+                JOIN produtos p ON m.produto_id = p.id
+            """, "m", cursor, limite)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao listar alterações de movimentações: {str(e)}")
+            raise Exception(f"Erro ao listar alterações de movimentações: {str(e)}")
+
+        resultado['movimentacoes'] = resultado.pop('linhas')
+        return resultado
+
+    def iterar_todos(self, tamanho_lote: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre todas as movimentações (mesmo formato de listar_todos) sem
+        carregá-las de uma vez: as linhas são lidas do banco em lotes.
+        """
+        query = """
+            SELECT m.*, p.nome as produto_nome 
+            FROM movimentacoes m
+            JOIN produtos p ON m.produto_id = p.id
+            ORDER BY m.data DESC
+        """
+        return stream_query(query, chunk_size=tamanho_lote)
+
+    def iterar_por_periodo(self, data_inicial: Optional[datetime] = None, data_final: Optional[datetime] = None,
+                           tamanho_lote: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre as movimentações de um período em ordem cronológica, lidas em lotes
+        (mesmo formato de listar_todos). Datas não informadas não limitam o período.
+        """
+        condicoes = []
+        params = []
+        if data_inicial:
+            condicoes.append("m.data >= %s")
+            params.append(data_inicial)
+        if data_final:
+            condicoes.append("m.data < %s")
+            params.append(data_final)
+
+        query = """
+            SELECT m.*, p.nome as produto_nome 
+            FROM movimentacoes m
+            JOIN produtos p ON m.produto_id = p.id
+        """
+        if condicoes:
+            query += " WHERE " + " AND ".join(condicoes)
+        query += " ORDER BY m.data, m.id"
+        return stream_query(query, tuple(params), chunk_size=tamanho_lote)
+
+    def iterar_por_produto(self, produto_id: int, tamanho_lote: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre as movimentações de um produto em lotes (mesmo formato de listar_por_produto).
+        """
+        query = """
+            SELECT m.*, p.nome as produto_nome 
+            FROM movimentacoes m
+            JOIN produtos p ON m.produto_id = p.id
+            WHERE m.produto_id = %s
+            ORDER BY m.data DESC
+        """
+        return stream_query(query, (produto_id,), chunk_size=tamanho_lote)
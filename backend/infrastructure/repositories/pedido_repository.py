@@ -1,21 +1,51 @@
 # backend/infrastructure/repositories/pedido_repository.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 import logging
+import json
+import base64
 from datetime import datetime
+from decimal import Decimal
 
 from backend.domain.models.pedido import Pedido, ItemPedido, StatusPedido
 from backend.domain.models.cliente import Cliente
 from backend.infrastructure.db.config_db import get_db_connection
+from backend.infrastructure.db.db_manager import execute_query, execute_many_on_cursor, buscar_alteracoes
+from backend.infrastructure.repositories.relatorio_repository import RelatorioRepository
+from backend.infrastructure.cache.versoes import invalidar, PEDIDOS
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
+# Máximo de pedidos por query de carregamento de itens
+LOTE_ITENS = 1000
+
+# Ordenações aceitas na busca: (coluna indexada de pedidos, direção)
+ORDENACOES_PEDIDOS = {
+    'data_recente': ('data_criacao', 'DESC'),
+    'data_antiga': ('data_criacao', 'ASC'),
+    'valor_alto': ('valor_total', 'DESC'),
+    'valor_baixo': ('valor_total', 'ASC')
+}
+
+# Status gravados pelo esquema antigo da tabela pedidos
+STATUS_LEGADOS = {
+    'Pendente': StatusPedido.ENVIADO,
+    'Concluído': StatusPedido.ENTREGUE
+}
+
+def status_gravados(status: str) -> List[str]:
+    """Valores gravados no banco que correspondem ao status informado (inclui os legados)"""
+    return [status] + [legado for legado, atual in STATUS_LEGADOS.items() if atual.value == status]
+
 
 class PedidoRepository:
     """
     Repositório para operações com pedidos no banco de dados.
     """
 
+    def __init__(self):
+        self.relatorio_repository = RelatorioRepository()
+
     def criar(self, pedido: Pedido) -> Pedido:
         """
         Cria um novo pedido no banco de dados.
@@ -24,8 +54,7 @@ class PedidoRepository:
         cursor = conn.cursor()
 
         try:
-            # Iniciar transação
-            conn.begin()
+            # Transação implícita (autocommit desativado no pool)
 
             # Inserir pedido
             endereco_str = str(pedido.cliente.endereco) if isinstance(pedido.cliente.endereco,
@@ -34,8 +63,9 @@ class PedidoRepository:
             cursor.execute("""
                 INSERT INTO pedidos (
                     cliente_nome, cliente_telefone, cliente_email, cliente_endereco, 
-                    status, data_pedido, data_criacao
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    status, data_pedido, data_criacao, distribuidor_id,
+                    observacoes_cliente, estoque_reservado
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (
                 pedido.cliente.nome,
                 pedido.cliente.telefone,
@@ -43,7 +73,10 @@ class PedidoRepository:
                 endereco_str,
                 pedido.status.value,
                 pedido.data_criacao.strftime('%d/%m/%Y %H:%M:%S'),
-                pedido.data_criacao
+                pedido.data_criacao,
+                pedido.distribuidor_id,
+                pedido.observacoes_cliente,
+                pedido.estoque_reservado
             ))
 
             # Obter ID do pedido inserido
@@ -51,24 +84,15 @@ class PedidoRepository:
             pedido.id = pedido_id
 
             # Inserir itens do pedido
-            for item in pedido.itens:
-                cursor.execute("""
-                    INSERT INTO itens_pedido (
-                        pedido_id, produto_id, quantidade, preco_unitario
-                    ) VALUES (%s, %s, %s, %s)
-                """, (
-                    pedido_id,
-                    item.produto_id,
-                    item.quantidade,
-                    item.preco_unitario
-                ))
-
-                # Atribuir ID do item
-                item.id = cursor.lastrowid
-                item.pedido_id = pedido_id
+            self._inserir_itens(cursor, pedido_id, pedido.itens)
+            self._atualizar_valor_total(cursor, pedido_id)
+
+            # Tabelas agregadas dos relatórios, na mesma transação
+            self.relatorio_repository.adicionar_pedido(cursor, pedido_id)
 
             # Commit da transação
             conn.commit()
+            invalidar(PEDIDOS)
             logger.info(f"Pedido {pedido_id} criado com sucesso")
 
             return pedido
@@ -83,6 +107,39 @@ class PedidoRepository:
             cursor.close()
             conn.close()
 
+    def _inserir_itens(self, cursor, pedido_id: int, itens: List[ItemPedido]) -> None:
+        """
+        Insere os itens de um pedido com um único INSERT de várias linhas
+        e atribui os IDs gerados, independente do número de itens.
+        """
+        if not itens:
+            return
+
+        execute_many_on_cursor(cursor, """
+            INSERT INTO itens_pedido (
+                pedido_id, produto_id, quantidade, preco_unitario
+            ) VALUES (%s, %s, %s, %s)
+        """, [
+            (pedido_id, item.produto_id, item.quantidade, item.preco_unitario)
+            for item in itens
+        ])
+
+        # Os IDs são crescentes na ordem de inserção dentro do pedido
+        cursor.execute("SELECT id FROM itens_pedido WHERE pedido_id = %s ORDER BY id", (pedido_id,))
+        for item, (item_id,) in zip(itens, cursor.fetchall()):
+            item.id = item_id
+            item.pedido_id = pedido_id
+
+    def _atualizar_valor_total(self, cursor, pedido_id: int) -> None:
+        """Recalcula pedidos.valor_total (usado na ordenação por valor) a partir dos itens gravados"""
+        cursor.execute("""
+            UPDATE pedidos SET valor_total = (
+                SELECT COALESCE(SUM(quantidade * preco_unitario), 0)
+                FROM itens_pedido WHERE pedido_id = %s
+            )
+            WHERE id = %s
+        """, (pedido_id, pedido_id))
+
     def atualizar(self, pedido: Pedido) -> Pedido:
         """
         Atualiza um pedido existente.
@@ -91,8 +148,10 @@ class PedidoRepository:
         cursor = conn.cursor()
 
         try:
-            # Iniciar transação
-            conn.begin()
+            # Transação implícita (autocommit desativado no pool)
+
+            # Retirar a contribuição atual do pedido das tabelas agregadas
+            self.relatorio_repository.remover_pedido(cursor, pedido.id)
 
             # Atualizar pedido
             endereco_str = str(pedido.cliente.endereco) if isinstance(pedido.cliente.endereco,
@@ -104,7 +163,12 @@ class PedidoRepository:
                     cliente_telefone = %s,
                     cliente_email = %s,
                     cliente_endereco = %s,
-                    status = %s
+                    status = %s,
+                    distribuidor_id = %s,
+                    data_atualizacao = %s,
+                    observacoes_cliente = %s,
+                    observacoes_distribuidor = %s,
+                    estoque_reservado = %s
                 WHERE id = %s
             """, (
                 pedido.cliente.nome,
@@ -112,6 +176,11 @@ class PedidoRepository:
                 pedido.cliente.email,
                 endereco_str,
                 pedido.status.value,
+                pedido.distribuidor_id,
+                pedido.data_atualizacao,
+                pedido.observacoes_cliente,
+                pedido.observacoes_distribuidor,
+                pedido.estoque_reservado,
                 pedido.id
             ))
 
@@ -124,23 +193,13 @@ class PedidoRepository:
             cursor.execute("DELETE FROM itens_pedido WHERE pedido_id = %s", (pedido.id,))
 
             # Inserir itens atualizados
-            for item in pedido.itens:
-                cursor.execute("""
-                    INSERT INTO itens_pedido (
-                        pedido_id, produto_id, quantidade, preco_unitario
-                    ) VALUES (%s, %s, %s, %s)
-                """, (
-                    pedido.id,
-                    item.produto_id,
-                    item.quantidade,
-                    item.preco_unitario
-                ))
-
-                # Atualizar ID do item
-                item.id = cursor.lastrowid
+            self._inserir_itens(cursor, pedido.id, pedido.itens)
+            self._atualizar_valor_total(cursor, pedido.id)
+            self.relatorio_repository.adicionar_pedido(cursor, pedido.id)
 
             # Commit da transação
             conn.commit()
+            invalidar(PEDIDOS)
             logger.info(f"Pedido {pedido.id} atualizado com sucesso")
 
             return pedido
@@ -158,85 +217,21 @@ class PedidoRepository:
     def obter_por_id(self, pedido_id: int) -> Optional[Pedido]:
         """
         Obtém um pedido pelo ID.
+        Usa o mesmo carregamento de itens da listagem.
         """
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
         try:
             # Buscar dados do pedido
-            cursor.execute("""
+            result = execute_query("""
                 SELECT * FROM pedidos
                 WHERE id = %s AND deletado = 0
-            """, (pedido_id,))
+            """, (pedido_id,), fetch=True, commit=False)
 
-            pedido_data = cursor.fetchone()
-            if not pedido_data:
+            if not result:
                 logger.info(f"Pedido {pedido_id} não encontrado")
                 return None
 
-            # Criar objeto Cliente
-            cliente = Cliente(
-                nome=pedido_data['cliente_nome'],
-                telefone=pedido_data['cliente_telefone'],
-                email=pedido_data['cliente_email'],
-                endereco=pedido_data['cliente_endereco']
-            )
-
-            # Buscar itens do pedido
-            cursor.execute("""
-                SELECT ip.*, p.nome
-                FROM itens_pedido ip
-                LEFT JOIN produtos p ON ip.produto_id = p.id
-                WHERE ip.pedido_id = %s
-            """, (pedido_id,))
-
-            itens_data = cursor.fetchall()
-            itens = []
-
-            for item_data in itens_data:
-                item = ItemPedido(
-                    id=item_data['id'],
-                    pedido_id=item_data['pedido_id'],
-                    produto_id=item_data['produto_id'],
-                    quantidade=item_data['quantidade'],
-                    preco_unitario=item_data['preco_unitario'],
-                    nome=item_data['nome']
-                )
-                itens.append(item)
-
-            # Converter status de string para enum
-            try:
-                status = StatusPedido(pedido_data['status'])
-            except ValueError:
-                # Fallback para Pendente se o status não for reconhecido
-                logger.warning(f"Status não reconhecido: {pedido_data['status']}. Usando 'Pendente'")
-                status = StatusPedido.PENDENTE
-
-            # Converter data de string para datetime
-            try:
-                if isinstance(pedido_data['data_pedido'], str):
-                    data_parts = pedido_data['data_pedido'].split(' ')
-                    data_str = data_parts[0]
-                    hora_str = data_parts[1] if len(data_parts) > 1 else "00:00:00"
-
-                    dia, mes, ano = map(int, data_str.split('/'))
-                    hora, minuto, segundo = map(int, hora_str.split(':'))
-
-                    data_criacao = datetime(ano, mes, dia, hora, minuto, segundo)
-                else:
-                    data_criacao = pedido_data['data_criacao']
-            except (ValueError, IndexError):
-                logger.warning(f"Erro ao converter data: {pedido_data['data_pedido']}. Usando data atual.")
-                data_criacao = datetime.now()
-
-            # Criar objeto Pedido
-            pedido = Pedido(
-                id=pedido_data['id'],
-                cliente=cliente,
-                itens=itens,
-                status=status,
-                data_criacao=data_criacao
-            )
+            itens_por_pedido = self._carregar_itens([pedido_id])
+            pedido = self._montar_pedido(result[0], itens_por_pedido.get(pedido_id, []))
 
             logger.info(f"Pedido {pedido_id} obtido com sucesso")
             return pedido
@@ -245,96 +240,25 @@ class PedidoRepository:
             logger.error(f"Erro ao obter pedido {pedido_id}: {str(e)}")
             raise
 
-        finally:
-            cursor.close()
-            conn.close()
-
     def listar_todos(self) -> List[Pedido]:
         """
         Lista todos os pedidos ativos.
+        Os itens são carregados em lote (uma query a cada LOTE_ITENS pedidos)
+        em vez de uma query por pedido.
         """
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
         try:
             # Buscar todos os pedidos
-            cursor.execute("""
+            pedidos_data = execute_query("""
                 SELECT * FROM pedidos
                 WHERE deletado = 0
                 ORDER BY data_criacao DESC
-            """)
+            """, fetch=True, commit=False)
 
-            pedidos_data = cursor.fetchall()
-            pedidos = []
-
-            for pedido_data in pedidos_data:
-                pedido_id = pedido_data['id']
-
-                # Criar objeto Cliente
-                cliente = Cliente(
-                    nome=pedido_data['cliente_nome'],
-                    telefone=pedido_data['cliente_telefone'],
-                    email=pedido_data['cliente_email'],
-                    endereco=pedido_data['cliente_endereco']
-                )
-
-                # Buscar itens do pedido
-                cursor.execute("""
-                    SELECT ip.*, p.nome
-                    FROM itens_pedido ip
-                    LEFT JOIN produtos p ON ip.produto_id = p.id
-                    WHERE ip.pedido_id = %s
-                """, (pedido_id,))
-
-                itens_data = cursor.fetchall()
-                itens = []
-
-                for item_data in itens_data:
-                    item = ItemPedido(
-                        id=item_data['id'],
-                        pedido_id=item_data['pedido_id'],
-                        produto_id=item_data['produto_id'],
-                        quantidade=item_data['quantidade'],
-                        preco_unitario=item_data['preco_unitario'],
-                        nome=item_data['nome']
-                    )
-                    itens.append(item)
-
-                # Converter status de string para enum
-                try:
-                    status = StatusPedido(pedido_data['status'])
-                except ValueError:
-                    # Fallback para Pendente se o status não for reconhecido
-                    logger.warning(f"Status não reconhecido: {pedido_data['status']}. Usando 'Pendente'")
-                    status = StatusPedido.PENDENTE
-
-                # Converter data de string para datetime
-                try:
-                    if isinstance(pedido_data['data_pedido'], str):
-                        data_parts = pedido_data['data_pedido'].split(' ')
-                        data_str = data_parts[0]
-                        hora_str = data_parts[1] if len(data_parts) > 1 else "00:00:00"
-
-                        dia, mes, ano = map(int, data_str.split('/'))
-                        hora, minuto, segundo = map(int, hora_str.split(':'))
-
-                        data_criacao = datetime(ano, mes, dia, hora, minuto, segundo)
-                    else:
-                        data_criacao = pedido_data['data_criacao']
-                except (ValueError, IndexError):
-                    logger.warning(f"Erro ao converter data: {pedido_data['data_pedido']}. Usando data atual.")
-                    data_criacao = datetime.now()
-
-                # Criar objeto Pedido
-                pedido = Pedido(
-                    id=pedido_data['id'],
-                    cliente=cliente,
-                    itens=itens,
-                    status=status,
-                    data_criacao=data_criacao
-                )
-
-                pedidos.append(pedido)
+            itens_por_pedido = self._carregar_itens([p['id'] for p in pedidos_data])
+            pedidos = [
+                self._montar_pedido(pedido_data, itens_por_pedido.get(pedido_data['id'], []))
+                for pedido_data in pedidos_data
+            ]
 
             logger.info(f"Listados {len(pedidos)} pedidos com sucesso")
             return pedidos
@@ -343,6 +267,270 @@ class PedidoRepository:
             logger.error(f"Erro ao listar pedidos: {str(e)}")
             raise
 
-        finally:
-            cursor.close()
-            conn.close()
\ No newline at end of file
+    def buscar(self, filtros: Dict[str, Any], limite: Optional[int] = None,
+               cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Busca pedidos ativos com filtros e ordenação aplicados no banco,
+        paginando por cursor (keyset) em vez de OFFSET.
+
+        Args:
+            filtros: status, cliente_nome, pedido_id, data_inicial, data_final
+                e ordenacao (data_recente, data_antiga, valor_alto, valor_baixo)
+            limite: Máximo de pedidos retornados (None para todos)
+            cursor: Cursor devolvido pela página anterior
+
+        Returns:
+            Dict com 'pedidos' (List[Pedido]) e 'proximo_cursor' (ou None)
+
+        Raises:
+            ValueError: Se a ordenação ou o cursor forem inválidos
+        """
+        ordenacao = filtros.get('ordenacao') or 'data_recente'
+        if ordenacao not in ORDENACOES_PEDIDOS:
+            raise ValueError(
+                f"Ordenação '{ordenacao}' inválida. Valores permitidos: {', '.join(ORDENACOES_PEDIDOS)}")
+        coluna, direcao = ORDENACOES_PEDIDOS[ordenacao]
+        comparador = '<' if direcao == 'DESC' else '>'
+
+        condicoes = ["p.deletado = 0"]
+        params: List[Any] = []
+
+        if filtros.get('status'):
+            # Pedidos antigos com status legado aparecem com o status atual
+            valores = status_gravados(filtros['status'])
+            condicoes.append(f"p.status IN ({', '.join(['%s'] * len(valores))})")
+            params.extend(valores)
+
+        if filtros.get('cliente_nome'):
+            termo = filtros['cliente_nome'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            condicoes.append("p.cliente_nome LIKE %s")
+            params.append(f"%{termo}%")
+
+        if filtros.get('pedido_id'):
+            condicoes.append("p.id = %s")
+            params.append(int(filtros['pedido_id']))
+
+        if filtros.get('data_inicial'):
+            condicoes.append("p.data_criacao >= %s")
+            params.append(datetime.fromisoformat(filtros['data_inicial']))
+
+        if filtros.get('data_final'):
+            condicoes.append("p.data_criacao <= %s")
+            params.append(datetime.fromisoformat(filtros['data_final']))
+
+        # Posição após o último pedido da página anterior
+        condicao_cursor = ""
+        params_cursor: List[Any] = []
+        if cursor:
+            valor, ultimo_id = self._decodificar_cursor(cursor, ordenacao)
+            condicao_cursor = f"(p.{coluna} {comparador} %s OR (p.{coluna} = %s AND p.id {comparador} %s))"
+            params_cursor = [valor, valor, ultimo_id]
+
+        if condicao_cursor:
+            condicoes.append(condicao_cursor)
+            params.extend(params_cursor)
+
+        # Data e valor total são colunas indexadas com deletado
+        # (idx_pedidos_deletado_data, idx_pedidos_deletado_valor): cada página é
+        # uma leitura de índice a partir do cursor, sem ordenar todos os filtrados
+        query = f"""
+            SELECT p.*
+            FROM pedidos p
+            WHERE {" AND ".join(condicoes)}
+            ORDER BY p.{coluna} {direcao}, p.id {direcao}
+        """
+        if limite is not None:
+            # Uma linha a mais indica se existe próxima página
+            query += " LIMIT %s"
+            params.append(int(limite) + 1)
+
+        try:
+            pedidos_data = execute_query(query, tuple(params), fetch=True, commit=False)
+
+            proximo_cursor = None
+            if limite is not None and len(pedidos_data) > limite:
+                pedidos_data = pedidos_data[:limite]
+                ultimo = pedidos_data[-1]
+                proximo_cursor = self._codificar_cursor(ordenacao, ultimo[coluna], ultimo['id'])
+
+            itens_por_pedido = self._carregar_itens([p['id'] for p in pedidos_data])
+            pedidos = [
+                self._montar_pedido(pedido_data, itens_por_pedido.get(pedido_data['id'], []))
+                for pedido_data in pedidos_data
+            ]
+
+            logger.info(f"Busca de pedidos retornou {len(pedidos)} pedidos")
+            return {'pedidos': pedidos, 'proximo_cursor': proximo_cursor}
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar pedidos: {str(e)}")
+            raise
+
+    def _codificar_cursor(self, ordenacao: str, valor: Any, pedido_id: int) -> str:
+        """Gera o cursor opaco que aponta para depois do pedido informado"""
+        valor = valor.isoformat() if isinstance(valor, datetime) else str(valor)
+        dados = json.dumps([ordenacao, valor, pedido_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(dados).decode('ascii')
+
+    def _decodificar_cursor(self, cursor: str, ordenacao: str):
+        """Extrai (valor, id) do cursor, validando a ordenação"""
+        try:
+            ordenacao_cursor, valor, pedido_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if ordenacao_cursor != ordenacao:
+                raise ValueError("ordenação diferente da página anterior")
+            coluna = ORDENACOES_PEDIDOS[ordenacao][0]
+            valor = Decimal(valor) if coluna == 'valor_total' else datetime.fromisoformat(valor)
+            return valor, int(pedido_id)
+        except Exception as e:
+            raise ValueError(f"Cursor de paginação inválido: {str(e)}")
+
+    def listar_alteracoes(self, cursor: Optional[str] = None, limite: int = 500) -> Dict[str, Any]:
+        """
+        Lista os pedidos criados, alterados ou excluídos depois do cursor.
+
+        Args:
+            cursor: Cursor devolvido pela chamada anterior (None para todos)
+            limite: Máximo de pedidos retornados
+
+        Returns:
+            Dict com 'pedidos' (List[Pedido]), 'removidos' (IDs excluídos),
+            'cursor' e 'tem_mais'
+
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        try:
+            resultado = buscar_alteracoes("SELECT * FROM pedidos p", "p", cursor, limite)
+            linhas = resultado.pop('linhas')
+
+            ativos = [linha for linha in linhas if not linha['deletado']]
+            itens_por_pedido = self._carregar_itens([p['id'] for p in ativos])
+            resultado['pedidos'] = [
+                self._montar_pedido(pedido_data, itens_por_pedido.get(pedido_data['id'], []))
+                for pedido_data in ativos
+            ]
+            resultado['removidos'] = [linha['id'] for linha in linhas if linha['deletado']]
+            return resultado
+
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao listar alterações de pedidos: {str(e)}")
+            raise
+
+    def iterar_todos(self, tamanho_lote: int = 500) -> Iterator[Pedido]:
+        """
+        Percorre todos os pedidos ativos sem carregá-los de uma vez.
+        Os pedidos são lidos em páginas por (data_criacao, id), na conexão da
+        unidade de trabalho, e os itens de cada página com uma única query:
+        a requisição ocupa uma só conexão do pool, por mais longa que seja.
+        """
+        posicao = None
+
+        while True:
+            condicao, params = "", []
+            if posicao:
+                condicao = "AND (data_criacao < %s OR (data_criacao = %s AND id < %s))"
+                params = [posicao[0], posicao[0], posicao[1]]
+
+            pedidos_data = execute_query(f"""
+                SELECT * FROM pedidos
+                WHERE deletado = 0 {condicao}
+                ORDER BY data_criacao DESC, id DESC
+                LIMIT %s
+            """, tuple(params + [tamanho_lote]), fetch=True, commit=False)
+
+            if not pedidos_data:
+                return
+
+            itens_por_pedido = self._carregar_itens([p['id'] for p in pedidos_data])
+            for pedido_data in pedidos_data:
+                yield self._montar_pedido(pedido_data, itens_por_pedido.get(pedido_data['id'], []))
+
+            if len(pedidos_data) < tamanho_lote:
+                return
+            posicao = (pedidos_data[-1]['data_criacao'], pedidos_data[-1]['id'])
+
+    def _carregar_itens(self, pedido_ids: List[int]) -> Dict[int, List[ItemPedido]]:
+        """
+        Busca os itens de vários pedidos com uma query IN (...) a cada
+        LOTE_ITENS pedidos. Retorna um dicionário {pedido_id: [itens]}.
+        """
+        itens_por_pedido: Dict[int, List[ItemPedido]] = {}
+
+        for inicio in range(0, len(pedido_ids), LOTE_ITENS):
+            lote = pedido_ids[inicio:inicio + LOTE_ITENS]
+            placeholders = ", ".join(["%s"] * len(lote))
+            itens_data = execute_query(f"""
+                SELECT ip.*, p.nome
+                FROM itens_pedido ip
+                LEFT JOIN produtos p ON ip.produto_id = p.id
+                WHERE ip.pedido_id IN ({placeholders})
+                ORDER BY ip.pedido_id, ip.id
+            """, tuple(lote), fetch=True, commit=False)
+
+            for item_data in itens_data:
+                item = ItemPedido(
+                    id=item_data['id'],
+                    pedido_id=item_data['pedido_id'],
+                    produto_id=item_data['produto_id'],
+                    quantidade=item_data['quantidade'],
+                    preco_unitario=item_data['preco_unitario'],
+                    nome=item_data['nome']
+                )
+                itens_por_pedido.setdefault(item.pedido_id, []).append(item)
+
+        return itens_por_pedido
+
+    def _montar_pedido(self, pedido_data: Dict[str, Any], itens: List[ItemPedido]) -> Pedido:
+        """
+        Constrói o objeto Pedido a partir de uma linha da tabela pedidos.
+        """
+        # Criar objeto Cliente
+        cliente = Cliente(
+            nome=pedido_data['cliente_nome'],
+            telefone=pedido_data['cliente_telefone'],
+            email=pedido_data['cliente_email'],
+            endereco=pedido_data['cliente_endereco']
+        )
+
+        # Converter status de string para enum
+        try:
+            status = StatusPedido(pedido_data['status'])
+        except ValueError:
+            # Status do esquema antigo ('Pendente', 'Concluído')
+            status = STATUS_LEGADOS.get(pedido_data['status'])
+            if status is None:
+                logger.warning(f"Status não reconhecido: {pedido_data['status']}. Usando 'Carrinho'")
+                status = StatusPedido.CARRINHO
+
+        # Converter data de string para datetime
+        try:
+            if isinstance(pedido_data['data_pedido'], str):
+                data_parts = pedido_data['data_pedido'].split(' ')
+                data_str = data_parts[0]
+                hora_str = data_parts[1] if len(data_parts) > 1 else "00:00:00"
+
+                dia, mes, ano = map(int, data_str.split('/'))
+                hora, minuto, segundo = map(int, hora_str.split(':'))
+
+                data_criacao = datetime(ano, mes, dia, hora, minuto, segundo)
+            else:
+                data_criacao = pedido_data['data_criacao']
+        except (ValueError, IndexError):
+            logger.warning(f"Erro ao converter data: {pedido_data['data_pedido']}. Usando data atual.")
+            data_criacao = datetime.now()
+
+        # Criar objeto Pedido
+        return Pedido(
+            id=pedido_data['id'],
+            cliente=cliente,
+            itens=itens,
+            status=status,
+            data_criacao=data_criacao,
+            data_atualizacao=pedido_data.get('data_atualizacao'),
+            distribuidor_id=pedido_data.get('distribuidor_id'),
+            observacoes_cliente=pedido_data.get('observacoes_cliente'),
+            observacoes_distribuidor=pedido_data.get('observacoes_distribuidor'),
+            estoque_reservado=bool(pedido_data.get('estoque_reservado'))
+        )
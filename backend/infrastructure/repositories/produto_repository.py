@@ -4,11 +4,13 @@ Segue o padrão Repository do DDD.
 """
 
 import logging
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Iterator
 from datetime import datetime
 
 from backend.domain.models.produto import Produto
-from backend.infrastructure.db.db_manager import execute_query
+from backend.infrastructure.db.db_manager import (execute_query, buscar_alteracoes, stream_query,
+                                                  get_db_connection)
+from backend.infrastructure.cache.versoes import invalidar, CATALOGO_PRODUTOS
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -31,6 +33,9 @@ class ProdutoRepository:
         Cria um novo produto no banco de dados.
         Retorna o produto com o ID atribuído.
         """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
         try:
             query = """
                 INSERT INTO produtos (
@@ -46,17 +51,25 @@ class ProdutoRepository:
                 datetime.now()
             )
 
-            produto_id = execute_query(query, params)
+            cursor.execute(query, params)
+            produto_id = cursor.lastrowid
+            conn.commit()
 
             # Atribuir ID ao produto
             produto.id = produto_id
+            invalidar(CATALOGO_PRODUTOS)
             logger.info(f"Produto criado com ID: {produto_id}")
             return produto
 
         except Exception as e:
+            conn.rollback()
             logger.error(f"Erro ao criar produto: {str(e)}")
             raise Exception(f"Erro ao criar produto: {str(e)}")
 
+        finally:
+            cursor.close()
+            conn.close()
+
     def obter_por_id(self, id: int) -> Optional[Produto]:
         """
         Busca um produto pelo ID.
@@ -123,6 +136,130 @@ class ProdutoRepository:
             logger.error(f"Erro ao listar produtos: {str(e)}")
             return []
 
+    def iterar_ativos(self, estoque_maximo: Optional[int] = None,
+                      tamanho_lote: int = 2000) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre os produtos ativos em ordem de nome, lidos do banco em lotes
+        (linhas da tabela), sem carregar o catálogo inteiro.
+
+        Args:
+            estoque_maximo: Se informado, só produtos com estoque até esse valor
+            tamanho_lote: Linhas lidas do banco por vez
+        """
+        query = "SELECT * FROM produtos WHERE (deletado = 0 OR deletado IS NULL)"
+        params = ()
+        if estoque_maximo is not None:
+            query += " AND quantidade_estoque <= %s"
+            params = (estoque_maximo,)
+        query += " ORDER BY nome, id"
+        return stream_query(query, params, chunk_size=tamanho_lote)
+
+    def listar_alteracoes(self, cursor: Optional[str] = None, limite: int = 500) -> Dict[str, Any]:
+        """
+        Lista os produtos criados, alterados ou excluídos depois do cursor.
+
+        Args:
+            cursor: Cursor devolvido pela chamada anterior (None para todos)
+            limite: Máximo de produtos retornados
+
+        Returns:
+            Dict com 'produtos' (linhas da tabela, como em GET /api/produtos),
+            'removidos' (IDs excluídos), 'cursor' e 'tem_mais'
+
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        try:
+            resultado = buscar_alteracoes("SELECT * FROM produtos p", "p", cursor, limite)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao listar alterações de produtos: {str(e)}")
+            raise Exception(f"Erro ao listar alterações de produtos: {str(e)}")
+
+        linhas = resultado.pop('linhas')
+        resultado['produtos'] = [linha for linha in linhas if not linha['deletado']]
+        resultado['removidos'] = [linha['id'] for linha in linhas if linha['deletado']]
+        return resultado
+
+    def obter_para_reserva(self, ids: List[int]) -> Dict[int, Produto]:
+        """
+        Busca vários produtos em uma única query e bloqueia as linhas
+        (SELECT ... FOR UPDATE) até o fim da transação corrente.
+        Deve ser chamado dentro de `transacao()` ou de uma requisição.
+
+        Args:
+            ids: IDs dos produtos
+
+        Returns:
+            Dict[int, Produto]: Produtos ativos encontrados, por ID
+        """
+        if not ids:
+            return {}
+
+        try:
+            # Ordem fixa de bloqueio evita deadlock entre pedidos simultâneos
+            placeholders = ', '.join(['%s'] * len(ids))
+            result = execute_query(f"""
+                SELECT id, nome, descricao, preco, quantidade_estoque, imagem_url
+                FROM produtos
+                WHERE id IN ({placeholders}) AND (deletado = 0 OR deletado IS NULL)
+                ORDER BY id
+                FOR UPDATE
+            """, tuple(sorted(set(ids))), fetch=True, commit=False)
+
+            return {
+                produto_data["id"]: Produto(
+                    id=produto_data["id"],
+                    nome=produto_data["nome"],
+                    descricao=produto_data.get("descricao", ""),
+                    preco=float(produto_data["preco"]),
+                    quantidade_estoque=int(produto_data["quantidade_estoque"]),
+                    imagem_url=produto_data.get("imagem_url")
+                )
+                for produto_data in result
+            }
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar produtos para reserva: {str(e)}")
+            raise Exception(f"Erro ao buscar produtos para reserva: {str(e)}")
+
+    def ajustar_estoque_em_lote(self, ajustes: Dict[int, int]) -> int:
+        """
+        Soma um delta ao estoque de vários produtos com um único UPDATE.
+        Um produto só é alterado se o estoque resultante não ficar negativo,
+        então a verificação e a baixa acontecem no mesmo comando.
+        Deve ser chamado dentro de `transacao()` ou de uma requisição.
+
+        Args:
+            ajustes: Delta por ID de produto (negativo para baixa)
+
+        Returns:
+            int: Número de produtos alterados (menor que len(ajustes) se faltou estoque)
+        """
+        ajustes = {produto_id: delta for produto_id, delta in ajustes.items() if delta}
+        if not ajustes:
+            return 0
+
+        try:
+            valores = ' UNION ALL '.join(['SELECT %s AS id, %s AS delta'] * len(ajustes))
+            params = tuple(valor for item in ajustes.items() for valor in item)
+
+            alterados = execute_query(f"""
+                UPDATE produtos p
+                JOIN ({valores}) ajuste ON ajuste.id = p.id
+                SET p.quantidade_estoque = p.quantidade_estoque + ajuste.delta
+                WHERE p.quantidade_estoque + ajuste.delta >= 0
+            """, params, commit=False)
+
+            if alterados:
+                invalidar(CATALOGO_PRODUTOS)
+            return alterados
+
+        except Exception as e:
+            logger.error(f"Erro ao ajustar estoque em lote: {str(e)}")
+            raise Exception(f"Erro ao ajustar estoque em lote: {str(e)}")
+
     def atualizar(self, produto: Produto) -> Produto:
         """
         Atualiza um produto existente.
@@ -149,6 +286,7 @@ class ProdutoRepository:
             if rows_affected == 0:
                 raise Exception(f"Produto com ID {produto.id} não encontrado")
 
+            invalidar(CATALOGO_PRODUTOS)
             logger.info(f"Produto ID {produto.id} atualizado com sucesso")
             return produto
 
@@ -169,6 +307,8 @@ class ProdutoRepository:
             rows_affected = execute_query(query, (id,))
 
             success = rows_affected > 0
+            if success:
+                invalidar(CATALOGO_PRODUTOS)
             logger.info(f"Produto ID {id} {'excluído com sucesso' if success else 'não encontrado'}")
             return success
 
@@ -189,6 +329,8 @@ class ProdutoRepository:
             rows_affected = execute_query(query, (id,))
 
             success = rows_affected > 0
+            if success:
+                invalidar(CATALOGO_PRODUTOS)
             logger.info(f"Produto ID {id} {'restaurado com sucesso' if success else 'não encontrado'}")
             return success
 
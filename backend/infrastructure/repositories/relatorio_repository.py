@@ -0,0 +1,386 @@
+"""
+Repositório das consultas de relatórios.
+As agregações diárias (vendas por produto, totais por status e por
+distribuidor) são mantidas de forma incremental, na mesma transação que
+grava o pedido: a contribuição do pedido é removida antes da alteração e
+somada de novo depois dela. Os relatórios leem essas tabelas em vez de
+percorrer o histórico de pedidos.
+
+Para períodos que não caem em dias inteiros, as mesmas agregações são
+calculadas no banco (GROUP BY sobre pedidos/itens_pedido, filtrado pelo
+índice de pedidos.data_criacao): só as linhas de resultado chegam ao Python.
+
+As séries temporais (vendas, receita e nível de estoque por dia, semana ou
+mês) também são agrupadas no banco, a partir das tabelas agregadas e das
+movimentações.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from backend.domain.models.pedido import StatusPedido
+from backend.infrastructure.db.db_manager import execute_query
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Pedido sem distribuidor nas tabelas agregadas (a coluna faz parte da chave)
+SEM_DISTRIBUIDOR = 0
+
+# Início do período de cada agrupamento das séries, a partir de uma coluna DATE
+AGRUPAMENTOS = {
+    'dia': "{coluna}",
+    'semana': "DATE_SUB({coluna}, INTERVAL WEEKDAY({coluna}) DAY)",
+    'mes': "DATE_SUB({coluna}, INTERVAL DAYOFMONTH({coluna}) - 1 DAY)"
+}
+
+# Status de pedido que não contam como venda nas séries
+STATUS_FORA_DAS_VENDAS = (StatusPedido.CARRINHO.value, StatusPedido.CANCELADO.value, StatusPedido.RECUSADO.value)
+
+# Contribuição de um pedido para cada tabela agregada.
+# Parâmetros nomeados: sinal (1 soma o pedido, -1 remove) e pedido_id.
+_AGREGACOES_PEDIDO = [
+    """
+        INSERT INTO agregado_pedidos_status (dia, status, pedidos, itens, valor)
+        SELECT DATE(p.data_criacao), p.status, %(sinal)s,
+               %(sinal)s * COALESCE(SUM(ip.quantidade), 0),
+               %(sinal)s * COALESCE(SUM(ip.quantidade * ip.preco_unitario), 0)
+        FROM pedidos p
+        LEFT JOIN itens_pedido ip ON ip.pedido_id = p.id
+        WHERE p.id = %(pedido_id)s AND p.deletado = 0
+        GROUP BY DATE(p.data_criacao), p.status
+        ON DUPLICATE KEY UPDATE pedidos = pedidos + VALUES(pedidos),
+                                itens = itens + VALUES(itens),
+                                valor = valor + VALUES(valor)
+    """,
+    """
+        INSERT INTO agregado_vendas_produto (dia, produto_id, status, pedidos, quantidade, valor)
+        SELECT DATE(p.data_criacao), ip.produto_id, p.status, %(sinal)s,
+               %(sinal)s * SUM(ip.quantidade),
+               %(sinal)s * SUM(ip.quantidade * ip.preco_unitario)
+        FROM pedidos p
+        JOIN itens_pedido ip ON ip.pedido_id = p.id
+        WHERE p.id = %(pedido_id)s AND p.deletado = 0
+        GROUP BY DATE(p.data_criacao), ip.produto_id, p.status
+        ON DUPLICATE KEY UPDATE pedidos = pedidos + VALUES(pedidos),
+                                quantidade = quantidade + VALUES(quantidade),
+                                valor = valor + VALUES(valor)
+    """,
+    """
+        INSERT INTO agregado_vendas_distribuidor (dia, distribuidor_id, status, pedidos, itens, valor)
+        SELECT DATE(p.data_criacao), COALESCE(p.distribuidor_id, 0), p.status, %(sinal)s,
+               %(sinal)s * COALESCE(SUM(ip.quantidade), 0),
+               %(sinal)s * COALESCE(SUM(ip.quantidade * ip.preco_unitario), 0)
+        FROM pedidos p
+        LEFT JOIN itens_pedido ip ON ip.pedido_id = p.id
+        WHERE p.id = %(pedido_id)s AND p.deletado = 0
+        GROUP BY DATE(p.data_criacao), COALESCE(p.distribuidor_id, 0), p.status
+        ON DUPLICATE KEY UPDATE pedidos = pedidos + VALUES(pedidos),
+                                itens = itens + VALUES(itens),
+                                valor = valor + VALUES(valor)
+    """,
+]
+
+
+def _filtro_periodo(data_inicial: Optional[date], data_final: Optional[date],
+                    status: Optional[List[str]], alias: str = "a"):
+    """Monta o WHERE (período inclusivo e status) das consultas agregadas"""
+    condicoes = []
+    params = []
+    if data_inicial:
+        condicoes.append(f"{alias}.dia >= %s")
+        params.append(data_inicial)
+    if data_final:
+        condicoes.append(f"{alias}.dia <= %s")
+        params.append(data_final)
+    if status:
+        condicoes.append(f"{alias}.status IN ({', '.join(['%s'] * len(status))})")
+        params.extend(status)
+    return (f"WHERE {' AND '.join(condicoes)}" if condicoes else ""), params
+
+def _filtro_pedidos(inicio: Optional[datetime], fim: Optional[datetime], status: Optional[List[str]]):
+    """Monta o WHERE das agregações sobre os pedidos (início inclusivo, fim exclusivo)"""
+    # deletado + data_criacao: usa o índice idx_pedidos_deletado_data
+    condicoes = ["p.deletado = 0"]
+    params = []
+    if inicio:
+        condicoes.append("p.data_criacao >= %s")
+        params.append(inicio)
+    if fim:
+        condicoes.append("p.data_criacao < %s")
+        params.append(fim)
+    if status:
+        condicoes.append(f"p.status IN ({', '.join(['%s'] * len(status))})")
+        params.extend(status)
+    return f"WHERE {' AND '.join(condicoes)}", params
+
+
+class RelatorioRepository:
+    """
+    Repositório para as tabelas agregadas dos relatórios.
+    """
+
+    def _aplicar_pedido(self, cursor, pedido_id: int, sinal: int) -> None:
+        for query in _AGREGACOES_PEDIDO:
+            cursor.execute(query, {'sinal': sinal, 'pedido_id': pedido_id})
+
+    def adicionar_pedido(self, cursor, pedido_id: int) -> None:
+        """
+        Soma o pedido (no estado atual do banco) às tabelas agregadas.
+        Deve ser chamado no cursor da transação que gravou o pedido, depois
+        da gravação dos itens. Pedidos deletados não contribuem.
+        """
+        self._aplicar_pedido(cursor, pedido_id, 1)
+
+    def remover_pedido(self, cursor, pedido_id: int) -> None:
+        """
+        Subtrai o pedido (no estado atual do banco) das tabelas agregadas.
+        Deve ser chamado no cursor da transação, antes de alterar o pedido;
+        a linha do pedido fica bloqueada até o fim da transação.
+        """
+        cursor.execute("SELECT id FROM pedidos WHERE id = %s FOR UPDATE", (pedido_id,))
+        cursor.fetchall()
+        self._aplicar_pedido(cursor, pedido_id, -1)
+
+    def resumo_por_status(self, data_inicial: Optional[date] = None, data_final: Optional[date] = None,
+                          status: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Totais do período agrupados por status.
+
+        Returns:
+            Lista de {status, pedidos, itens, valor}
+        """
+        try:
+            where, params = _filtro_periodo(data_inicial, data_final, status)
+            return execute_query(f"""
+                SELECT a.status, SUM(a.pedidos) AS pedidos, SUM(a.itens) AS itens, SUM(a.valor) AS valor
+                FROM agregado_pedidos_status a
+                {where}
+                GROUP BY a.status
+            """, tuple(params), fetch=True, commit=False)
+        except Exception as e:
+            logger.error(f"Erro ao consultar resumo por status: {str(e)}")
+            raise Exception(f"Erro ao consultar resumo por status: {str(e)}")
+
+    def produtos_mais_vendidos(self, data_inicial: Optional[date] = None, data_final: Optional[date] = None,
+                               status: Optional[List[str]] = None, limite: int = 10) -> List[Dict[str, Any]]:
+        """
+        Produtos com maior quantidade pedida no período.
+
+        Returns:
+            Lista de {id, nome, quantidade, valor}, da maior quantidade para a menor
+        """
+        try:
+            where, params = _filtro_periodo(data_inicial, data_final, status)
+            return execute_query(f"""
+                SELECT a.produto_id AS id, p.nome, SUM(a.quantidade) AS quantidade, SUM(a.valor) AS valor
+                FROM agregado_vendas_produto a
+                LEFT JOIN produtos p ON p.id = a.produto_id
+                {where}
+                GROUP BY a.produto_id, p.nome
+                HAVING SUM(a.quantidade) > 0
+                ORDER BY quantidade DESC, a.produto_id
+                LIMIT %s
+            """, tuple(params) + (limite,), fetch=True, commit=False)
+        except Exception as e:
+            logger.error(f"Erro ao consultar produtos mais vendidos: {str(e)}")
+            raise Exception(f"Erro ao consultar produtos mais vendidos: {str(e)}")
+
+    def resumo_por_distribuidor(self, data_inicial: Optional[date] = None, data_final: Optional[date] = None,
+                                status: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Totais do período por distribuidor (distribuidor_id None para pedidos sem distribuidor).
+
+        Returns:
+            Lista de {distribuidor_id, nome, pedidos, valor}, do maior valor para o menor
+        """
+        try:
+            where, params = _filtro_periodo(data_inicial, data_final, status)
+            linhas = execute_query(f"""
+                SELECT a.distribuidor_id, u.nome, SUM(a.pedidos) AS pedidos, SUM(a.valor) AS valor
+                FROM agregado_vendas_distribuidor a
+                LEFT JOIN usuarios u ON u.id = a.distribuidor_id
+                {where}
+                GROUP BY a.distribuidor_id, u.nome
+                HAVING SUM(a.pedidos) > 0
+                ORDER BY valor DESC
+            """, tuple(params), fetch=True, commit=False)
+
+            for linha in linhas:
+                if linha['distribuidor_id'] == SEM_DISTRIBUIDOR:
+                    linha['distribuidor_id'] = None
+            return linhas
+        except Exception as e:
+            logger.error(f"Erro ao consultar resumo por distribuidor: {str(e)}")
+            raise Exception(f"Erro ao consultar resumo por distribuidor: {str(e)}")
+
+    def calcular_resumo_por_status(self, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                                   status: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Totais por status calculados direto nos pedidos do período [inicio, fim).
+
+        Returns:
+            Lista de {status, pedidos, itens, valor} (mesmo formato de resumo_por_status)
+        """
+        try:
+            where, params = _filtro_pedidos(inicio, fim, status)
+            return execute_query(f"""
+                SELECT p.status, COUNT(DISTINCT p.id) AS pedidos,
+                       COALESCE(SUM(ip.quantidade), 0) AS itens,
+                       COALESCE(SUM(ip.quantidade * ip.preco_unitario), 0) AS valor
+                FROM pedidos p
+                LEFT JOIN itens_pedido ip ON ip.pedido_id = p.id
+                {where}
+                GROUP BY p.status
+            """, tuple(params), fetch=True, commit=False)
+        except Exception as e:
+            logger.error(f"Erro ao calcular resumo por status: {str(e)}")
+            raise Exception(f"Erro ao calcular resumo por status: {str(e)}")
+
+    def calcular_produtos_mais_vendidos(self, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                                        status: Optional[List[str]] = None, limite: int = 10) -> List[Dict[str, Any]]:
+        """
+        Produtos mais pedidos calculados direto nos pedidos do período [inicio, fim).
+
+        Returns:
+            Lista de {id, nome, quantidade, valor} (mesmo formato de produtos_mais_vendidos)
+        """
+        try:
+            where, params = _filtro_pedidos(inicio, fim, status)
+            return execute_query(f"""
+                SELECT t.produto_id AS id, pr.nome, t.quantidade, t.valor
+                FROM (
+                    SELECT ip.produto_id, SUM(ip.quantidade) AS quantidade,
+                           SUM(ip.quantidade * ip.preco_unitario) AS valor
+                    FROM pedidos p
+                    JOIN itens_pedido ip ON ip.pedido_id = p.id
+                    {where}
+                    GROUP BY ip.produto_id
+                    ORDER BY quantidade DESC, ip.produto_id
+                    LIMIT %s
+                ) t
+                LEFT JOIN produtos pr ON pr.id = t.produto_id
+                ORDER BY t.quantidade DESC, t.produto_id
+            """, tuple(params) + (limite,), fetch=True, commit=False)
+        except Exception as e:
+            logger.error(f"Erro ao calcular produtos mais vendidos: {str(e)}")
+            raise Exception(f"Erro ao calcular produtos mais vendidos: {str(e)}")
+
+    def calcular_resumo_por_distribuidor(self, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                                         status: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Totais por distribuidor calculados direto nos pedidos do período [inicio, fim).
+
+        Returns:
+            Lista de {distribuidor_id, nome, pedidos, valor} (mesmo formato de resumo_por_distribuidor)
+        """
+        try:
+            where, params = _filtro_pedidos(inicio, fim, status)
+            return execute_query(f"""
+                SELECT p.distribuidor_id, u.nome, COUNT(DISTINCT p.id) AS pedidos,
+                       COALESCE(SUM(ip.quantidade * ip.preco_unitario), 0) AS valor
+                FROM pedidos p
+                LEFT JOIN itens_pedido ip ON ip.pedido_id = p.id
+                LEFT JOIN usuarios u ON u.id = p.distribuidor_id
+                {where}
+                GROUP BY p.distribuidor_id, u.nome
+                ORDER BY valor DESC
+            """, tuple(params), fetch=True, commit=False)
+        except Exception as e:
+            logger.error(f"Erro ao calcular resumo por distribuidor: {str(e)}")
+            raise Exception(f"Erro ao calcular resumo por distribuidor: {str(e)}")
+
+    def serie_vendas(self, agrupamento: str, data_inicial: date, data_final: date,
+                     produto_id: Optional[int] = None, distribuidor_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Vendas por período (dia, semana ou mês) a partir das tabelas agregadas,
+        de um produto, de um distribuidor ou do catálogo inteiro.
+
+        Args:
+            agrupamento: 'dia', 'semana' ou 'mes' (ver AGRUPAMENTOS)
+            data_inicial, data_final: Período (inclusivo)
+            produto_id: Restringe ao produto
+            distribuidor_id: Restringe ao distribuidor (ignorado se houver produto_id)
+
+        Returns:
+            Lista de {periodo (date de início), pedidos, quantidade, valor}, em ordem;
+            períodos sem vendas não aparecem
+        """
+        try:
+            if produto_id is not None:
+                tabela, coluna_itens, filtro, params = 'agregado_vendas_produto', 'a.quantidade', \
+                    "AND a.produto_id = %s", [produto_id]
+            elif distribuidor_id is not None:
+                tabela, coluna_itens, filtro, params = 'agregado_vendas_distribuidor', 'a.itens', \
+                    "AND a.distribuidor_id = %s", [distribuidor_id]
+            else:
+                tabela, coluna_itens, filtro, params = 'agregado_pedidos_status', 'a.itens', "", []
+
+            periodo = AGRUPAMENTOS[agrupamento].format(coluna='a.dia')
+            return execute_query(f"""
+                SELECT {periodo} AS periodo, SUM(a.pedidos) AS pedidos,
+                       SUM({coluna_itens}) AS quantidade, SUM(a.valor) AS valor
+                FROM {tabela} a
+                WHERE a.dia >= %s AND a.dia <= %s
+                  AND a.status NOT IN ({', '.join(['%s'] * len(STATUS_FORA_DAS_VENDAS))})
+                  {filtro}
+                GROUP BY periodo
+                ORDER BY periodo
+            """, (data_inicial, data_final, *STATUS_FORA_DAS_VENDAS, *params), fetch=True, commit=False)
+        except Exception as e:
+            logger.error(f"Erro ao consultar série de vendas: {str(e)}")
+            raise Exception(f"Erro ao consultar série de vendas: {str(e)}")
+
+    def serie_variacao_estoque(self, agrupamento: str, data_inicial: date, data_final: date,
+                               produto_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Variação líquida do estoque por período registrada nas movimentações,
+        de um produto ou do catálogo inteiro (produtos ativos).
+        Reservas e devoluções de estoque dos pedidos e edições diretas do
+        produto não geram movimentação e não entram na soma.
+
+        Returns:
+            Lista de {periodo, variacao}, em ordem (só períodos com movimentação)
+        """
+        try:
+            filtro_produto = "AND m.produto_id = %s" if produto_id is not None else ""
+            params_produto = (produto_id,) if produto_id is not None else ()
+            periodo = AGRUPAMENTOS[agrupamento].format(coluna='DATE(m.data)')
+
+            return execute_query(f"""
+                SELECT {periodo} AS periodo, SUM(m.estoque_atual - m.estoque_anterior) AS variacao
+                FROM movimentacoes m
+                JOIN produtos p ON p.id = m.produto_id AND p.deletado = 0
+                WHERE m.data >= %s AND m.data < %s {filtro_produto}
+                GROUP BY periodo
+                ORDER BY periodo
+            """, (data_inicial, data_final + timedelta(days=1)) + params_produto, fetch=True, commit=False)
+        except Exception as e:
+            logger.error(f"Erro ao consultar série de estoque: {str(e)}")
+            raise Exception(f"Erro ao consultar série de estoque: {str(e)}")
+
+    def obter_nomes(self, tabela: str, ids: List[int]) -> Dict[int, str]:
+        """
+        Nomes de produtos ou usuários pelos IDs (para rotular resultados agregados).
+
+        Args:
+            tabela: 'produtos' ou 'usuarios'
+            ids: IDs a buscar
+
+        Returns:
+            Dict[int, str]: id -> nome (IDs inexistentes ficam de fora)
+        """
+        if tabela not in ('produtos', 'usuarios'):
+            raise ValueError(f"Tabela '{tabela}' inválida")
+        if not ids:
+            return {}
+        try:
+            linhas = execute_query(f"""
+                SELECT id, nome FROM {tabela}
+                WHERE id IN ({', '.join(['%s'] * len(ids))})
+            """, tuple(ids), fetch=True, commit=False)
+            return {linha['id']: linha['nome'] for linha in linhas}
+        except Exception as e:
+            logger.error(f"Erro ao obter nomes em {tabela}: {str(e)}")
+            raise Exception(f"Erro ao obter nomes: {str(e)}")
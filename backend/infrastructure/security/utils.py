@@ -75,18 +75,23 @@ def parse_data_br(data_str):
         return None
 
 # Funções para carregar e salvar dados (cache de arquivos)
+# Entradas gravadas com a versão de ARQUIVOS_JSON: um salvamento em qualquer
+# worker descarta o cache de arquivos de todos os outros
 _cache = {}
 
 def carregar_json_com_cache(arquivo, tempo_cache=60):
     """Carrega um arquivo JSON com cache para evitar I/O excessivo"""
     import json
     import time
-    
+    from backend.infrastructure.cache.versoes import obter_versao, ARQUIVOS_JSON
+
     agora = time.time()
-    
-    # Se o arquivo estiver em cache e for recente, retorna do cache
-    if arquivo in _cache and agora - _cache[arquivo]['timestamp'] < tempo_cache:
-        return _cache[arquivo]['dados']
+    versao = obter_versao(ARQUIVOS_JSON)
+
+    # Se o arquivo estiver em cache, for recente e da versão atual, retorna do cache
+    entrada = _cache.get(arquivo)
+    if entrada and entrada['versao'] == versao and agora - entrada['timestamp'] < tempo_cache:
+        return entrada['dados']
     
     # Caso contrário, carrega do disco
     try:
@@ -95,6 +100,7 @@ def carregar_json_com_cache(arquivo, tempo_cache=60):
                 dados = json.load(f)
                 _cache[arquivo] = {
                     'timestamp': agora,
+                    'versao': versao,
                     'dados': dados
                 }
                 return dados
@@ -107,14 +113,17 @@ def salvar_json_com_cache(arquivo, dados):
     """Salva dados em um arquivo JSON e atualiza o cache"""
     import json
     import time
+    from backend.infrastructure.cache.versoes import invalidar, obter_versao, ARQUIVOS_JSON
     
     try:
         with open(arquivo, 'w', encoding='utf-8') as f:
             json.dump(dados, f, ensure_ascii=False, indent=2)
-            
-        # Atualiza o cache
+
+        # Avisa os outros workers e atualiza o cache com a nova versão
+        invalidar(ARQUIVOS_JSON)
         _cache[arquivo] = {
             'timestamp': time.time(),
+            'versao': obter_versao(ARQUIVOS_JSON),
             'dados': dados
         }
         return True
@@ -124,9 +133,12 @@ def salvar_json_com_cache(arquivo, dados):
 
 # Função para limpar o cache
 def limpar_cache(arquivo=None):
-    """Limpa o cache para um arquivo específico ou todo o cache"""
+    """Limpa o cache para um arquivo específico ou todo o cache (em todos os workers)"""
+    from backend.infrastructure.cache.versoes import invalidar, ARQUIVOS_JSON
+
     if arquivo:
         if arquivo in _cache:
             del _cache[arquivo]
     else:
-        _cache.clear() 
\ No newline at end of file
+        _cache.clear()
+    invalidar(ARQUIVOS_JSON)
@@ -36,6 +36,18 @@ def create_app():
     app.secret_key = os.getenv("APP_SECRET_KEY", "vortex")
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB
 
+    # Uma conexão e um commit por requisição
+    from backend.infrastructure.db import unit_of_work
+    unit_of_work.init_app(app)
+
+    # Contagem de queries por requisição (detecção de N+1)
+    from backend.interfaces.web.middlewares import query_budget_middleware
+    query_budget_middleware.init_app(app)
+
+    # Serialização JSON (orjson quando disponível; Decimal, datetime e Enum)
+    from backend.interfaces.web import json_provider
+    json_provider.init_app(app)
+
     # Adicionar variáveis de contexto global para templates
     @app.context_processor
     def adicionar_variaveis_globais():
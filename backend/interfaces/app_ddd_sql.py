@@ -10,6 +10,22 @@ import bcrypt
 from datetime import datetime
 from dotenv import load_dotenv
 from backend.infrastructure.db.config_db import get_db_connection
+from backend.infrastructure.db.db_manager import setup_database
+from backend.infrastructure.db import unit_of_work
+from backend.infrastructure.db.connection_pool import get_connection_pool, obter_estatisticas_pool
+from backend.infrastructure.db.instrumentacao import obter_estatisticas_queries
+from backend.infrastructure.cache.versoes import (invalidar, CacheVersionado, CATALOGO_PRODUTOS, PEDIDOS,
+                                                  MOVIMENTACOES, USUARIOS)
+from backend.infrastructure.cache.catalogo_cache import obter_catalogo_json
+from backend.infrastructure.cache.coalescencia import coalescer, obter_estatisticas_coalescencia
+from backend.infrastructure.repositories.relatorio_repository import RelatorioRepository
+from backend.infrastructure.analise.colunar import AnaliseIndisponivel
+from backend.interfaces.web.middlewares import query_budget_middleware
+from backend.interfaces.web import json_provider
+from backend.interfaces.web.streaming import formato_stream, resposta_stream
+from backend.interfaces.web.middlewares.http_cache_middleware import get_condicional
+from backend.domain.models.pedido import StatusPedido
+from backend.domain.exceptions.domain_exceptions import EstoqueInsuficienteException, ProdutoNaoEncontradoException
 from werkzeug.utils import secure_filename
 import uuid
 
@@ -35,6 +51,15 @@ app = Flask(
 )
 app.secret_key = os.getenv("APP_SECRET_KEY", "vortex")
 
+# Uma conexão e um commit por requisição
+unit_of_work.init_app(app)
+
+# Contagem de queries por requisição (detecção de N+1)
+query_budget_middleware.init_app(app)
+
+# Serialização JSON (orjson quando disponível; Decimal, datetime e Enum)
+json_provider.init_app(app)
+
 # Adicionar variáveis de contexto global para templates
 @app.context_processor
 def adicionar_variaveis_globais():
@@ -287,6 +312,7 @@ def redefinir_senha(token):
 
         conn.commit()
         conn.close()
+        invalidar(USUARIOS)
 
         flash("Senha redefinida com sucesso! Faça login com sua nova senha.", "success")
         return redirect(url_for('login'))
@@ -332,6 +358,7 @@ def adicionar_produto():
         produto_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        invalidar(CATALOGO_PRODUTOS)
 
         # Adicionar mensagem flash para exibir na próxima página
         flash('Produto adicionado com sucesso!', 'success')
@@ -360,18 +387,32 @@ def relatorios():
     """Página de relatórios"""
     return render_template("relatorios.html")
 
+# Máximo de linhas por chamada das listagens incrementais (?since=)
+LIMITE_ALTERACOES = 2000
+
+def _parametros_alteracoes():
+    """Lê o cursor (since) e o limite de uma listagem incremental"""
+    cursor = request.args.get('since') or None
+    limite = max(1, min(request.args.get('limite', 500, type=int), LIMITE_ALTERACOES))
+    return cursor, limite
+
 # API Routes
 @app.route('/api/produtos', methods=['GET'])
+@get_condicional(CATALOGO_PRODUTOS)
 def api_listar_produtos():
-    """API para listar todos os produtos"""
+    """
+    API para listar todos os produtos.
+    Serve o JSON do catálogo em cache; o banco só é consultado após uma escrita.
+    Com ?since=<cursor> (vazio na primeira chamada) retorna só as alterações:
+    {produtos, removidos, cursor, tem_mais}.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM produtos WHERE deletado = 0")
-        produtos = cursor.fetchall()
-        conn.close()
-
-        return jsonify(produtos)
+        if 'since' in request.args:
+            cursor, limite = _parametros_alteracoes()
+            return jsonify(produto_service.listar_alteracoes(cursor, limite=limite))
+        return app.response_class(obter_catalogo_json(), mimetype='application/json')
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -407,6 +448,7 @@ def api_adicionar_produto():
         produto_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        invalidar(CATALOGO_PRODUTOS)
 
         return jsonify({"id": produto_id, "mensagem": "Produto adicionado com sucesso"}), 201
     except Exception as e:
@@ -454,6 +496,7 @@ def api_atualizar_produto(produto_id):
 
         conn.commit()
         conn.close()
+        invalidar(CATALOGO_PRODUTOS)
 
         return jsonify({"mensagem": "Produto atualizado com sucesso"})
     except Exception as e:
@@ -475,47 +518,124 @@ def api_excluir_produto(produto_id):
 
         conn.commit()
         conn.close()
+        invalidar(CATALOGO_PRODUTOS)
 
         return jsonify({"mensagem": "Produto excluído com sucesso"})
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
+# Parâmetros que ativam a busca paginada em /api/pedidos
+PARAMETROS_BUSCA_PEDIDOS = ('limite', 'cursor', 'status', 'cliente_nome', 'pedido_id',
+                            'data_inicial', 'data_final', 'ordenacao')
+
 @app.route('/api/pedidos', methods=['GET'])
 @requer_login
+@get_condicional(PEDIDOS, CATALOGO_PRODUTOS)
 def api_listar_pedidos():
-    """API para listar todos os pedidos"""
+    """
+    API para listar todos os pedidos.
+    Com parâmetros de busca (filtros, ordenacao, limite, cursor) retorna uma
+    página paginada por cursor: {pedidos, proximo_cursor, tem_proxima}.
+    Com ?since=<cursor> retorna só as alterações: {pedidos, removidos, cursor, tem_mais}.
+    """
+    if 'since' in request.args:
+        try:
+            cursor, limite = _parametros_alteracoes()
+            return jsonify(PedidoService().listar_alteracoes(cursor, limite=limite))
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+        except Exception as e:
+            return jsonify({"erro": str(e)}), 500
+
+    if any(parametro in request.args for parametro in PARAMETROS_BUSCA_PEDIDOS):
+        try:
+            filtros = {
+                chave: request.args.get(chave)
+                for chave in PARAMETROS_BUSCA_PEDIDOS
+                if chave not in ('limite', 'cursor') and request.args.get(chave)
+            }
+            pagina = PedidoService().listar_pedidos_paginado(
+                filtros,
+                limite=request.args.get('limite', 20, type=int),
+                cursor=request.args.get('cursor')
+            )
+            return jsonify(pagina)
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+        except Exception as e:
+            return jsonify({"erro": str(e)}), 500
+
     try:
+        # Accept: application/x-ndjson ou ?stream=1 enviam os pedidos conforme são lidos
+        formato = formato_stream()
+        if formato:
+            return resposta_stream(_iterar_pedidos_legado(), formato)
+
+        return jsonify(_listar_pedidos_legado())
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@coalescer(PEDIDOS, CATALOGO_PRODUTOS)
+def _listar_pedidos_legado():
+    """Lista completa do formato legado; requisições simultâneas compartilham a mesma leitura"""
+    return list(_iterar_pedidos_legado())
+
+def _iterar_pedidos_legado(tamanho_lote=1000):
+    """
+    Percorre os pedidos ativos no formato legado de GET /api/pedidos
+    (linha do pedido + 'produtos'), em páginas por id decrescente.
+    Pedidos e produtos de cada página são lidos na mesma conexão (a da
+    unidade de trabalho), então a requisição ocupa uma só conexão do pool.
+    """
+    ultimo_id = None
+
+    while True:
+        condicao, params = "", [tamanho_lote]
+        if ultimo_id is not None:
+            condicao, params = "AND id < %s", [ultimo_id, tamanho_lote]
+
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"""
+                SELECT id, cliente_nome, cliente_telefone, cliente_email, cliente_endereco, 
+                       status, data_pedido
+                FROM pedidos
+                WHERE deletado = 0 {condicao}
+                ORDER BY id DESC
+                LIMIT %s
+            """, tuple(params))
+            pedidos = cursor.fetchall()
+
+            produtos_por_pedido = {pedido['id']: [] for pedido in pedidos}
+            if pedidos:
+                cursor.execute(f"""
+                    SELECT ip.*, p.nome, p.preco
+                    FROM itens_pedido ip
+                    JOIN produtos p ON ip.produto_id = p.id
+                    WHERE ip.pedido_id IN ({', '.join(['%s'] * len(pedidos))})
+                    ORDER BY ip.id
+                """, tuple(produtos_por_pedido))
+                for item in cursor.fetchall():
+                    produtos_por_pedido[item['pedido_id']].append(item)
+        finally:
+            cursor.close()
+            conn.close()
 
-        # Buscar todos os pedidos
-        cursor.execute("""
-            SELECT id, cliente_nome, cliente_telefone, cliente_email, cliente_endereco, 
-                   status, data_pedido
-            FROM pedidos
-            WHERE deletado = 0
-            ORDER BY id DESC
-        """)
-        pedidos = cursor.fetchall()
-
-        # Para cada pedido, buscar seus produtos
         for pedido in pedidos:
-            cursor.execute("""
-                SELECT ip.*, p.nome, p.preco
-                FROM itens_pedido ip
-                JOIN produtos p ON ip.produto_id = p.id
-                WHERE ip.pedido_id = %s
-            """, (pedido['id'],))
-            pedido['produtos'] = cursor.fetchall()
+            pedido['produtos'] = produtos_por_pedido[pedido['id']]
+            yield pedido
 
-        conn.close()
-        return jsonify(pedidos)
-    except Exception as e:
-        return jsonify({"erro": str(e)}), 500
+        if len(pedidos) < tamanho_lote:
+            return
+        ultimo_id = pedidos[-1]['id']
 
 @app.route('/api/pedidos', methods=['POST'])
 def api_criar_pedido():
-    """API para criar um novo pedido"""
+    """
+    API para criar um novo pedido.
+    Produtos validados e estoque baixado em uma única transação (ver PedidoService.criar_pedido).
+    """
     try:
         data = request.json
 
@@ -523,57 +643,23 @@ def api_criar_pedido():
         if not data.get('produtos') or not data.get('cliente_nome') or not data.get('cliente_telefone'):
             return jsonify({"erro": "Dados incompletos para o pedido"}), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Criar pedido
-        cursor.execute("""
-            INSERT INTO pedidos (cliente_nome, cliente_telefone, cliente_email, cliente_endereco, 
-                               status, data_pedido)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (
-            data['cliente_nome'],
-            data['cliente_telefone'],
-            data.get('cliente_email', ''),
-            data.get('cliente_endereco', ''),
-            'Pendente',
-            datetime.now().strftime('%d/%m/%Y %H:%M:%S')
-        ))
-
-        pedido_id = cursor.lastrowid
-
-        # Adicionar itens ao pedido
-        for item in data['produtos']:
-            # Obter informações do produto
-            cursor.execute("SELECT * FROM produtos WHERE id = %s", (item['id'],))
-            produto = cursor.fetchone()
-
-            if not produto:
-                conn.rollback()
-                conn.close()
-                return jsonify({"erro": f"Produto não encontrado: {item['id']}"}), 404
-
-            # Verificar estoque
-            if produto[4] < item['quantidade']:  # produto[4] é a quantidade_estoque
-                conn.rollback()
-                conn.close()
-                return jsonify({"erro": f"Estoque insuficiente para o produto: {produto[1]}"}), 400
-
-            # Adicionar item ao pedido
-            cursor.execute("""
-                INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unitario)
-                VALUES (%s, %s, %s, %s)
-            """, (pedido_id, item['id'], item['quantidade'], produto[3]))  # produto[3] é o preço
-
-            # Atualizar estoque
-            cursor.execute("""
-                UPDATE produtos SET quantidade_estoque = quantidade_estoque - %s
-                WHERE id = %s
-            """, (item['quantidade'], item['id']))
-
-        conn.commit()
+        pedido_criado = PedidoService().criar_pedido(
+            {
+                'nome': data['cliente_nome'],
+                'telefone': data['cliente_telefone'],
+                'email': data.get('cliente_email', ''),
+                'endereco': data.get('cliente_endereco', '')
+            },
+            data['produtos'],
+            status=StatusPedido.ENVIADO,
+            reservar_estoque=True
+        )
+        pedido_id = pedido_criado['id']
 
         # Buscar o pedido completo para retornar
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
         cursor.execute("SELECT * FROM pedidos WHERE id = %s", (pedido_id,))
         pedido = cursor.fetchone()
 
@@ -593,13 +679,13 @@ def api_criar_pedido():
             "pedido": pedido,
             "itens": itens
         }), 201
+    except ProdutoNaoEncontradoException as e:
+        return jsonify({"erro": f"Produto não encontrado: {e.produto_id}"}), 404
+    except EstoqueInsuficienteException as e:
+        return jsonify({"erro": f"Estoque insuficiente para o produto: {e.produto_nome}"}), 400
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
     except Exception as e:
-        # Tentar fazer rollback em caso de erro
-        try:
-            conn.rollback()
-            conn.close()
-        except:
-            pass
         return jsonify({"erro": str(e)}), 500
 
 @app.route('/api/pedidos/<int:pedido_id>', methods=['DELETE'])
@@ -618,40 +704,41 @@ def api_excluir_pedido(pedido_id):
             conn.close()
             return jsonify({"erro": "Pedido não encontrado"}), 404
 
-        # Para pedidos concluídos, apenas marcamos como deletado
-        if pedido['status'] == 'Concluído':
+        # O pedido deixa de contar nos relatórios
+        RelatorioRepository().remover_pedido(cursor, pedido_id)
+
+        # Pedidos concluídos ou sem estoque reservado: apenas marcamos como deletado
+        if pedido['status'] in ('Concluído', 'Entregue') or not pedido.get('estoque_reservado'):
             cursor.execute("""
                 UPDATE pedidos SET deletado = 1
                 WHERE id = %s
             """, (pedido_id,))
             conn.commit()
             conn.close()
+            invalidar(PEDIDOS)
             return jsonify({"mensagem": "Pedido excluído com sucesso"})
 
-        # Para pedidos pendentes, revertemos o estoque e depois excluímos
+        # Para pedidos com estoque reservado, devolvemos o estoque de todos os itens em um comando
         cursor.execute("""
-            SELECT ip.produto_id, ip.quantidade 
-            FROM itens_pedido ip
-            WHERE ip.pedido_id = %s
+            UPDATE produtos p
+            JOIN (
+                SELECT produto_id, SUM(quantidade) AS quantidade
+                FROM itens_pedido
+                WHERE pedido_id = %s
+                GROUP BY produto_id
+            ) ip ON ip.produto_id = p.id
+            SET p.quantidade_estoque = p.quantidade_estoque + ip.quantidade
         """, (pedido_id,))
-        itens = cursor.fetchall()
-
-        # Restaurar estoque para cada item
-        for item in itens:
-            cursor.execute("""
-                UPDATE produtos 
-                SET quantidade_estoque = quantidade_estoque + %s
-                WHERE id = %s
-            """, (item['quantidade'], item['produto_id']))
 
         # Marcar pedido como deletado
         cursor.execute("""
-            UPDATE pedidos SET deletado = 1
+            UPDATE pedidos SET deletado = 1, estoque_reservado = 0
             WHERE id = %s
         """, (pedido_id,))
 
         conn.commit()
         conn.close()
+        invalidar(CATALOGO_PRODUTOS, PEDIDOS)
 
         return jsonify({"mensagem": "Pedido excluído com sucesso"})
     except Exception as e:
@@ -659,6 +746,7 @@ def api_excluir_pedido(pedido_id):
 
 @app.route('/api/usuarios', methods=['GET'])
 @requer_gerente
+@get_condicional(USUARIOS)
 def api_listar_usuarios():
     """API para listar todos os usuários"""
     try:
@@ -710,6 +798,7 @@ def api_criar_usuario():
         usuario_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        invalidar(USUARIOS)
 
         return jsonify({
             "id": usuario_id,
@@ -792,6 +881,7 @@ def api_atualizar_usuario(usuario_id):
 
         conn.commit()
         conn.close()
+        invalidar(USUARIOS)
 
         return jsonify({"mensagem": "Usuário atualizado com sucesso"})
     except Exception as e:
@@ -821,6 +911,7 @@ def api_excluir_usuario(usuario_id):
 
         conn.commit()
         conn.close()
+        invalidar(USUARIOS)
 
         return jsonify({"mensagem": "Usuário excluído com sucesso"})
     except Exception as e:
@@ -903,238 +994,50 @@ def erro_interno(e):
 
 def inicializar_banco():
     """Inicializa o banco de dados com tabelas e dados iniciais se necessário"""
-    import logging
-    import traceback
-
-    logger = logging.getLogger("db_initialization")
-    logger.info("Iniciando processo de inicialização do banco de dados...")
-
-    try:
-        logger.info("Tentando obter conexão com o banco de dados...")
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        logger.info("Conexão com o banco de dados estabelecida com sucesso")
-
-        # Verificar se tabela usuarios existe
-        logger.info("Verificando se a tabela 'usuarios' existe...")
-        try:
-            cursor.execute("SHOW TABLES LIKE 'usuarios'")
-            tabela_existe = cursor.fetchone()
-            if not tabela_existe:
-                logger.info("Tabela 'usuarios' não existe. Criando...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS usuarios (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        nome VARCHAR(100) NOT NULL,
-                        email VARCHAR(150) UNIQUE NOT NULL,
-                        telefone VARCHAR(20),
-                        senha_hash VARCHAR(255) NOT NULL,
-                        senha_bruta VARCHAR(100),
-                        tipo ENUM('funcionario', 'gerente', 'dev') NOT NULL DEFAULT 'funcionario',
-                        data_criacao DATETIME NOT NULL,
-                        deletado BOOLEAN NOT NULL DEFAULT 0
-                    )
-                """)
-                logger.info("Tabela 'usuarios' criada com sucesso")
-            else:
-                logger.info("Tabela 'usuarios' já existe")
-        except Exception as e:
-            logger.error(f"Erro ao verificar/criar tabela 'usuarios': {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
-
-        # Verificar se tabela produtos existe
-        logger.info("Verificando se a tabela 'produtos' existe...")
-        try:
-            cursor.execute("SHOW TABLES LIKE 'produtos'")
-            tabela_existe = cursor.fetchone()
-            if not tabela_existe:
-                logger.info("Tabela 'produtos' não existe. Criando...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS produtos (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        nome VARCHAR(100) NOT NULL,
-                        descricao TEXT,
-                        preco DECIMAL(10, 2) NOT NULL,
-                        quantidade_estoque INT NOT NULL DEFAULT 0,
-                        imagem_url VARCHAR(255),
-                        data_criacao DATETIME NOT NULL,
-                        deletado BOOLEAN NOT NULL DEFAULT 0
-                    )
-                """)
-                logger.info("Tabela 'produtos' criada com sucesso")
-            else:
-                logger.info("Tabela 'produtos' já existe")
-        except Exception as e:
-            logger.error(f"Erro ao verificar/criar tabela 'produtos': {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
-
-        # Verificar se tabela pedidos existe
-        logger.info("Verificando se a tabela 'pedidos' existe...")
-        try:
-            cursor.execute("SHOW TABLES LIKE 'pedidos'")
-            tabela_existe = cursor.fetchone()
-            if not tabela_existe:
-                logger.info("Tabela 'pedidos' não existe. Criando...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS pedidos (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        cliente_nome VARCHAR(100) NOT NULL,
-                        cliente_telefone VARCHAR(20) NOT NULL,
-                        cliente_email VARCHAR(150),
-                        cliente_endereco TEXT NOT NULL,
-                        status ENUM('Pendente', 'Concluído') NOT NULL DEFAULT 'Pendente',
-                        data_pedido VARCHAR(20) NOT NULL,
-                        data_criacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                        deletado BOOLEAN NOT NULL DEFAULT 0
-                    )
-                """)
-                logger.info("Tabela 'pedidos' criada com sucesso")
-            else:
-                logger.info("Tabela 'pedidos' já existe")
-        except Exception as e:
-            logger.error(f"Erro ao verificar/criar tabela 'pedidos': {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
-
-        # Verificar se tabela itens_pedido existe
-        logger.info("Verificando se a tabela 'itens_pedido' existe...")
-        try:
-            cursor.execute("SHOW TABLES LIKE 'itens_pedido'")
-            tabela_existe = cursor.fetchone()
-            if not tabela_existe:
-                logger.info("Tabela 'itens_pedido' não existe. Criando...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS itens_pedido (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        pedido_id INT NOT NULL,
-                        produto_id INT NOT NULL,
-                        quantidade INT NOT NULL,
-                        preco_unitario DECIMAL(10, 2) NOT NULL,
-                        FOREIGN KEY (pedido_id) REFERENCES pedidos(id),
-                        FOREIGN KEY (produto_id) REFERENCES produtos(id)
-                    )
-                """)
-                logger.info("Tabela 'itens_pedido' criada com sucesso")
-            else:
-                logger.info("Tabela 'itens_pedido' já existe")
-        except Exception as e:
-            logger.error(f"Erro ao verificar/criar tabela 'itens_pedido': {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
-
-        # Verificar se tabela tokens_recuperacao existe
-        logger.info("Verificando se a tabela 'tokens_recuperacao' existe...")
-        try:
-            cursor.execute("SHOW TABLES LIKE 'tokens_recuperacao'")
-            tabela_existe = cursor.fetchone()
-            if not tabela_existe:
-                logger.info("Tabela 'tokens_recuperacao' não existe. Criando...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS tokens_recuperacao (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        usuario_id INT NOT NULL,
-                        token VARCHAR(100) NOT NULL,
-                        validade FLOAT NOT NULL,
-                        usado BOOLEAN NOT NULL DEFAULT 0,
-                        data_criacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-                    )
-                """)
-                logger.info("Tabela 'tokens_recuperacao' criada com sucesso")
-            else:
-                logger.info("Tabela 'tokens_recuperacao' já existe")
-        except Exception as e:
-            logger.error(f"Erro ao verificar/criar tabela 'tokens_recuperacao': {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
-
-        # Verificar se existe pelo menos um produto de exemplo
-        logger.info("Verificando se existem produtos cadastrados...")
-        try:
-            cursor.execute("SELECT COUNT(*) FROM produtos")
-            count = cursor.fetchone()[0]
-
-            if count == 0:
-                logger.info("Nenhum produto encontrado. Inserindo produtos de exemplo...")
-                # Inserir alguns produtos de exemplo
-                produtos_exemplo = [
-                    {
-                        "nome": "Vinho Tinto Cabernet Sauvignon",
-                        "descricao": "Vinho tinto encorpado com notas de frutas vermelhas maduras e um toque de carvalho.",
-                        "preco": 89.90,
-                        "quantidade_estoque": 25,
-                        "imagem_url": "/static/images/produtos/vinho_tinto.jpg"
-                    },
-                    {
-                        "nome": "Espumante Brut Rosé",
-                        "descricao": "Espumante leve e refrescante com delicado aroma frutado e perlage fino e persistente.",
-                        "preco": 69.90,
-                        "quantidade_estoque": 15,
-                        "imagem_url": "/static/images/produtos/espumante_rose.jpg"
-                    },
-                    {
-                        "nome": "Whisky Single Malt 12 Anos",
-                        "descricao": "Whisky escocês com notas de mel, caramelo e um leve toque defumado. Envelhecido por 12 anos.",
-                        "preco": 289.90,
-                        "quantidade_estoque": 8,
-                        "imagem_url": "/static/images/produtos/whisky.jpg"
-                    }
-                ]
-
-                for produto in produtos_exemplo:
-                    from datetime import datetime
-                    logger.info(f"Inserindo produto: {produto['nome']}")
-                    cursor.execute("""
-                        INSERT INTO produtos (nome, descricao, preco, quantidade_estoque, imagem_url, data_criacao)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (
-                        produto["nome"],
-                        produto["descricao"],
-                        produto["preco"],
-                        produto["quantidade_estoque"],
-                        produto["imagem_url"],
-                        datetime.now()
-                    ))
-                    produto_id = cursor.lastrowid
-                    logger.info(f"Produto '{produto['nome']}' inserido com ID {produto_id}")
-
-                logger.info("Produtos de exemplo inseridos com sucesso")
-            else:
-                logger.info(f"Já existem {count} produtos cadastrados")
-        except Exception as e:
-            logger.error(f"Erro ao verificar/inserir produtos: {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
-
-        conn.commit()
-        logger.info("Commit realizado com sucesso")
-        cursor.close()
-        conn.close()
-        logger.info("Conexão fechada")
-        logger.info("Banco de dados inicializado com sucesso!")
-    except Exception as e:
-        logger.critical(f"Erro crítico ao inicializar banco de dados: {str(e)}")
-        logger.critical(traceback.format_exc())
-        print(f"Erro ao inicializar banco de dados: {str(e)}")
+    if not setup_database():
+        print("Erro ao inicializar banco de dados: verifique o log de migrações")
 
 inicializar_banco()
 
 # Importar serviços
 from backend.application.services.produto_service import ProdutoService
 from backend.application.services.movimentacao_service import MovimentacaoService
+from backend.application.services.pedido_service import PedidoService
+from backend.application.services.job_service import JobService, PermissaoJobNegada
+from backend.application.services.relatorio_service import RelatorioService
+from backend.infrastructure.jobs import executor as jobs_executor
+
+from backend.infrastructure.repositories.produto_repository import ProdutoRepository
 
 # Instanciar serviços
-produto_service = ProdutoService()
+produto_service = ProdutoService(ProdutoRepository())
 movimentacao_service = MovimentacaoService()
+job_service = JobService()
+relatorio_service = RelatorioService()
+
+# Jobs deixados pendentes por workers encerrados deste host
+jobs_executor.recuperar_interrompidos()
 
 # Rotas para a API de Movimentações de Estoque
 @app.route('/api/estoque/movimentacoes', methods=['GET'])
+@get_condicional(MOVIMENTACOES, CATALOGO_PRODUTOS)
 def listar_movimentacoes():
+    """
+    Lista as movimentações de estoque.
+    Com ?since=<cursor> retorna só as novas: {movimentacoes, cursor, tem_mais}.
+    Com Accept: application/x-ndjson ou ?stream=1 a lista é enviada em streaming.
+    """
     try:
+        if 'since' in request.args:
+            cursor, limite = _parametros_alteracoes()
+            return jsonify(movimentacao_service.listar_alteracoes(cursor, limite=limite))
+        formato = formato_stream()
+        if formato:
+            return resposta_stream(movimentacao_service.iterar_movimentacoes(), formato)
         movimentacoes = movimentacao_service.listar_movimentacoes()
         return jsonify(movimentacoes)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -1159,9 +1062,60 @@ def registrar_movimentacao():
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
+@app.route('/api/estoque/movimentacoes/lote', methods=['POST'])
+@requer_login
+def registrar_movimentacoes_lote():
+    """
+    Registra várias movimentações de uma vez (recebimento de carga, inventário).
+    Aceita JSON ({"modo", "parcial", "observacao", "movimentacoes": [...]}, ou só a lista)
+    ou CSV (corpo text/csv ou arquivo no campo 'arquivo', com modo/parcial na query string).
+    Retorna o resultado de cada linha; sem 'parcial', qualquer erro cancela o lote inteiro.
+    """
+    try:
+        opcoes = request.args.to_dict()
+
+        if request.is_json:
+            corpo = request.get_json()
+            if isinstance(corpo, dict):
+                opcoes.update({chave: valor for chave, valor in corpo.items() if chave != 'movimentacoes'})
+                linhas = corpo.get('movimentacoes') or []
+            else:
+                linhas = corpo or []
+        else:
+            arquivo = request.files.get('arquivo')
+            conteudo = arquivo.read() if arquivo else request.get_data()
+            linhas = movimentacao_service.ler_csv_lote(conteudo.decode('utf-8-sig'))
+            opcoes.update(request.form.to_dict())
+
+        parcial = str(opcoes.get('parcial', '')).lower() in ('1', 'true', 'sim')
+        resultado = movimentacao_service.registrar_lote(
+            linhas,
+            modo=opcoes.get('modo', 'movimentacao'),
+            parcial=parcial,
+            observacao=opcoes.get('observacao')
+        )
+
+        # Lote recusado: status 400 também desfaz a transação da requisição
+        status = 400 if resultado['erros'] and not parcial else 201
+        return jsonify(resultado), status
+    except UnicodeDecodeError:
+        return jsonify({"erro": "O arquivo CSV deve estar em UTF-8"}), 400
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
 @app.route('/api/produtos/<int:produto_id>/movimentacoes', methods=['GET'])
+@get_condicional(MOVIMENTACOES, CATALOGO_PRODUTOS)
 def listar_movimentacoes_produto(produto_id):
+    """
+    Lista as movimentações de um produto.
+    Com Accept: application/x-ndjson ou ?stream=1 a lista é enviada em streaming.
+    """
     try:
+        formato = formato_stream()
+        if formato:
+            return resposta_stream(movimentacao_service.iterar_movimentacoes(produto_id), formato)
         movimentacoes = movimentacao_service.listar_movimentacoes_por_produto(produto_id)
         return jsonify(movimentacoes)
     except Exception as e:
@@ -1172,26 +1126,181 @@ def listar_movimentacoes_produto(produto_id):
 @requer_login
 def exportar_estoque_excel():
     """
-    Gera um arquivo Excel com os dados do estoque atual e retorna para download.
+    Gera a planilha do estoque atual e retorna para download.
+    Parâmetros opcionais: formato (xlsx ou csv), estoque_baixo, estoque_maximo,
+    movimentacoes (inclui as movimentações) e data_inicial/data_final (AAAA-MM-DD).
+    Com assincrono=1 a planilha é gerada em segundo plano: retorna 202 com o
+    job a acompanhar em /api/jobs/<id>.
     """
     try:
-        # Usar o método que retorna bytes diretamente
-        excel_bytes = produto_service.exportar_estoque_para_excel_bytes()
+        filtros = request.args.to_dict()
+        for chave in ('estoque_baixo', 'movimentacoes'):
+            filtros[chave] = filtros.get(chave, '').lower() in ('1', 'true', 'sim')
+
+        if filtros.pop('assincrono', '').lower() in ('1', 'true', 'sim'):
+            return _resposta_job_criado(job_service.criar_job(
+                'exportar_estoque', filtros, session['usuario_id'], session.get('usuario_tipo')))
+
+        exportacao = produto_service.exportar_estoque(filtros, formato=filtros.get('formato', 'xlsx'))
         
         # Gerar nome do arquivo com timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        nome_arquivo = f"estoque_{timestamp}.xlsx"
+        nome_arquivo = f"estoque_{timestamp}.{exportacao['extensao']}"
         
-        # Retornar o arquivo para download
+        # Retornar o arquivo temporário para download (fechado ao fim da resposta)
         return send_file(
-            excel_bytes,
+            exportacao['arquivo'],
             as_attachment=True,
             download_name=nome_arquivo,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype=exportacao['mimetype']
         )
+    except jobs_executor.FilaJobsCheia as e:
+        return jsonify({"erro": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+# Rotas para jobs em segundo plano
+def _pode_ver_todos_jobs():
+    return session.get('usuario_tipo') in ['gerente', 'dev']
+
+def _resposta_job_criado(job):
+    """Resposta 202 com o endereço de acompanhamento do job"""
+    job['url'] = url_for('api_obter_job', job_id=job['id'])
+    response = jsonify(job)
+    response.status_code = 202
+    response.headers['Location'] = job['url']
+    return response
+
+@app.route('/api/jobs', methods=['POST'])
+@requer_login
+def api_criar_job():
+    """
+    Enfileira um job em segundo plano: {"tipo": ..., "parametros": {...}}.
+    Tipos: exportar_estoque, relatorio_pedidos (só gerentes), importar_movimentacoes.
+    Retorna 202 com o id do job; o andamento é consultado em /api/jobs/<id>.
+    """
+    try:
+        dados = request.get_json(silent=True) or {}
+        if not dados.get('tipo'):
+            return jsonify({"erro": "Tipo do job não informado"}), 400
+
+        job = job_service.criar_job(dados['tipo'], dados.get('parametros'),
+                                    session['usuario_id'], session.get('usuario_tipo'))
+        return _resposta_job_criado(job)
+    except PermissaoJobNegada as e:
+        return jsonify({"erro": str(e)}), 403
+    except jobs_executor.FilaJobsCheia as e:
+        return jsonify({"erro": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@app.route('/api/jobs', methods=['GET'])
+@requer_login
+def api_listar_jobs():
+    """Lista os jobs mais recentes do usuário logado"""
+    try:
+        limite = min(request.args.get('limite', 50, type=int), 200)
+        return jsonify(job_service.listar_jobs(session['usuario_id'], limite))
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@requer_login
+def api_obter_job(job_id):
+    """
+    Status e progresso de um job.
+    Enquanto o job não termina, o cabeçalho Retry-After sugere o intervalo de consulta.
+    """
+    try:
+        job = job_service.obter_job(job_id, session['usuario_id'], _pode_ver_todos_jobs())
+        if not job:
+            return jsonify({"erro": "Job não encontrado"}), 404
+
+        if job['status'] == 'concluido' and job['nome_resultado']:
+            job['url_resultado'] = url_for('api_resultado_job', job_id=job_id)
+
+        response = jsonify(job)
+        if job['status'] in ('pendente', 'executando'):
+            response.headers['Retry-After'] = '2'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
+@app.route('/api/jobs/<job_id>/resultado', methods=['GET'])
+@requer_login
+def api_resultado_job(job_id):
+    """Download do resultado de um job concluído"""
+    try:
+        resultado = job_service.obter_resultado(job_id, session['usuario_id'], _pode_ver_todos_jobs())
+        if not resultado or not os.path.exists(resultado['arquivo']):
+            return jsonify({"erro": "Resultado não disponível"}), 404
+
+        return send_file(
+            resultado['arquivo'],
+            as_attachment=True,
+            download_name=resultado['nome'],
+            mimetype=resultado['mimetype']
+        )
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+
+@app.route('/api/relatorios/pedidos', methods=['GET'])
+@requer_gerente
+@get_condicional(PEDIDOS)
+def api_relatorio_pedidos():
+    """
+    Relatório de pedidos (totais, resumo por status, produtos mais pedidos e
+    distribuidores), calculado a partir das tabelas agregadas por dia.
+    Parâmetros opcionais: status, data_inicial e data_final (AAAA-MM-DD).
+    """
+    try:
+        return jsonify(relatorio_service.gerar_relatorio_pedidos(request.args.to_dict()))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@app.route('/api/relatorios/serie', methods=['GET'])
+@requer_gerente
+@get_condicional(PEDIDOS, MOVIMENTACOES, CATALOGO_PRODUTOS)
+def api_relatorio_serie():
+    """
+    Série temporal de vendas, receita e movimentação de estoque para os gráficos de relatórios.
+    Parâmetros opcionais: agrupamento (dia, semana ou mes), data_inicial e
+    data_final (AAAA-MM-DD), produto_id ou distribuidor_id e max_pontos
+    (a série longa é reduzida a esse número de pontos).
+    """
+    try:
+        return jsonify(relatorio_service.gerar_serie(request.args.to_dict()))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@app.route('/api/relatorios/analise', methods=['GET'])
+@requer_gerente
+@get_condicional(PEDIDOS)
+def api_relatorio_analise():
+    """
+    Análise de pedidos de um período (ticket médio, percentis do valor dos
+    pedidos, ranking de produtos e distribuidores), calculada em formato
+    colunar com NumPy. Parâmetros opcionais: data_inicial, data_final,
+    status, top e ordenar_por (quantidade ou valor).
+    """
+    try:
+        return jsonify(relatorio_service.gerar_analise(request.args.to_dict()))
+    except AnaliseIndisponivel as e:
+        return jsonify({"erro": str(e)}), 501
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
 
 @app.route('/api/pedidos/<int:pedido_id>/status', methods=['PUT'])
 @requer_login
@@ -1318,25 +1427,54 @@ def api_obter_pedido(pedido_id):
         return jsonify({"erro": str(e)}), 500
 
 
-@app.route('/api/distribuidores', methods=['GET'])
-@requer_login
-def api_listar_distribuidores():
-    """Lista todos os distribuidores disponíveis"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+# Lista de distribuidores em cache, invalidada por escritas em usuários
+_distribuidores_cache = CacheVersionado(USUARIOS)
 
-        # Buscar usuários que são distribuidores (gerentes)
+def _carregar_distribuidores():
+    """
+    Busca os usuários que são distribuidores (gerentes).
+    Usa uma conexão própria do pool: o cache é compartilhado entre processos
+    e não pode ser montado com a transação (ou o snapshot) da requisição.
+    """
+    conn = get_connection_pool().get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
         cursor.execute("""
             SELECT id, nome, email, telefone 
             FROM usuarios 
             WHERE tipo IN ('gerente', 'dev') AND deletado = 0
         """)
-
-        distribuidores = cursor.fetchall()
+        return cursor.fetchall()
+    finally:
+        cursor.close()
         conn.close()
 
-        return jsonify(distribuidores)
+@app.route('/api/distribuidores', methods=['GET'])
+@requer_login
+@get_condicional(USUARIOS)
+def api_listar_distribuidores():
+    """
+    Lista todos os distribuidores disponíveis.
+    A lista fica em cache até a próxima escrita em usuários (em qualquer worker).
+    """
+    try:
+        return jsonify(_distribuidores_cache.obter(_carregar_distribuidores))
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@app.route('/api/diagnostico/banco', methods=['GET'])
+@requer_gerente
+def api_diagnostico_banco():
+    """Estatísticas do pool de conexões e das queries executadas neste processo"""
+    try:
+        ordenar_por = request.args.get('ordenar_por', 'total_ms')
+        limite = request.args.get('limite', 50, type=int)
+
+        return jsonify({
+            "pool": obter_estatisticas_pool(),
+            "queries": obter_estatisticas_queries(ordenar_por=ordenar_por, limite=limite),
+            "coalescencia": obter_estatisticas_coalescencia()
+        })
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -0,0 +1,104 @@
+"""
+Provedor JSON da aplicação Flask.
+Usa o orjson quando instalado (serialização em C, várias vezes mais rápida
+que o módulo json) e o json da biblioteca padrão caso contrário, com o mesmo
+tratamento de tipos nos dois casos:
+
+    Decimal (preços do MySQL) -> número
+    datetime / date / time    -> ISO 8601 (mesmo formato dos to_dict do domínio)
+    Enum                      -> valor
+    objetos com to_dict()     -> to_dict()
+
+Assim as linhas dos repositórios (dicionários do cursor) podem ir direto
+para jsonify, sem conversão prévia de cada valor.
+"""
+
+import json
+import logging
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    # Dependência opcional: sem ela usa o json da biblioteca padrão
+    orjson = None
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    # Dataclasses do domínio passam pelo to_dict (campos calculados, enums),
+    # e não pela serialização nativa de dataclasses do orjson
+    _OPCOES_ORJSON = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def converter_valor(valor):
+    """
+    Converte os tipos que o JSON não conhece.
+
+    Args:
+        valor: Valor não serializável nativamente
+
+    Returns:
+        Valor equivalente serializável
+
+    Raises:
+        TypeError: Se o tipo não for suportado
+    """
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date, time)):
+        return valor.isoformat()
+    if isinstance(valor, Enum):
+        return valor.value
+    if isinstance(valor, (set, frozenset)):
+        return list(valor)
+    if isinstance(valor, bytes):
+        return valor.decode('utf-8')
+    if hasattr(valor, 'to_dict'):
+        return valor.to_dict()
+    raise TypeError(f"Objeto do tipo {type(valor).__name__} não é serializável em JSON")
+
+
+class ProvedorJSON(DefaultJSONProvider):
+    """Provedor JSON com orjson opcional e conversão uniforme de tipos"""
+
+    default = staticmethod(converter_valor)
+    sort_keys = False
+
+    def _indentar(self):
+        return not (self.compact or (self.compact is None and not self._app.debug))
+
+    def dumps_bytes(self, obj, indentar=False) -> bytes:
+        """Serializa direto para bytes (corpo de resposta), sem str intermediária"""
+        if orjson is not None:
+            opcoes = _OPCOES_ORJSON | (orjson.OPT_INDENT_2 if indentar else 0)
+            return orjson.dumps(obj, default=converter_valor, option=opcoes)
+        return json.dumps(obj, default=converter_valor, ensure_ascii=False,
+                          indent=2 if indentar else None).encode('utf-8')
+
+    def dumps(self, obj, **kwargs) -> str:
+        # Chamadas com opções específicas (ex: sort_keys) ficam com o json padrão
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=converter_valor, option=_OPCOES_ORJSON).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj, self._indentar()) + b"\n",
+                                        mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Instala o provedor JSON na aplicação Flask"""
+    app.json = ProvedorJSON(app)
+    logger.info(f"Serialização JSON: {'orjson' if orjson is not None else 'json (biblioteca padrão)'}")
@@ -0,0 +1,85 @@
+"""
+GET condicional (ETag / Last-Modified / 304) para endpoints de listagem.
+O ETag é derivado das versões de dados (ver cache.versoes) das quais a
+resposta depende, e não do conteúdo: uma requisição com If-None-Match ou
+If-Modified-Since atualizados recebe 304 sem executar a view, ou seja, sem
+consultar o banco nem serializar o JSON. As versões vêm da tabela
+cache_versions, então o ETag emitido por um worker é reconhecido pelos demais.
+
+Os clientes são orientados a revalidar sempre (Cache-Control: no-cache),
+então a resposta nunca é servida de cache sem passar pelo servidor.
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import current_app, request
+
+from backend.infrastructure.cache.versoes import obter_marcador, obter_atualizacao
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+def _gerar_etag(chaves):
+    """
+    ETag das versões das chaves para a URL atual (inclusive a query string)
+    e o Accept, que escolhe o formato da resposta (JSON ou NDJSON)
+    """
+    base = (f"{request.path}?{request.query_string.decode('latin-1')}"
+            f"|{request.headers.get('Accept', '')}|{obter_marcador(chaves)}")
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()[:20]
+
+def _nao_modificado(etag, ultima_modificacao):
+    """Verifica as condições da requisição (If-None-Match tem precedência)"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        return ultima_modificacao.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def _last_modified_seguro(ultima_modificacao):
+    """
+    Last-Modified tem resolução de segundos: só é enviado quando o segundo
+    da última modificação já passou, senão uma escrita ainda neste segundo
+    teria a mesma data e o cliente receberia 304 com dados antigos.
+    """
+    segundo = ultima_modificacao.replace(microsecond=0)
+    if datetime.now(timezone.utc) >= segundo + timedelta(seconds=1):
+        return segundo
+    return None
+
+def get_condicional(*chaves):
+    """
+    Decorator que adiciona ETag e Last-Modified à resposta de um GET e
+    responde 304 quando o cliente já tem a versão atual.
+    Deve ficar abaixo dos decorators de autenticação, que continuam valendo
+    para as respostas 304.
+
+    Args:
+        *chaves: Chaves de versão (cache.versoes) das quais a resposta depende
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            # Versões lidas antes da view: uma escrita durante a consulta
+            # gera outro ETag na próxima requisição
+            etag = _gerar_etag(chaves)
+            ultima_modificacao = max(obter_atualizacao(chave) for chave in chaves)
+
+            if _nao_modificado(etag, ultima_modificacao):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            response.last_modified = _last_modified_seguro(ultima_modificacao)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,123 @@
+"""
+Middleware de orçamento de queries por requisição.
+Conta as queries executadas durante cada requisição Flask, agrupadas pela
+impressão digital do SQL, e avisa quando um endpoint passa do orçamento
+ou repete a mesma query muitas vezes (sintoma típico de N+1).
+
+Configuração (app.config ou variáveis de ambiente de mesmo nome):
+    QUERY_BUDGET: máximo de queries por requisição (padrão 30)
+    QUERY_REPEAT_LIMIT: máximo de execuções da mesma query (padrão 5)
+    QUERY_BUDGET_STRICT: se True, estoura exceção em vez de só avisar
+                         (padrão: ligado quando app.testing)
+"""
+
+import os
+import logging
+from collections import Counter
+
+from flask import g, request, has_request_context
+
+from backend.infrastructure.db import instrumentacao
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class OrcamentoQueriesExcedido(Exception):
+    """Exceção para requisições que excedem o orçamento de queries no modo estrito"""
+    pass
+
+
+class ContadorQueries:
+    """Queries executadas na requisição atual"""
+
+    def __init__(self):
+        self.total = 0
+        self.tempo_ms = 0.0
+        self.por_fingerprint = Counter()
+
+    def registrar(self, fingerprint, duracao_ms):
+        self.total += 1
+        self.tempo_ms += duracao_ms
+        self.por_fingerprint[fingerprint] += 1
+
+    def repetidas(self, limite):
+        """Retorna [(fingerprint, vezes)] das queries executadas mais de `limite` vezes"""
+        return [(fingerprint, vezes) for fingerprint, vezes in self.por_fingerprint.most_common()
+                if vezes > limite]
+
+
+def orcamento_queries(limite=None, repeticoes=None):
+    """
+    Decorator que ajusta o orçamento de queries de um endpoint específico.
+
+    Args:
+        limite: Máximo de queries da requisição (None usa o padrão da aplicação)
+        repeticoes: Máximo de execuções da mesma query (None usa o padrão)
+    """
+    def decorator(f):
+        f.orcamento_queries = {'limite': limite, 'repeticoes': repeticoes}
+        return f
+    return decorator
+
+
+def _observar_query(fingerprint, duracao_ms, linhas):
+    """Observador da instrumentação: soma a query no contador da requisição"""
+    if not has_request_context():
+        return
+    contador = g.get('contador_queries')
+    if contador is not None:
+        contador.registrar(fingerprint, duracao_ms)
+
+
+def _config(app, chave, padrao, conversor):
+    valor = app.config.get(chave, os.getenv(chave))
+    if valor is None:
+        return padrao
+    if conversor is bool and isinstance(valor, str):
+        return valor.lower() in ('1', 'true', 'sim')
+    return conversor(valor)
+
+
+def init_app(app):
+    """
+    Registra a contagem de queries por requisição na aplicação Flask.
+    Toda resposta recebe os cabeçalhos X-Query-Count e X-Query-Time-Ms.
+    """
+    instrumentacao.adicionar_observador(_observar_query)
+
+    @app.before_request
+    def _iniciar_contagem_queries():
+        g.contador_queries = ContadorQueries()
+
+    @app.after_request
+    def _verificar_orcamento_queries(response):
+        contador = g.pop('contador_queries', None)
+        if contador is None:
+            return response
+
+        response.headers['X-Query-Count'] = str(contador.total)
+        response.headers['X-Query-Time-Ms'] = f"{contador.tempo_ms:.1f}"
+
+        view = app.view_functions.get(request.endpoint)
+        ajuste = getattr(view, 'orcamento_queries', {}) if view else {}
+        limite = ajuste.get('limite') or _config(app, 'QUERY_BUDGET', 30, int)
+        repeticoes = ajuste.get('repeticoes') or _config(app, 'QUERY_REPEAT_LIMIT', 5, int)
+
+        problemas = []
+        if contador.total > limite:
+            problemas.append(f"{contador.total} queries (orçamento {limite})")
+        for fingerprint, vezes in contador.repetidas(repeticoes):
+            problemas.append(f"{vezes}x {fingerprint[:200]}")
+
+        if not problemas:
+            return response
+
+        mensagem = f"{request.method} {request.path}: " + "; ".join(problemas)
+        if _config(app, 'QUERY_BUDGET_STRICT', app.testing, bool):
+            raise OrcamentoQueriesExcedido(mensagem)
+
+        logger.warning(f"Orçamento de queries excedido em {mensagem}")
+        response.headers['X-Query-Budget-Warning'] = (
+            f"{contador.total} queries; {len(contador.repetidas(repeticoes))} repetidas")
+        return response
@@ -0,0 +1,90 @@
+"""
+Respostas JSON em streaming para listagens grandes.
+Os itens vêm de um gerador (repositórios iterar_*) e são enviados em blocos
+conforme são lidos do banco: a memória da requisição não cresce com o
+tamanho da tabela e o cliente recebe os primeiros bytes sem esperar o fim.
+
+Ativação (opcional, por requisição):
+    Accept: application/x-ndjson  -> um objeto JSON por linha (NDJSON)
+    ?stream=1                     -> array JSON, no mesmo formato da resposta normal
+"""
+
+import logging
+
+from flask import current_app, request, stream_with_context
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+NDJSON = 'application/x-ndjson'
+
+# Bytes acumulados antes de cada envio ao cliente
+TAMANHO_BLOCO = 64 * 1024
+
+
+def formato_stream():
+    """
+    Retorna o formato de streaming pedido pela requisição.
+
+    Returns:
+        str: 'ndjson', 'json' ou None (resposta normal)
+    """
+    if request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON:
+        return 'ndjson'
+    if request.args.get('stream', '').lower() in ('1', 'true', 'sim'):
+        return 'json'
+    return None
+
+def _serializar(item):
+    provedor = current_app.json
+    if hasattr(provedor, 'dumps_bytes'):
+        return provedor.dumps_bytes(item)
+    return provedor.dumps(item).encode('utf-8')
+
+def _gerar_blocos(itens, formato):
+    bloco = bytearray(b"[" if formato == 'json' else b"")
+    total = 0
+
+    try:
+        for item in itens:
+            if formato == 'json' and total:
+                bloco += b","
+            bloco += _serializar(item)
+            if formato == 'ndjson':
+                bloco += b"\n"
+            total += 1
+
+            if len(bloco) >= TAMANHO_BLOCO:
+                yield bytes(bloco)
+                bloco.clear()
+    except Exception as e:
+        logger.error(f"Erro durante o streaming de {request.path} após {total} itens: {str(e)}")
+        # O status 200 já foi enviado: no NDJSON o erro vai como última linha;
+        # no array JSON a resposta fica sem o ']' final e o cliente acusa o erro
+        if formato == 'ndjson':
+            bloco += _serializar({"erro": str(e)}) + b"\n"
+        yield bytes(bloco)
+        return
+
+    if formato == 'json':
+        bloco += b"]"
+    yield bytes(bloco)
+    logger.info(f"Streaming de {request.path} concluído: {total} itens")
+
+def resposta_stream(itens, formato):
+    """
+    Cria a resposta que envia os itens do gerador em blocos.
+    O contexto da requisição (e sua unidade de trabalho) fica ativo até o
+    último bloco ser enviado.
+
+    Args:
+        itens: Iterável (de preferência gerador) com os itens da listagem
+        formato (str): 'ndjson' ou 'json' (ver formato_stream)
+    """
+    response = current_app.response_class(
+        stream_with_context(_gerar_blocos(itens, formato)),
+        mimetype=NDJSON if formato == 'ndjson' else 'application/json'
+    )
+    # Proxies (nginx) não devem acumular a resposta antes de repassá-la
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
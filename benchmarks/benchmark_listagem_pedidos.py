@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark da listagem de pedidos: carregamento de itens por pedido (N+1)
+versus carregamento em lote usado por PedidoRepository.listar_todos.
+
+Não precisa de um MySQL rodando: as queries são respondidas por um banco
+em memória que simula a latência de ida e volta (RTT) de cada query.
+
+Uso:
+    python benchmarks/benchmark_listagem_pedidos.py [--rtt-ms 0.5] [--itens 3]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Adicionar o diretório raiz ao path do Python
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from backend.infrastructure.repositories import pedido_repository
+from backend.infrastructure.repositories.pedido_repository import PedidoRepository
+
+
+class BancoSimulado:
+    """Responde às queries da listagem a partir de dados em memória"""
+
+    def __init__(self, total_pedidos, itens_por_pedido, rtt):
+        self.rtt = rtt
+        self.queries = 0
+        inicio = datetime(2024, 1, 1)
+
+        self.pedidos = [
+            {
+                'id': pedido_id,
+                'cliente_nome': f"Cliente {pedido_id}",
+                'cliente_telefone': "(11) 99999-9999",
+                'cliente_email': None,
+                'cliente_endereco': "Rua A, 1",
+                'status': 'Enviado',
+                'data_pedido': (inicio + timedelta(minutes=pedido_id)).strftime('%d/%m/%Y %H:%M:%S'),
+                'data_criacao': inicio + timedelta(minutes=pedido_id),
+                'deletado': 0
+            }
+            for pedido_id in range(total_pedidos, 0, -1)
+        ]
+
+        self.itens = {}
+        item_id = 1
+        for pedido in self.pedidos:
+            self.itens[pedido['id']] = []
+            for produto_id in range(1, itens_por_pedido + 1):
+                self.itens[pedido['id']].append({
+                    'id': item_id,
+                    'pedido_id': pedido['id'],
+                    'produto_id': produto_id,
+                    'quantidade': 2,
+                    'preco_unitario': 10.0,
+                    'nome': f"Produto {produto_id}"
+                })
+                item_id += 1
+
+    def execute_query(self, query, params=None, fetch=False, commit=True):
+        """Substitui db_manager.execute_query contando as idas ao banco"""
+        self.queries += 1
+        time.sleep(self.rtt)
+
+        if "FROM itens_pedido" in query:
+            return [item for pedido_id in params for item in self.itens.get(pedido_id, [])]
+        return list(self.pedidos)
+
+
+def listar_n_mais_um(repositorio, banco):
+    """Reproduz a listagem anterior: uma query de itens para cada pedido"""
+    pedidos = []
+    for pedido_data in banco.execute_query("SELECT * FROM pedidos", fetch=True):
+        itens_data = banco.execute_query("SELECT * FROM itens_pedido WHERE ip.pedido_id = %s",
+                                         (pedido_data['id'],), fetch=True)
+        itens = [pedido_repository.ItemPedido(
+            id=i['id'], pedido_id=i['pedido_id'], produto_id=i['produto_id'],
+            quantidade=i['quantidade'], preco_unitario=i['preco_unitario'], nome=i['nome']
+        ) for i in itens_data]
+        pedidos.append(repositorio._montar_pedido(pedido_data, itens))
+    return pedidos
+
+
+def medir(funcao):
+    """Executa a função e retorna (resultado, segundos)"""
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="Latência simulada por query (ms)")
+    parser.add_argument("--itens", type=int, default=3, help="Itens por pedido")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[100, 1000, 5000],
+                        help="Quantidades de pedidos a medir")
+    args = parser.parse_args()
+
+    repositorio = PedidoRepository()
+    execute_query_original = pedido_repository.execute_query
+
+    print(f"RTT simulado: {args.rtt_ms} ms | itens por pedido: {args.itens}")
+    print(f"{'pedidos':>8} | {'N+1 queries':>11} | {'N+1 tempo':>10} | {'lote queries':>12} | {'lote tempo':>10}")
+    print("-" * 64)
+
+    try:
+        for total in args.tamanhos:
+            banco = BancoSimulado(total, args.itens, args.rtt_ms / 1000)
+
+            pedidos_antes, tempo_antes = medir(lambda: listar_n_mais_um(repositorio, banco))
+            queries_antes = banco.queries
+
+            banco.queries = 0
+            pedido_repository.execute_query = banco.execute_query
+            pedidos_depois, tempo_depois = medir(repositorio.listar_todos)
+            queries_depois = banco.queries
+            pedido_repository.execute_query = execute_query_original
+
+            assert [p.to_dict() for p in pedidos_antes] == [p.to_dict() for p in pedidos_depois]
+
+            print(f"{total:>8} | {queries_antes:>11} | {tempo_antes * 1000:>8.1f}ms | "
+                  f"{queries_depois:>12} | {tempo_depois * 1000:>8.1f}ms")
+    finally:
+        pedido_repository.execute_query = execute_query_original
+
+
+if __name__ == '__main__':
+    main()
@@ -225,6 +225,11 @@ let movimentacaoPaginaAtual = 1;
 let movimentacoesPorPagina = 10;
 let filtroMovimentacoes = 'todos';
 
+// Cursores da sincronização incremental (?since=): após a primeira carga,
+// só as alterações são buscadas
+let cursorProdutos = null;
+let cursorMovimentacoes = null;
+
 // Ao carregar a página
 document.addEventListener('DOMContentLoaded', function() {
     // Carregar produtos
@@ -301,26 +306,56 @@ function inicializarEventos() {
     });
 }
 
-// Carregar produtos da API
+// Buscar as alterações desde o cursor, seguindo as páginas enquanto houver mais
+async function buscarAlteracoes(url, campo, cursor) {
+    const alteracoes = { itens: [], removidos: [], cursor: cursor };
+
+    let temMais = true;
+    while (temMais) {
+        const response = await fetch(`${url}?since=${encodeURIComponent(alteracoes.cursor || '')}`);
+        if (!response.ok) {
+            throw new Error(`${response.status}`);
+        }
+
+        const dados = await response.json();
+        alteracoes.itens.push(...dados[campo]);
+        alteracoes.removidos.push(...(dados.removidos || []));
+        alteracoes.cursor = dados.cursor;
+        temMais = dados.tem_mais;
+    }
+
+    return alteracoes;
+}
+
+// Carregar produtos da API (na primeira vez todos, depois só as alterações)
 async function carregarProdutos() {
     try {
-        const response = await fetch('/api/produtos');
-        if (!response.ok) {
-            throw new Error(`Erro ao carregar produtos: ${response.status}`);
+        let alteracoes;
+        try {
+            alteracoes = await buscarAlteracoes('/api/produtos', 'produtos', cursorProdutos);
+        } catch (error) {
+            throw new Error(`Erro ao carregar produtos: ${error.message}`);
         }
 
-        // Obter os produtos e garantir que os tipos sejam corretos
-        const produtosData = await response.json();
-        
+        // Aplicar as alterações sobre a lista atual, pelo id
+        const produtosPorId = new Map(cursorProdutos ? produtos.map(produto => [produto.id, produto]) : []);
+        alteracoes.removidos.forEach(id => produtosPorId.delete(parseInt(id)));
+
         // Normalizar os dados para garantir que os tipos sejam corretos
-        produtos = produtosData.map(produto => ({
-            ...produto,
-            id: parseInt(produto.id) || 0,
-            preco: parseFloat(produto.preco) || 0,
-            quantidade_estoque: parseInt(produto.quantidade_estoque) || 0,
-            descricao: produto.descricao || '',
-            imagem_url: produto.imagem_url || null
-        }));
+        alteracoes.itens.forEach(produto => {
+            const id = parseInt(produto.id) || 0;
+            produtosPorId.set(id, {
+                ...produto,
+                id: id,
+                preco: parseFloat(produto.preco) || 0,
+                quantidade_estoque: parseInt(produto.quantidade_estoque) || 0,
+                descricao: produto.descricao || '',
+                imagem_url: produto.imagem_url || null
+            });
+        });
+
+        produtos = Array.from(produtosPorId.values());
+        cursorProdutos = alteracoes.cursor;
 
         // Aplicar filtros e ordenação
         aplicarFiltros();
@@ -787,19 +822,21 @@ async function carregarProdutosSelect() {
     });
 }
 
-// Carregar movimentações do estoque
+// Carregar movimentações do estoque (na primeira vez todas, depois só as novas)
 async function carregarMovimentacoes() {
     try {
-        const response = await fetch('/api/estoque/movimentacoes');
-        if (!response.ok) {
-            throw new Error(`Erro ao carregar movimentações: ${response.status}`);
+        let alteracoes;
+        try {
+            alteracoes = await buscarAlteracoes('/api/estoque/movimentacoes', 'movimentacoes', cursorMovimentacoes);
+        } catch (error) {
+            throw new Error(`Erro ao carregar movimentações: ${error.message}`);
         }
 
-        // Obter os dados e normalizar
-        const movimentacoesData = await response.json();
-        
+        // Aplicar as novas movimentações sobre a lista atual, pelo id
+        const movimentacoesPorId = new Map(cursorMovimentacoes ? movimentacoes.map(mov => [mov.id, mov]) : []);
+
         // Normalizar os dados
-        movimentacoes = movimentacoesData.map(mov => ({
+        alteracoes.itens.map(mov => ({
             ...mov,
             id: parseInt(mov.id) || 0,
             produto_id: parseInt(mov.produto_id) || 0,
@@ -809,7 +846,10 @@ async function carregarMovimentacoes() {
             estoque_atual: parseInt(mov.estoque_atual) || 0,
             data: new Date(mov.data),
             produto_nome: mov.produto_nome || 'Produto não encontrado'
-        }));
+        })).forEach(mov => movimentacoesPorId.set(mov.id, mov));
+
+        movimentacoes = Array.from(movimentacoesPorId.values());
+        cursorMovimentacoes = alteracoes.cursor;
 
         // Aplicar filtros
         aplicarFiltrosMovimentacoes();
@@ -1114,9 +1154,12 @@ function exportarEstoqueExcel() {
         if (!response.ok) {
             throw new Error('Erro ao gerar o arquivo Excel');
         }
-        return response.blob();
+        // Sem suporte a XLSX no servidor a planilha vem em CSV: usar o nome enviado por ele
+        const disposicao = response.headers.get('Content-Disposition') || '';
+        const nome = disposicao.match(/filename="?([^";]+)"?/);
+        return response.blob().then(blob => ({ blob, nomeArquivo: nome ? nome[1] : null }));
     })
-    .then(blob => {
+    .then(({ blob, nomeArquivo }) => {
         // Criar URL para o blob
         const url = window.URL.createObjectURL(blob);
         
@@ -1128,7 +1171,7 @@ function exportarEstoqueExcel() {
         // Gerar nome do arquivo com data atual
         const date = new Date();
         const timestamp = date.toISOString().split('T')[0].replace(/-/g, '');
-        a.download = `estoque_${timestamp}.xlsx`;
+        a.download = nomeArquivo || `estoque_${timestamp}.xlsx`;
         
         // Adicionar ao documento, clicar e remover
         document.body.appendChild(a);
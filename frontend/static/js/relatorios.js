@@ -24,6 +24,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Inicialização dos dados da tabela
     updateReportTable();
+    carregarResumoVendas();
     
     // Event listeners
     if (filtrosForm) {
@@ -73,6 +74,8 @@ function handleFiltrosSubmit(e) {
         initDemoCharts();
         updateReportTable();
     }, 1500);
+
+    carregarResumoVendas();
 }
 
 /**
@@ -138,29 +141,78 @@ function updateReportTable() {
         `;
         tableBody.appendChild(row);
     });
-    
-    // Atualizar cards de resumo
-    updateSummaryCards(demoData);
 }
 
 /**
- * Atualiza os cards de resumo com valores calculados
- * @param {Array} data - Dados de relatório
+ * Busca no servidor a série de vendas do período dos filtros e atualiza os
+ * cards de resumo. Os totais já vêm calculados: o navegador não soma os dados.
+ * @returns {Promise<Object|null>} Série retornada pela API (null em caso de erro)
+ */
+async function carregarResumoVendas() {
+    const [dataInicial, dataFinal] = document.querySelectorAll('#filtros-form .date-picker');
+    const params = new URLSearchParams({ agrupamento: 'dia' });
+    if (dataInicial && dataInicial.value) params.set('data_inicial', dataInicial.value);
+    if (dataFinal && dataFinal.value) params.set('data_final', dataFinal.value);
+
+    // A série de vendas é restrita a gerentes
+    const resumo = document.querySelector('.report-summary');
+    if (resumo && !resumo.hasAttribute('data-resumo-vendas')) {
+        marcarResumoIndisponivel('Restrito a gerentes');
+        return null;
+    }
+
+    try {
+        // redirect: 'error' evita tratar o redirecionamento para o login como resposta válida
+        const response = await fetch(`/api/relatorios/serie?${params}`, {
+            headers: { 'Accept': 'application/json' },
+            redirect: 'error'
+        });
+        if (!response.ok) {
+            throw new Error(`Status ${response.status}`);
+        }
+        const serie = await response.json();
+        updateSummaryCards(serie.totais);
+        return serie;
+    } catch (error) {
+        console.warn('Não foi possível carregar o resumo de vendas:', error);
+        marcarResumoIndisponivel('Resumo indisponível');
+        return null;
+    }
+}
+
+/**
+ * Substitui os valores dos cards de vendas e receita por um traço
+ * @param {string} motivo - Texto exibido ao passar o mouse sobre o card
+ */
+function marcarResumoIndisponivel(motivo) {
+    document.querySelectorAll('[data-summary="vendas"], [data-summary="receita"]').forEach(el => {
+        el.textContent = '—';
+        el.title = motivo;
+    });
+}
+
+/**
+ * Atualiza os cards de resumo com os totais calculados pelo servidor
+ * @param {Object} totais - Totais da série ({vendas, receita})
  */
-function updateSummaryCards(data) {
-    // Calcular totais
-    const totalVendas = data.reduce((sum, item) => sum + item.vendas, 0);
-    const totalReceita = 'R$ ' + (data.reduce((sum, item) => {
-        const valor = parseFloat(item.receita.replace('R$ ', '').replace('.', '').replace(',', '.'));
-        return sum + valor;
-    }, 0)).toLocaleString('pt-BR', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
+function updateSummaryCards(totais) {
+    const totalVendas = totais.vendas;
+    const totalReceita = 'R$ ' + totais.receita.toLocaleString('pt-BR', {
+        minimumFractionDigits: 2, maximumFractionDigits: 2
+    });
     
     // Atualizar elementos
     const vendasEl = document.querySelector('[data-summary="vendas"]');
     const receitaEl = document.querySelector('[data-summary="receita"]');
     
-    if (vendasEl) vendasEl.textContent = totalVendas;
-    if (receitaEl) receitaEl.textContent = totalReceita;
+    if (vendasEl) {
+        vendasEl.textContent = totalVendas;
+        vendasEl.removeAttribute('title');
+    }
+    if (receitaEl) {
+        receitaEl.textContent = totalReceita;
+        receitaEl.removeAttribute('title');
+    }
 }
 
 /**